@@ -0,0 +1,113 @@
+"""
+Time spent tallying a synthetic transactions ledger and distributing
+amounts, with Decimal amounts and with integer cents.
+
+    python benchmarks/cents.py [ROWS]
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+from decimal import getcontext
+from fractions import Fraction
+
+from oldabe.cents import CentsTally, cents_to_decimal
+from oldabe.decoders import parse_cents, parse_decimal
+from oldabe.distribution import Distribution, to_cents
+from oldabe.repos import FileRepo
+from oldabe.models import Transaction
+from oldabe.tally import Tally
+
+
+class LedgerRepo(FileRepo):
+    Model = Transaction
+
+
+def write_ledger(filename, rows):
+    with open(filename, "w") as f:
+        writer = csv.writer(f)
+        for i in range(rows):
+            writer.writerow(
+                (
+                    f"contributor-{i % 97}@example.com",
+                    f"{(i * 7919) % 100000 / 100:.2f}",
+                    f"payment-{i // 5}.txt",
+                    "abcd123",
+                    "1985-10-26 01:24:00.123456",
+                )
+            )
+
+
+def timed(f):
+    start = time.perf_counter()
+    result = f()
+    return result, time.perf_counter() - start
+
+
+def compare(label, decimal, cents):
+    print(f"{label}:")
+    print(f"  decimal: {decimal:.3f}s")
+    print(f"  cents:   {cents:.3f}s")
+    print(f"  speedup: {decimal / cents:.2f}x")
+
+
+def main():
+    getcontext().prec = 10
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    print(f"rows: {rows}")
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = LedgerRepo()
+        repo.filename = os.path.join(tmp, "transactions.txt")
+        write_ledger(repo.filename, rows)
+
+        with open(repo.filename) as f:
+            rows_read = [(row[0], row[1]) for row in csv.reader(f)]
+        decimal_tally, decimal_time = timed(
+            lambda: Tally(
+                (email, parse_decimal(amount)) for email, amount in rows_read
+            )
+        )
+        cents_tally, cents_time = timed(
+            lambda: CentsTally(
+                (email, parse_cents(amount)) for email, amount in rows_read
+            )
+        )
+        assert cents_tally.to_decimal() == decimal_tally
+        compare("parse and tally amounts", decimal_time, cents_time)
+
+        decimal_tally, decimal_time = timed(
+            lambda: Tally((t.email, t.amount) for t in repo)
+        )
+        cents_repo = LedgerRepo(cents=True)
+        cents_repo.filename = repo.filename
+        cents_tally, cents_time = timed(
+            lambda: CentsTally((t.email, t.amount) for t in cents_repo)
+        )
+        assert cents_tally.to_decimal() == decimal_tally
+        compare("read and tally ledger", decimal_time, cents_time)
+
+    distribution = Distribution(
+        {f"contributor-{i}": Fraction(i + 1, 4950) for i in range(99)}
+    )
+    amounts = [
+        cents_to_decimal((i * 7919) % 100000 + 1) for i in range(rows // 50)
+    ]
+    shareholders = list(distribution)
+    decimal_rows, decimal_time = timed(
+        lambda: [
+            [to_cents(distributed[s]) for s in shareholders]
+            for distributed in map(distribution._distribute, amounts)
+        ]
+    )
+    (_, cents_rows), cents_time = timed(
+        lambda: distribution.distribute_many(amounts)
+    )
+    assert cents_rows == decimal_rows
+    print(f"amounts distributed: {len(amounts)} over 99 shareholders")
+    compare("distribute to cents", decimal_time, cents_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Rows/sec for reading a synthetic transactions ledger, before and after
+compiled row decoders.
+
+    python benchmarks/decoders.py [ROWS]
+"""
+
+import csv
+import dataclasses
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+
+from oldabe.decoders import decoder_for
+from oldabe.models import Transaction
+
+
+def legacy_fix_types(row, Model):
+    """fix_types as it was before decoders were compiled per model"""
+
+    def _cast(field, value):
+        if field.type is Decimal:
+            return Decimal(re.sub("[^0-9.-]", "", value))
+        elif field.type is Fraction:
+            return Fraction(value)
+        elif field.type is datetime:
+            return datetime.fromisoformat(value)
+        else:
+            return value
+
+    return [
+        _cast(field, value)
+        for field, value in zip(dataclasses.fields(Model), row)
+    ]
+
+
+def legacy_decode(row):
+    return Transaction(*legacy_fix_types(row, Transaction))
+
+
+def write_ledger(filename, rows):
+    with open(filename, "w") as f:
+        writer = csv.writer(f)
+        for i in range(rows):
+            writer.writerow(
+                (
+                    f"contributor-{i % 97}@example.com",
+                    f"{(i * 7919) % 100000 / 100:.2f}",
+                    f"payment-{i // 5}.txt",
+                    "abcd123",
+                    "1985-10-26 01:24:00.123456",
+                )
+            )
+
+
+def rows_per_second(filename, decode):
+    start = time.perf_counter()
+    count = 0
+    with open(filename) as f:
+        for row in csv.reader(f, skipinitialspace=True):
+            decode(row)
+            count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "transactions.txt")
+        write_ledger(filename, rows)
+        before = rows_per_second(filename, legacy_decode)
+        after = rows_per_second(filename, decoder_for(Transaction))
+    print(f"rows:   {rows}")
+    print(f"before: {before:,.0f} rows/sec")
+    print(f"after:  {after:,.0f} rows/sec")
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Array-backed distributions for very many contributors.
+
+These give exactly the same results as Distribution, and can be used in
+its place, but do the arithmetic on NumPy arrays of integer cents rather
+than one contributor at a time. NumPy is an optional dependency (pip
+install oldabe[arrays]), see make_distribution in oldabe.distribution for
+how this is selected.
+"""
+
+from decimal import getcontext
+from typing import List, Tuple
+
+import numpy as np
+
+from .distribution import CentsDistribution, _context_key
+
+# Products of cents and weights must fit in int64
+MAX_PRODUCT = 2**63 - 1
+
+_POWERS_OF_TEN = 10 ** np.arange(19, dtype=np.int64)
+
+
+def _round_half_even(n: np.ndarray, divisor: np.ndarray) -> np.ndarray:
+    """
+    n / divisor rounded to the nearest integer, with ties to even
+    """
+    quotient, remainder = np.divmod(n, divisor)
+    return quotient + (
+        (2 * remainder > divisor)
+        | ((2 * remainder == divisor) & (quotient % 2 == 1))
+    )
+
+
+def multiply_cents(
+    cents, coefficients: np.ndarray, exponents: np.ndarray, prec: int
+) -> np.ndarray:
+    """
+    multiply_cents in oldabe.cents, for many weights (or amounts) at once.
+    The products must fit in int64.
+    """
+    product = cents * coefficients
+    digits = np.searchsorted(_POWERS_OF_TEN, np.abs(product), side="right")
+    excess_digits = np.maximum(digits - prec, 0)
+    product = _round_half_even(product, _POWERS_OF_TEN[excess_digits])
+    exponents = exponents + excess_digits
+    scaled = product * _POWERS_OF_TEN[np.maximum(exponents, 0)]
+    shifts = -exponents
+    rounded = _round_half_even(product, _POWERS_OF_TEN[np.clip(shifts, 0, 18)])
+    # dividing by more than the largest power of ten in int64 leaves at
+    # most one (only just over half of 10**19 rounds up to one)
+    rounded = np.where(
+        shifts > 18,
+        np.sign(product) * ((shifts == 19) & (np.abs(product) > 5 * 10**18)),
+        rounded,
+    )
+    return np.where(exponents >= 0, scaled, rounded)
+
+
+class ArrayDistribution(CentsDistribution):
+    """
+    A Distribution that splits amounts amongst its shareholders as arrays.
+
+    Results are exactly the same as with Distribution. Amounts that aren't
+    whole cents are distributed as they would be by Distribution, and those
+    too large for the products to fit in int64 as by CentsDistribution.
+    """
+
+    def invalidate(self):
+        super().invalidate()
+        self._arrays = {}
+
+    def _weight_arrays(self):
+        """
+        The shareholders, the largest coefficient, and the coefficients and
+        exponents of their integer weights as arrays, in the current context.
+        With a high decimal precision, the coefficients may not fit in
+        int64, in which case they are None.
+        """
+        key = _context_key()
+        arrays = self._arrays.get(key)
+        if arrays is None:
+            weights = self._integer_weights()
+            largest = max((abs(c) for _, (c, _) in weights), default=0)
+            arrays = self._arrays[key] = (
+                [shareholder for shareholder, _ in weights],
+                largest,
+                (
+                    np.array([c for _, (c, _) in weights], dtype=np.int64)
+                    if largest <= MAX_PRODUCT
+                    else None
+                ),
+                np.array([e for _, (_, e) in weights], dtype=np.int64),
+            )
+        return arrays
+
+    def _fits(self, cents: int) -> bool:
+        """
+        Whether the products of the amount and the weights fit in int64
+        """
+        _, largest, coefficients, _ = self._weight_arrays()
+        return coefficients is not None and abs(cents) * largest <= MAX_PRODUCT
+
+    def distribute_array(
+        self, cents: int
+    ) -> Tuple[List["str | None"], np.ndarray]:
+        """
+        Distribute an amount in integer cents amongst all shareholders
+        (including None), as an array in the order of the shareholders.
+        The amount must be small enough for the products to fit in int64.
+        """
+        shareholders, _, coefficients, exponents = self._weight_arrays()
+        amounts = multiply_cents(
+            cents, coefficients, exponents, getcontext().prec
+        )
+        difference = int(amounts.sum()) - cents
+        if difference != 0:
+            # the largest amount absorbs the rounding difference, with ties
+            # going to the first shareholder by name, as in Distribution
+            candidates = np.flatnonzero(amounts == amounts.max())
+            recipient = min(candidates, key=lambda i: shareholders[i])
+            amounts[recipient] -= difference
+        return shareholders, amounts
+
+    def distribute_cents(self, cents: int) -> dict[str, int]:
+        if not self._fits(cents):
+            return super().distribute_cents(cents)
+        shareholders, amounts = self.distribute_array(cents)
+        return {
+            shareholder: amount
+            for shareholder, amount in zip(shareholders, amounts.tolist())
+            if shareholder is not None
+        }
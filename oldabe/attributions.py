@@ -0,0 +1,172 @@
+"""
+Attributions as integer shares over a common denominator.
+
+    python -m oldabe.attributions
+
+Diluting attributions multiplies every share by a fraction, so stored as
+independent Fractions, their denominators grow with every investment. Run
+as a module, this migrates an existing attributions.txt by rewriting it
+with the shares bounded as described in Attributions.
+"""
+
+import math
+from fractions import Fraction
+from typing import Dict, Iterator, MutableMapping
+
+from .accounting import assert_attributions_normalized
+from .models import Attribution
+from .repos import AttributionsRepo
+
+# Shares are rescaled once their common denominator would exceed this
+MAX_DENOMINATOR = 10**18
+# The common denominator of rescaled shares
+RESCALED_DENOMINATOR = 10**15
+
+
+class Attributions(MutableMapping[str, Fraction]):
+    """
+    Shares of the project, by contributor
+
+    Shares are kept as integer units of a common denominator, which is kept
+    as small as possible. Shares are exact unless the denominator would
+    exceed MAX_DENOMINATOR, e.g. after many dilutions, in which case all of
+    the shares are rescaled to units of 1/RESCALED_DENOMINATOR. Rescaling
+    uses the largest remainder method, so shares still add up to exactly the
+    same total, and no share is off by more than one unit.
+
+    Dilution doesn't touch every share. Instead, it multiplies a single
+    scale by which all shares are diluted, and records the incoming share
+    relative to that scale. The shares are only recomputed (exactly) when
+    they are next read, however many dilutions there have been since.
+    """
+
+    def __init__(self, shares=()):
+        self._assign(dict(shares))
+
+    def _assign(self, shares: Dict[str, Fraction]):
+        shares = {email: Fraction(share) for email, share in shares.items()}
+        self.denominator = math.lcm(
+            *(share.denominator for share in shares.values())
+        )
+        self.units: Dict[str, int] = {
+            email: share.numerator * (self.denominator // share.denominator)
+            for email, share in shares.items()
+        }
+        # actual shares are (units / denominator + pending) * scale
+        self.scale = Fraction(1)
+        self.pending: Dict[str, Fraction] = {}
+        self._compact()
+
+    def _materialize(self):
+        """
+        Apply any pending dilutions
+        """
+        if self.scale != 1 or self.pending:
+            self._assign(
+                {
+                    email: (
+                        Fraction(units, self.denominator)
+                        + self.pending.get(email, 0)
+                    )
+                    * self.scale
+                    for email, units in self.units.items()
+                }
+            )
+
+    def __getitem__(self, email: str) -> Fraction:
+        self._materialize()
+        return Fraction(self.units[email], self.denominator)
+
+    def __setitem__(self, email: str, share):
+        self._materialize()
+        share = Fraction(share)
+        denominator = math.lcm(self.denominator, share.denominator)
+        self._scale(denominator // self.denominator)
+        self.units[email] = share.numerator * (
+            denominator // share.denominator
+        )
+        self._compact()
+
+    def __delitem__(self, email: str):
+        self._materialize()
+        del self.units[email]
+        self._compact()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.units)
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def __repr__(self):
+        return f"Attributions({dict(self)!r})"
+
+    def total(self) -> Fraction:
+        self._materialize()
+        return Fraction(sum(self.units.values()), self.denominator)
+
+    def dilute(self, incoming_attribution: Attribution):
+        """
+        Scale existing shares by 1 - the incoming share and add the
+        incoming share, so that shares still add up to the same total.
+        """
+        share = Fraction(incoming_attribution.share)
+        email = incoming_attribution.email
+        if share == 1:
+            # nothing is retained, so there is nothing to scale
+            self._assign({**{e: 0 for e in self.units}, email: 1})
+            return
+        self.scale *= 1 - share
+        # new contributors are added in order
+        self.units.setdefault(email, 0)
+        self.pending[email] = self.pending.get(email, 0) + share / self.scale
+
+    def _scale(self, factor: int):
+        if factor != 1:
+            for email in self.units:
+                self.units[email] *= factor
+            self.denominator *= factor
+
+    def _compact(self):
+        divisor = math.gcd(self.denominator, *self.units.values())
+        if divisor > 1:
+            for email in self.units:
+                self.units[email] //= divisor
+            self.denominator //= divisor
+        if self.denominator > MAX_DENOMINATOR:
+            self._rescale(RESCALED_DENOMINATOR)
+
+    def _rescale(self, denominator: int):
+        """
+        Approximate the shares in units of 1/denominator
+        """
+        scaled = {
+            email: divmod(units * denominator, self.denominator)
+            for email, units in self.units.items()
+        }
+        total = round(self.total() * denominator)
+        shortfall = total - sum(quotient for quotient, _ in scaled.values())
+        # the shares that were rounded down the most are rounded up instead
+        by_remainder = sorted(
+            scaled, key=lambda email: scaled[email][1], reverse=True
+        )
+        rounded_up = set(by_remainder[:shortfall])
+        self.units = {
+            email: quotient + (email in rounded_up)
+            for email, (quotient, _) in scaled.items()
+        }
+        self.denominator = denominator
+        self._compact()
+
+
+def main():
+    # imported here since money_in depends on this module
+    from .money_in.equity import write_attributions
+
+    attributions = Attributions({a.email: a.share for a in AttributionsRepo()})
+    assert_attributions_normalized(attributions)
+    write_attributions(attributions)
+
+
+if __name__ == "__main__":
+    main()
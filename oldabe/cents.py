@@ -0,0 +1,105 @@
+"""
+Integer cents arithmetic, as an opt-in alternative to Decimal amounts.
+
+Set OLDABE_ARITHMETIC=cents to have ledger amounts read as integer cents
+where they are only summed and compared, e.g. when compiling outstanding
+balances, and to have money_in distribute payments in integer cents (see
+CentsDistribution in oldabe.distribution). Debt payments, advances and the
+attributable payment totals are still worked out with Decimals in
+money_in, since the ledger records the exact Decimal (e.g. "100" rather
+than "100.00"). Amounts are converted back to Decimal (with two decimal places)
+for display, so the results are the same as with Decimal arithmetic, as
+long as every amount is a whole number of cents and totals fit in the
+decimal precision. Amounts that aren't whole cents can't be read this way
+(see parse_cents in oldabe.decoders), and callers fall back to Decimal
+arithmetic when they are encountered.
+"""
+
+import os
+from decimal import Decimal, getcontext
+from typing import Optional, Tuple
+
+from .constants import ARITHMETIC_ENV_VAR
+from .tally import Tally
+
+
+def cents_enabled() -> bool:
+    """
+    Whether integer cents arithmetic has been selected
+    """
+    return os.environ.get(ARITHMETIC_ENV_VAR) == "cents"
+
+
+def cents_to_decimal(cents: int) -> Decimal:
+    """
+    The amount as a Decimal with two decimal places
+    """
+    return Decimal(cents).scaleb(-2)
+
+
+def format_cents(cents: int) -> str:
+    return str(cents_to_decimal(cents))
+
+
+class CentsTally(Tally):
+    """
+    A tally of amounts in integer cents
+    """
+
+    amount_type = int
+
+    def to_decimal(self) -> Tally:
+        return Tally(
+            {key: cents_to_decimal(amount) for key, amount in self.items()}
+        )
+
+
+# powers of ten, to avoid computing them for every multiplication
+_POWERS_OF_TEN = [10**n for n in range(64)]
+
+
+def _power_of_ten(n: int) -> int:
+    return _POWERS_OF_TEN[n] if n < 64 else 10**n
+
+
+def _round_half_even(n: int, divisor: int) -> int:
+    """
+    n / divisor rounded to the nearest integer, with ties to even
+    """
+    quotient, remainder = divmod(n, divisor)
+    if 2 * remainder > divisor or (2 * remainder == divisor and quotient & 1):
+        quotient += 1
+    return quotient
+
+
+def multiply_cents(
+    cents: int, weight: Tuple[int, int], prec: Optional[int] = None
+) -> int:
+    """
+    Multiply an amount by a decimal weight, given as (coefficient, exponent),
+    and round the result to cents.
+
+    This gives exactly the same result as round(amount * weight, 2) with
+    Decimals, which first rounds the product to the precision of the decimal
+    context (with ties to even), and then rounds that to cents. The
+    precision of the current context is used unless one is given.
+    """
+    coefficient, exponent = weight
+    product = cents * coefficient
+    # the product in cents is product * 10**exponent
+    excess_digits = len(str(abs(product))) - (prec or getcontext().prec)
+    if excess_digits > 0:
+        product = _round_half_even(product, _power_of_ten(excess_digits))
+        exponent += excess_digits
+    if exponent >= 0:
+        return product * 10**exponent
+    return _round_half_even(product, _power_of_ten(-exponent))
+
+
+def decimal_weight(weight: Decimal) -> Tuple[int, int]:
+    """
+    A Decimal weight as the (coefficient, exponent) used by multiply_cents
+    """
+    sign, digits, exponent = weight.as_tuple()
+    coefficient = int("".join(map(str, digits)))
+    return (-coefficient if sign else coefficient), exponent
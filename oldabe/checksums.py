@@ -0,0 +1,35 @@
+import zlib
+from typing import Optional
+
+# The number of bytes read at a time
+BLOCK_SIZE = 1 << 16
+
+
+def ledger_checksum(filename: str, end: Optional[int] = None) -> str:
+    """
+    A fingerprint of the first `end` bytes of a ledger file, or of the
+    whole file if `end` isn't provided.
+
+    The fingerprint is the length and a CRC-32 of every byte of the prefix,
+    which is read in blocks without being parsed. It is unchanged when the
+    file is appended to, and changes when any part of the prefix is edited,
+    even if the file keeps its length.
+    """
+    try:
+        with open(filename, "rb") as f:
+            size = f.seek(0, 2)
+            # a file that is shorter than the prefix has been rewritten, and
+            # its fingerprint won't match that of the prefix
+            end = size if end is None else min(end, size)
+            f.seek(0)
+            crc = 0
+            remaining = end
+            while remaining > 0:
+                block = f.read(min(remaining, BLOCK_SIZE))
+                if not block:
+                    break
+                crc = zlib.crc32(block, crc)
+                remaining -= len(block)
+    except FileNotFoundError:
+        end, crc = 0, 0
+    return f"{end}:{crc:08x}"
@@ -0,0 +1,118 @@
+"""
+Fold settled debts and drawn down advances into checkpoint rows.
+
+    python -m oldabe.compaction
+
+The debts and advances files only ever grow, but only the open items in
+them are needed to process payments. Compaction moves the history into
+archive files (debts-archive.txt and advances-archive.txt) for auditing,
+and replaces it with checkpoint rows that have the same effect. Debts that
+are still open are carried over as they are (with what remains of them, if
+partially paid), so that they still show the payment that gave rise to
+them and when.
+"""
+
+from datetime import datetime
+from decimal import Decimal, getcontext
+from itertools import takewhile
+from typing import Callable, Iterable, List, Optional
+
+from .models import Advance, Debt
+from .money_in.debt import unpaid_debts
+from .repos import (
+    AdvancesArchiveRepo,
+    AdvancesRepo,
+    DebtsArchiveRepo,
+    DebtsRepo,
+    FileRepo,
+)
+from .tally import Tally
+
+# The payment file recorded on rows written by compaction
+CHECKPOINT = "checkpoint"
+
+
+def compact_debts(debts: Iterable[Debt]) -> List[Debt]:
+    """
+    Fold a debt history into checkpoint rows.
+
+    There is a checkpoint row for each contributor carrying any debt
+    payments in excess of their debts (usually none), followed by the debts
+    that remain unpaid, in order, with their original payment file and
+    creation time. The per-contributor rows come first, in the
+    order in which contributors first appear in the history, so that a tally
+    of the compacted debts lists contributors in the same order as before.
+    """
+    debts = list(debts)
+    unpaid, excess_payments = unpaid_debts(debts)
+    return [
+        Debt(
+            email=email,
+            amount=Decimal(0) - excess_payments[email],
+            payment_file=CHECKPOINT,
+        )
+        for email in dict.fromkeys(d.email for d in debts)
+    ] + [d for d in unpaid if d.amount > 0]
+
+
+def compact_advances(advances: Iterable[Advance]) -> List[Advance]:
+    """
+    Fold an advances history into a checkpoint row for each contributor
+    carrying their current advance.
+    """
+    return [
+        Advance(email=email, amount=amount, payment_file=CHECKPOINT)
+        for email, amount in Tally(
+            (a.email, a.amount) for a in advances
+        ).items()
+    ]
+
+
+def last_compacted(rows: Iterable) -> Optional[datetime]:
+    """
+    When the ledger was last compacted, if it has been
+    """
+    return max(
+        (row.created_at for row in rows if row.payment_file == CHECKPOINT),
+        default=None,
+    )
+
+
+def compacted_at(repo: FileRepo) -> Optional[datetime]:
+    """
+    When the ledger was last compacted, if it has been, from the checkpoint
+    rows at the start of it
+    """
+    return last_compacted(
+        takewhile(lambda row: row.payment_file == CHECKPOINT, repo)
+    )
+
+
+def compact(repo: FileRepo, archive_repo: FileRepo, fold: Callable):
+    """
+    Archive the history in a ledger and replace it with checkpoint rows.
+
+    Rows from an earlier compaction (its checkpoint rows and the rows it
+    carried over) are not archived again since the history they fold is
+    already in the archive.
+    """
+    rows = repo.load()
+    compacted = last_compacted(rows)
+    archive_repo.extend(
+        row
+        for row in rows
+        if row.payment_file != CHECKPOINT
+        and (compacted is None or row.created_at > compacted)
+    )
+    repo.replace(fold(rows))
+
+
+def main():
+    # the same precision as when the ledger was written
+    getcontext().prec = 10
+    compact(DebtsRepo(), DebtsArchiveRepo(), compact_debts)
+    compact(AdvancesRepo(), AdvancesArchiveRepo(), compact_advances)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ from decimal import Decimal
 ACCOUNTING_ZERO = Decimal("0.01")
 
 ABE_ROOT = './abe'
+# Derived data that can always be rebuilt from the ledger, and isn't
+# committed along with it
+CACHE_DIR = os.path.join(ABE_ROOT, '.cache')
 PAYOUTS_DIR = os.path.join(ABE_ROOT, 'payouts')
 PAYMENTS_DIR = os.path.join(ABE_ROOT, 'payments')
 NONATTRIBUTABLE_PAYMENTS_DIR = os.path.join(
@@ -13,12 +16,27 @@ NONATTRIBUTABLE_PAYMENTS_DIR = os.path.join(
 TRANSACTIONS_FILE = os.path.join(ABE_ROOT, 'transactions.txt')
 DEBTS_FILE = os.path.join(ABE_ROOT, 'debts.txt')
 ADVANCES_FILE = os.path.join(ABE_ROOT, 'advances.txt')
+# The full history of debts and advances folded away by compaction
+DEBTS_ARCHIVE_FILE = os.path.join(ABE_ROOT, 'debts-archive.txt')
+ADVANCES_ARCHIVE_FILE = os.path.join(ABE_ROOT, 'advances-archive.txt')
 UNPAYABLE_CONTRIBUTORS_FILE = os.path.join(
     ABE_ROOT, 'unpayable_contributors.txt'
 )
 ITEMIZED_PAYMENTS_FILE = os.path.join(ABE_ROOT, 'itemized_payments.txt')
+PROCESSED_PAYMENTS_FILE = os.path.join(ABE_ROOT, 'processed_payments.txt')
 PRICE_FILE = os.path.join(ABE_ROOT, 'price.txt')
+MINIMUM_PAYOUT_THRESHOLD_FILE = os.path.join(
+    ABE_ROOT, 'minimum-payout-threshold.txt'
+)
 VALUATION_FILE = os.path.join(ABE_ROOT, 'valuation.txt')
 ATTRIBUTIONS_FILE = os.path.join(ABE_ROOT, 'attributions.txt')
 ATTRIBUTIONS_READABLE_FILE = os.path.join(ABE_ROOT, 'attributions.md')
 INSTRUMENTS_FILE = os.path.join(ABE_ROOT, 'instruments.txt')
+
+# An optional local database that can be used in place of the ledger files
+# when OLDABE_STORAGE=sqlite. The ledger files remain the canonical record.
+STORAGE_ENV_VAR = 'OLDABE_STORAGE'
+LEDGER_DB_FILE = os.path.join(ABE_ROOT, 'ledger.sqlite3')
+
+# Read amounts as integer cents where possible, when OLDABE_ARITHMETIC=cents
+ARITHMETIC_ENV_VAR = 'OLDABE_ARITHMETIC'
@@ -0,0 +1,129 @@
+import dataclasses
+import re
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+from functools import cache
+from typing import Any, Callable, List, Optional
+
+NON_NUMERIC = re.compile("[^0-9.-]")
+
+
+def parse_decimal(value: str) -> Decimal:
+    """
+    Parse an amount, ignoring any currency symbols, separators, etc.
+    """
+    # fast path for values that are already clean, which is almost all
+    # of them since they were written by us
+    if value.isascii() and value.lstrip("-").replace(".", "", 1).isdigit():
+        return Decimal(value)
+    return Decimal(NON_NUMERIC.sub("", value))
+
+
+def parse_cents(value: str) -> int:
+    """
+    Parse an amount as integer cents, ignoring any currency symbols,
+    separators, etc. Raises ValueError if it isn't a whole number of cents.
+    """
+    # fast path for amounts with two decimal places, which is most of them
+    if value[-3:-2] == ".":
+        try:
+            return int(value.replace(".", "", 1))
+        except ValueError:
+            pass
+    if value.isascii() and value.lstrip("-").replace(".", "", 1).isdigit():
+        negative = value.startswith("-")
+        units, _, fraction = value.removeprefix("-").partition(".")
+        fraction = fraction.rstrip("0")
+        if len(fraction) <= 2 and units.isdigit():
+            cents = int(units) * 100 + int(fraction.ljust(2, "0"))
+            return -cents if negative else cents
+    cents = parse_decimal(value).scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError(f"{value} is not a whole number of cents")
+    return int(cents)
+
+
+def parse_bool(value: str) -> bool:
+    """
+    Parse a flag as it was written, i.e. str(True) or str(False)
+    """
+    return value == "True"
+
+
+def parse_fraction(value: str) -> Fraction:
+    numerator, slash, denominator = value.partition("/")
+    if slash and numerator.isdigit() and denominator.isdigit():
+        return Fraction(int(numerator), int(denominator))
+    return Fraction(value)
+
+
+# Fields of any other type are left as the string read from the CSV
+CASTS = {
+    bool: parse_bool,
+    Decimal: parse_decimal,
+    Fraction: parse_fraction,
+    datetime: datetime.fromisoformat,
+}
+
+
+@cache
+def field_casts(
+    Model: type, cents: bool = False
+) -> List[Optional[Callable[[str], Any]]]:
+    """
+    The cast for each field of a dataclass, in order, or None if the string
+    value is to be used as is. With cents, Decimal amounts are instead read
+    as integer cents.
+    """
+    casts = {**CASTS, Decimal: parse_cents} if cents else CASTS
+    return [casts.get(field.type) for field in dataclasses.fields(Model)]
+
+
+def fix_types(row: List[str], Model: type) -> List[Any]:
+    """
+    Cast string field values from the CSV into the proper types
+    """
+    return [
+        value if cast is None else cast(value)
+        for cast, value in zip(field_casts(Model), row)
+    ]
+
+
+@cache
+def decoder_for(
+    Model: type, cents: bool = False
+) -> Callable[[List[str]], Any]:
+    """
+    Build a function that turns a CSV row into an instance of Model
+
+    The decoder is specialized to the fields of the model just once, rather
+    than inspecting the model for every row. Trailing fields that are missing
+    from the row take their default values, and extra trailing columns are
+    ignored, as they always have been by fix_types (e.g. attributions.txt
+    may have a third column). A row that is misaligned, e.g. by an unquoted
+    comma in an amount, still fails to decode, since its values no longer
+    cast to the types of their fields.
+
+    With cents, Decimal amounts are read as integer cents (see oldabe.cents).
+    """
+    if not dataclasses.is_dataclass(Model):
+        return lambda row: Model(*row)
+
+    casts = field_casts(Model, cents)
+    n_fields = len(casts)
+    # indices of the fields that need casting, the rest are kept as is
+    cast_fields = [(i, cast) for i, cast in enumerate(casts) if cast]
+
+    def decode(row):
+        n = len(row)
+        if n > n_fields:
+            # extra trailing columns are ignored, like zip() in fix_types
+            row = row[:n_fields]
+            n = n_fields
+        for i, cast in cast_fields:
+            if i < n:
+                row[i] = cast(row[i])
+        return Model(*row)
+
+    return decode
@@ -1,6 +1,20 @@
-from decimal import Decimal
+import math
+from decimal import Decimal, getcontext
 from fractions import Fraction
-from typing import Set
+from typing import Iterable, List, Set, Tuple
+
+from .cents import (
+    cents_enabled,
+    cents_to_decimal,
+    decimal_weight,
+    multiply_cents,
+)
+
+# The most results of distribute that are cached for a distribution
+MAX_CACHED_RESULTS = 1024
+# Distributions with at least this many shareholders are array-backed, if
+# NumPy is installed
+ARRAY_DISTRIBUTION_THRESHOLD = 1000
 
 
 def fraction_to_decimal(f):
@@ -8,23 +22,99 @@ def fraction_to_decimal(f):
     return Decimal(f.numerator) / Decimal(f.denominator)
 
 
+def to_cents(amount: Decimal) -> int:
+    """
+    Convert an amount in whole cents to an integer number of cents
+    """
+    cents = Decimal(amount).scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError(f"{amount} is not a whole number of cents")
+    return int(cents)
+
+
+def _total(shares: Iterable[Fraction]) -> Fraction:
+    """
+    The sum of the shares, over their least common denominator. Shares often
+    have the same denominator (see Attributions), so this is much quicker
+    than adding them up one at a time.
+    """
+    shares = list(shares)
+    denominator = math.lcm(*(share.denominator for share in shares))
+    return Fraction(
+        sum(
+            share.numerator * (denominator // share.denominator)
+            for share in shares
+        ),
+        denominator,
+    )
+
+
+def _context_key():
+    """
+    The parts of the decimal context that arithmetic results depend on
+    """
+    context = getcontext()
+    return context.prec, context.rounding
+
+
 class Distribution(dict["str | None", Fraction]):
     """
     A dictionary of shareholders to proportions
 
     None can be used as a shareholder to omit a percentage from distribution
     and enumeration.
+
+    The normalized weights, the views returned by `without` and the results
+    of `distribute` are cached, so the distribution must not be changed
+    without calling `invalidate` afterwards.
     """
 
-    def _normalized(self) -> "Distribution":
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.invalidate()
+
+    def invalidate(self):
         """
-        Return a distribution with the same proportions that adds up to 1
+        Discard anything cached about the distribution. This must be called
+        whenever it is changed, e.g. when attributions are diluted.
         """
-        total = sum(self.values())
+        self._weights = {}
+        self._cents_weights = {}
+        self._views = {}
+        self._results = {}
 
-        return Distribution(
-            {shareholder: share / total for shareholder, share in self.items()}
-        )
+    def _decimal_weights(self) -> List[Tuple["str | None", Decimal]]:
+        """
+        The normalized proportions as decimals, in the current context
+        """
+        key = _context_key()
+        weights = self._weights.get(key)
+        if weights is None:
+            total = _total(self.values())
+            # share / total as a decimal, without reducing the fraction
+            # first, which gives the same result
+            weights = self._weights[key] = [
+                (
+                    shareholder,
+                    Decimal(share.numerator * total.denominator)
+                    / Decimal(share.denominator * total.numerator),
+                )
+                for shareholder, share in self.items()
+            ]
+        return weights
+
+    def _integer_weights(self) -> List[Tuple["str | None", Tuple[int, int]]]:
+        """
+        The decimal weights as (coefficient, exponent), see multiply_cents
+        """
+        key = _context_key()
+        weights = self._cents_weights.get(key)
+        if weights is None:
+            weights = self._cents_weights[key] = [
+                (shareholder, decimal_weight(weight))
+                for shareholder, weight in self._decimal_weights()
+            ]
+        return weights
 
     def without(self, exclude: Set[str]) -> "Distribution":
         """
@@ -32,32 +122,146 @@ class Distribution(dict["str | None", Fraction]):
 
         Other shareholders retain their relative proportions.
         """
-        return Distribution(
-            {
-                shareholder: share
-                for shareholder, share in self.items()
-                if shareholder not in exclude
-            }
-        )
+        key = frozenset(exclude)
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = type(self)(
+                {
+                    shareholder: share
+                    for shareholder, share in self.items()
+                    if shareholder not in exclude
+                }
+            )
+        return view
 
     def distribute(self, amount: Decimal) -> dict[str, Decimal]:
         """
         Distribute an amount amongst shareholders
         """
+        # equal decimals with different exponents distribute differently
+        key = (
+            _context_key(),
+            amount.as_tuple() if isinstance(amount, Decimal) else amount,
+        )
+        result = self._results.get(key)
+        if result is None:
+            result = self._distribute(amount)
+            if len(self._results) >= MAX_CACHED_RESULTS:
+                self._results.clear()
+            self._results[key] = result
+        return dict(result)
+
+    def distribute_many(
+        self, amounts: Iterable[Decimal]
+    ) -> Tuple[List[str], List[List[int]]]:
+        """
+        Distribute each of many amounts amongst shareholders
+
+        Returns the shareholders, and a row for each amount with the cents
+        distributed to each shareholder, in the same order. The amounts are
+        split exactly as by `distribute`, but in integer arithmetic (see
+        `distribute_cents`), and must be whole numbers of cents.
+        """
+        shareholders = [
+            shareholder for shareholder in self if shareholder is not None
+        ]
+        rows = []
+        for amount in amounts:
+            distributed = self.distribute_cents(to_cents(amount))
+            rows.append(
+                [distributed[shareholder] for shareholder in shareholders]
+            )
+        return shareholders, rows
+
+    def distribute_cents(self, cents: int) -> dict[str, int]:
+        """
+        Distribute an amount in integer cents amongst shareholders
+
+        This is the same as `distribute`, but in integer arithmetic. The
+        result is exactly the same, in cents.
+        """
+        prec = getcontext().prec
         amounts = {
-            shareholder: round(amount * fraction_to_decimal(share), 2)
-            for shareholder, share in self._normalized().items()
+            shareholder: multiply_cents(cents, weight, prec)
+            for shareholder, weight in self._integer_weights()
+        }
+        difference = sum(amounts.values()) - cents
+        if difference != 0:
+            # the largest amount absorbs the rounding difference
+            _, recipient = min(
+                (-amount, shareholder)
+                for shareholder, amount in amounts.items()
+            )
+            amounts[recipient] -= difference
+        return {
+            shareholder: amount
+            for shareholder, amount in amounts.items()
+            if shareholder is not None
+        }
+
+    def _distribute(self, amount: Decimal) -> dict[str, Decimal]:
+        amounts = {
+            shareholder: round(amount * weight, 2)
+            for shareholder, weight in self._decimal_weights()
         }
         total = sum(amounts.values())
         difference = total - amount
         if difference != 0:
-            _, recipient = sorted(
+            # the largest amount absorbs the rounding difference
+            _, recipient = min(
                 (-amount, shareholder)
                 for shareholder, amount in amounts.items()
-            )[0]
+            )
             amounts[recipient] -= difference
         return {
             shareholder: amount
             for shareholder, amount in amounts.items()
             if shareholder is not None
         }
+
+
+class CentsDistribution(Distribution):
+    """
+    A Distribution that splits amounts in integer cents (see
+    `distribute_cents`), with exactly the same results.
+
+    Amounts with more than two decimal places keep them in the result, so
+    they, and negative amounts, are distributed as they would be by
+    Distribution.
+    """
+
+    def _distribute(self, amount: Decimal) -> dict[str, Decimal]:
+        if (
+            not isinstance(amount, Decimal)
+            or amount < 0
+            or amount.as_tuple().exponent < -2
+        ):
+            return super()._distribute(amount)
+        try:
+            cents = to_cents(amount)
+        except ValueError:
+            return super()._distribute(amount)
+        return {
+            shareholder: cents_to_decimal(amount)
+            for shareholder, amount in self.distribute_cents(cents).items()
+        }
+
+
+def make_distribution(shares) -> Distribution:
+    """
+    A Distribution of the shares, which is array-backed (see
+    oldabe.arrays) if there are very many shareholders and NumPy is
+    installed, or in integer cents with OLDABE_ARITHMETIC=cents. Either way,
+    amounts are distributed in exactly the same way.
+    """
+    if len(shares) >= ARRAY_DISTRIBUTION_THRESHOLD:
+        try:
+            from .arrays import ArrayDistribution
+        except ImportError:
+            # NumPy isn't installed
+            pass
+        else:
+            return ArrayDistribution(shares)
+    if cents_enabled():
+        return CentsDistribution(shares)
+    return Distribution(shares)
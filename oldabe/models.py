@@ -80,6 +80,16 @@ class ItemizedPayment:
     payment_file: str  # acts like a foreign key to original payment object
 
 
+# An index entry recording that a payment has been processed, so that we
+# can tell which payments are new without reading the whole ledger. The
+# checksum is a fingerprint of the ledger as of when the entry was written,
+# which tells us whether the index is still in sync with the ledger.
+@dataclass
+class ProcessedPayment:
+    payment_file: str
+    checksum: str
+
+
 @dataclass
 class Attribution:
     email: str
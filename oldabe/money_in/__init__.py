@@ -1,13 +1,15 @@
 #!/usr/bin/env python
 
-from typing import List, Tuple
+import heapq
+from typing import Iterable, Iterator, List, Tuple
 
 from ..accounting import (
     assert_attributions_normalized,
 )
+from ..attributions import Attributions
 from ..tally import Tally
 from ..constants import ACCOUNTING_ZERO
-from ..distribution import Distribution
+from ..distribution import Distribution, make_distribution
 from ..models import (
     Advance,
     Debt,
@@ -16,28 +18,22 @@ from ..models import (
     Transaction,
 )
 from ..repos import (
-    AdvancesRepo,
-    AllPaymentsRepo,
+    AttributablePaymentsRepo,
     AttributionsRepo,
-    DebtsRepo,
     InstrumentsRepo,
-    ItemizedPaymentsRepo,
-    TransactionsRepo,
-    UnpayableContributorsRepo,
+    NonAttributablePaymentsRepo,
 )
 from .price import read_price
 from .equity import write_attributions
 from .valuation import read_valuation, write_valuation
-from .debt import (
-    pay_outstanding_debts,
-    create_debts,
-)
+from .debt import create_debts
 from .advances import draw_down_advances, advance_payments
 from .equity import handle_investment
+from .session import LedgerSession
 
 
 def distribute_payment(
-    payment: Payment, distribution: Distribution
+    payment: Payment, distribution: Distribution, session: LedgerSession
 ) -> Tuple[List[Debt], List[Transaction], List[Advance]]:
     """
     Generate transactions to contributors from a (new) payment.
@@ -53,7 +49,7 @@ def distribute_payment(
     #    distribution file
     # 4. record debt for each of them according to their attribution
 
-    unpayable_contributors = set(UnpayableContributorsRepo())
+    unpayable_contributors = session.unpayable_contributors
     payable_contributors = {
         email
         for email in distribution
@@ -64,9 +60,7 @@ def distribute_payment(
     # Pay as many outstanding debts as possible
     #
 
-    debt_payments = pay_outstanding_debts(
-        payment, DebtsRepo(), payable_contributors
-    )
+    debt_payments = session.debts.pay(payment, payable_contributors)
 
     # The "available" amount is what is left over after paying off debts
     available_amount = payment.amount - sum(
@@ -87,13 +81,12 @@ def distribute_payment(
     # Draw dawn contributor's existing advances first, before paying them
     #
 
-    prior_advances = AdvancesRepo()
     negative_advances = draw_down_advances(
         available_amount,
         distribution,
         unpayable_contributors,
         payment.file,
-        prior_advances,
+        session.advances,
     )
 
     #
@@ -143,43 +136,77 @@ def distribute_payment(
     return processed_debts, transactions, advances
 
 
-# TODO: the payments within a commit are not ordered.
-# It may be better to sort them chronologically, so that
-# earlier payments are reflected in attributions before
-# later payments are processed.
-def process_payments(instruments, attributions):
+def payment_order(payment: Payment):
+    """
+    Payments are processed in chronological order, so that earlier payments
+    are reflected in attributions before later payments are processed. Ties
+    are broken by filename.
+    """
+    return payment.created_at, payment.file
+
+
+def unprocessed_payments(
+    processed_payments, sources: Iterable[Iterable[Payment]] = ()
+) -> Iterator[Payment]:
+    """
+    Lazily merge the payments that have yet to be processed from each
+    source of payments (by default, attributable and non-attributable
+    payments), in chronological order.
+
+    Payment files aren't listed in any particular order, so each source's
+    unprocessed payments are sorted on their own, and the sources are then
+    merged with a heap, so that only one payment is taken from a source at a
+    time. Processed payments are skipped as they are read, so only the
+    backlog is ever sorted, rather than every payment received.
+    """
+    sources = sources or [
+        AttributablePaymentsRepo(),
+        NonAttributablePaymentsRepo(),
+    ]
+    return heapq.merge(
+        *(
+            sorted(
+                (p for p in source if p.file not in processed_payments),
+                key=payment_order,
+            )
+            for source in sources
+        ),
+        key=payment_order,
+    )
+
+
+def process_payments(
+    instruments,
+    attributions,
+    session: LedgerSession,
+    payments: Iterable[Payment],
+    price,
+    valuation,
+):
     """
     Process new payments by paying out instruments and then, from the amount
     left over, paying out attributions.
-    Returns all newly created transactions and the updated valuation amount
-    after all of the new payments have been processed.
+    All newly created records are staged in the session. Returns the updated
+    valuation amount after all of the new payments have been processed.
+    Nothing is read from or written to disk, see
+    process_payments_and_record_updates.
     """
-    price = read_price()
-    valuation = read_valuation()
-    new_debts = []
-    new_advances = []
-    new_transactions = []
-    new_itemized_payments = []
-
-    processed_payment_files = {t.payment_file for t in TransactionsRepo()}
-    unprocessed_payments = [
-        p for p in AllPaymentsRepo() if p.file not in processed_payment_files
-    ]
+    instruments_distribution = make_distribution(
+        # The missing percentage in the instruments file
+        # should not be distributed to anyone (shareholder: None)
+        # TODO: Move to process_payments_and_record_updates
+        {**instruments, None: 1 - sum(instruments.values())}
+    )
+    # attributions are diluted by investments, see below, so this is
+    # rebuilt when next needed after a dilution
+    attributions_distribution = None
 
-    for payment in unprocessed_payments:
+    for payment in payments:
         # first, process instruments (i.e. pay fees)
         debts, transactions, advances = distribute_payment(
-            payment,
-            Distribution(
-                # The missing percentage in the instruments file
-                # should not be distributed to anyone (shareholder: None)
-                # TODO: Move to process_payments_and_record_updates
-                {**instruments, None: 1 - sum(instruments.values())}
-            ),
+            payment, instruments_distribution, session
         )
-        new_transactions += transactions
-        new_debts += debts
-        new_advances += advances
+        session.record(debts, transactions, advances)
         fees_paid_out = sum(t.amount for t in transactions)
         # deduct the amount paid out to instruments before
         # processing it for attributions
@@ -195,7 +222,7 @@ def process_payments(instruments, attributions):
         # TODO: instruments vs attributions are not handled quite the same way
         # where the former adds up to, e.g., 6, vs 100 for the latter
         payment.amount -= fees_paid_out
-        new_itemized_payments.append(
+        session.record_itemized_payment(
             ItemizedPayment(
                 payment.email,
                 fees_paid_out,
@@ -207,24 +234,28 @@ def process_payments(instruments, attributions):
         # next, process attributions - using the amount owed to the project
         # (which is the amount leftover after paying instruments/fees)
         if payment.amount > ACCOUNTING_ZERO:
+            if attributions_distribution is None:
+                attributions_distribution = make_distribution(attributions)
             debts, transactions, advances = distribute_payment(
-                payment, Distribution(attributions)
+                payment, attributions_distribution, session
             )
-            new_transactions += transactions
-            new_debts += debts
-            new_advances += advances
+            session.record(debts, transactions, advances)
         if payment.attributable:
+            prior_valuation = valuation
             valuation = handle_investment(
-                payment, new_itemized_payments, attributions, price, valuation
+                payment,
+                session.new_itemized_payments,
+                attributions,
+                price,
+                valuation,
+                session.attributable_totals,
             )
+            if valuation != prior_valuation:
+                # the investment diluted the attributions
+                attributions_distribution = None
+        session.processed_payments.add(payment.file)
 
-    return (
-        new_debts,
-        new_transactions,
-        valuation,
-        new_itemized_payments,
-        new_advances,
-    )
+    return valuation
 
 
 def process_payments_and_record_updates():
@@ -234,24 +265,23 @@ def process_payments_and_record_updates():
     renormalized attributions only after all payments have been processed.
     """
     instruments = {a.email: a.share for a in InstrumentsRepo()}
-    attributions = {a.email: a.share for a in AttributionsRepo()}
+    attributions = Attributions({a.email: a.share for a in AttributionsRepo()})
 
     assert_attributions_normalized(attributions)
 
-    (
-        debts,
-        transactions,
-        posterior_valuation,
-        new_itemized_payments,
-        advances,
-    ) = process_payments(instruments, attributions)
+    session = LedgerSession.load()
+    posterior_valuation = process_payments(
+        instruments,
+        attributions,
+        session,
+        unprocessed_payments(session.processed_payments),
+        read_price(),
+        read_valuation(),
+    )
 
     # we only write the changes to disk at the end
     # so that if any errors are encountered, no
     # changes are made.
-    DebtsRepo().extend(debts)
     write_attributions(attributions)
     write_valuation(posterior_valuation)
-    TransactionsRepo().extend(transactions)
-    ItemizedPaymentsRepo().extend(new_itemized_payments)
-    AdvancesRepo().extend(advances)
+    session.flush()
@@ -1,6 +1,8 @@
 import dataclasses
-from itertools import accumulate
-from typing import Iterable, List, Set
+import heapq
+from collections import deque
+from itertools import count
+from typing import Deque, Dict, Iterable, Iterator, List, Set, Tuple
 from ..models import Debt
 from ..tally import Tally
 from decimal import Decimal
@@ -25,26 +27,22 @@ def create_debts(
     ]
 
 
-# TODO: should we generate separate transactions for money paid
-# for debt vs as a normal payout?
-def pay_outstanding_debts(
-    payment: Payment,
-    all_debts: Iterable[Debt],
-    payable_contributors: Set[str],
-) -> List[Debt]:
+def unpaid_debts(all_debts: Iterable[Debt]) -> Tuple[List[Debt], Tally]:
     """
-    Given an available amount return debt payments for as many debts as can
-    be covered
+    Determine which debts remain unpaid, in chronological order, with
+    partially paid debts replaced by their remaining balance. Also returns
+    any debt payments in excess of the debts, by user.
     """
     # We are assuming debts are being processed in chronological order
     # because they are written in chronological order in the single debts
     # table in the debts file (i.e., it is a FileRepo), so we don't need
     # to sort them by date.
+    all_debts = list(all_debts)
 
     # compute the negative balance, i.e., the total of the negative debts,
     # by user
     debt_payment_totals_by_user = Tally(
-        (d.email, d.amount) for d in all_debts if d.amount < 0
+        (d.email, -d.amount) for d in all_debts if d.amount < 0
     )
     # go through and remove (or add to a new list) as many of the positive
     # debts as we can, in order, from the beginning
@@ -70,25 +68,101 @@ def pay_outstanding_debts(
             debt_payment_totals_by_user[d.email] = 0
             unpaid_debts.append(partial_debt)
 
-    available_amount = payment.amount
-    payable_debts = [
-        d for d in unpaid_debts if d.email in payable_contributors
-    ]
+    return unpaid_debts, debt_payment_totals_by_user
 
-    accumulated_amount = list(
-        accumulate((d.amount for d in payable_debts), initial=0)
-    )
-    cumulative_debt = [
-        amount for amount in accumulated_amount if amount <= available_amount
-    ]
 
-    return [
-        Debt(
-            email=d.email,
-            amount=-amount,  # negative debt (i.e., debt payment)
-            payment_file=payment.file,
+class OpenDebts:
+    """
+    The unpaid debts, queued by contributor in chronological order
+
+    This is built from the debt history once, and then kept up to date as
+    debts are created and paid, so that settling debts for a payment only
+    touches the debts that are actually paid rather than the whole history.
+    Each debt carries a sequence number so that debts can be paid in
+    chronological order across contributors.
+    """
+
+    def __init__(self, all_debts: Iterable[Debt] = ()):
+        self._sequence = count()
+        self._queues: Dict[str, Deque[Tuple[int, Debt]]] = {}
+        unpaid, _ = unpaid_debts(all_debts)
+        self.add(unpaid)
+
+    def add(self, debts: Iterable[Debt]):
+        """
+        Queue fresh debts. Debt payments (negative debts) are ignored since
+        they are accounted for by `pay`.
+        """
+        for d in debts:
+            if d.amount > 0:
+                self._queues.setdefault(d.email, deque()).append(
+                    (next(self._sequence), d)
+                )
+
+    def __iter__(self) -> Iterator[Debt]:
+        """
+        The open debts in chronological order
+        """
+        return (
+            d
+            for _, d in heapq.merge(
+                *self._queues.values(), key=lambda entry: entry[0]
+            )
         )
-        for d, paid_so_far in zip(payable_debts, cumulative_debt)
-        if (amount := min(d.amount, available_amount - paid_so_far))
-        > Decimal(0)
-    ]
+
+    def pay(
+        self, payment: Payment, payable_contributors: Set[str]
+    ) -> List[Debt]:
+        """
+        Pay as many of the open debts of payable contributors as the payment
+        covers, in chronological order, and return the debt payments.
+        """
+        available_amount = payment.amount
+        # the oldest open debt of each payable contributor
+        heads = [
+            (queue[0][0], email)
+            for email in payable_contributors
+            if (queue := self._queues.get(email))
+        ]
+        heapq.heapify(heads)
+        debt_payments = []
+        while heads and available_amount > 0:
+            _, email = heapq.heappop(heads)
+            queue = self._queues[email]
+            sequence, d = queue[0]
+            amount = min(d.amount, available_amount)
+            available_amount -= amount
+            debt_payments.append(
+                Debt(
+                    email=email,
+                    amount=-amount,  # negative debt (i.e., debt payment)
+                    payment_file=payment.file,
+                )
+            )
+            if amount < d.amount:
+                # partially paid, so the rest remains open
+                queue[0] = (
+                    sequence,
+                    dataclasses.replace(d, amount=d.amount - amount),
+                )
+                continue
+            queue.popleft()
+            if queue:
+                heapq.heappush(heads, (queue[0][0], email))
+            else:
+                del self._queues[email]
+        return debt_payments
+
+
+# TODO: should we generate separate transactions for money paid
+# for debt vs as a normal payout?
+def pay_outstanding_debts(
+    payment: Payment,
+    all_debts: Iterable[Debt],
+    payable_contributors: Set[str],
+) -> List[Debt]:
+    """
+    Given an available amount return debt payments for as many debts as can
+    be covered
+    """
+    return OpenDebts(all_debts).pay(payment, payable_contributors)
@@ -1,15 +1,26 @@
+import os
 from fractions import Fraction
+from typing import Optional
 from ..constants import (
     ATTRIBUTIONS_FILE,
     ATTRIBUTIONS_READABLE_FILE,
+    CACHE_DIR,
 )
 from ..accounting import (
     assert_attributions_normalized,
 )
+from ..attributions import Attributions
 from ..repos import ItemizedPaymentsRepo
 from ..models import Attribution
+from ..reports import ORDERS, ReportWriter, View, render, write_table
+from ..snapshots import tally_ledger
+from ..tally import Tally
 import csv
 
+ATTRIBUTABLE_TOTALS_SNAPSHOT_FILE = os.path.join(
+    CACHE_DIR, 'attributable-payments.json'
+)
+
 
 def write_attributions(attributions):
     # don't write attributions if they aren't normalized
@@ -19,36 +30,67 @@ def write_attributions(attributions):
         for row in attributions.items():
             writer.writerow(row)
     with open(ATTRIBUTIONS_READABLE_FILE, "w") as f:
-        msg = prepare_attributions_message(attributions)
-        f.write(msg)
+        write_attributions_report(ReportWriter(f), attributions)
+
+
+def share_to_percentage(share):
+    pct = round(float(share) * 100, 2)
+    if pct < 0.01:
+        return "< 0.01%"
+    else:
+        return f"{pct:.2f}%"
+
+
+def write_attributions_report(
+    writer: ReportWriter, attributions: dict, view: Optional[View] = None
+):
+    """Write a human-readable, MarkDown-formatted version of attributions as
+    percentages instead of fractions, largest first."""
+    writer.line("# Contributors")
+    writer.line()
+    write_table(
+        writer,
+        "| Name | Share |",
+        "| ---- | ----- |",
+        list(attributions.items()),
+        share_to_percentage,
+        view,
+        order=ORDERS["amount"],
+    )
 
 
 def prepare_attributions_message(attributions: dict):
     """Prepare a human-readable, MarkDown-formatted version of attributions as
     percentages instead of fractions."""
+    return render(write_attributions_report, attributions)
+
+
+def _attributable_entry(itemized_payment):
+    if itemized_payment.attributable:
+        return itemized_payment.email, itemized_payment.project_amount
+    return None
 
-    def share_to_percentage(share):
-        pct = round(float(share) * 100, 2)
-        if pct < 0.01:
-            return "< 0.01%"
-        else:
-            return f"{pct:.2f}%"
 
-    attributions_table = ""
-    sorted_attributions = sorted(
-        attributions.items(), key=lambda x: x[1], reverse=True
+def attributable_payment_totals(itemized_payments) -> Tally:
+    """
+    The total amount paid to the project in attributable payments, by payer
+    """
+    return Tally(
+        e for e in map(_attributable_entry, itemized_payments) if e is not None
     )
-    for name, share in sorted_attributions:
-        attributions_table += f"{name} | {share_to_percentage(share)}\n"
-    message = f"""
-    # Contributors
 
-    | Name | Share |
-    | ---- | ----- |
-    {attributions_table}
 
+def load_attributable_payment_totals() -> Tally:
+    """
+    The total amount paid to the project in attributable payments, by payer,
+    for all payments in the ledger. Only the itemized payments recorded since
+    the last run are read.
     """
-    return "\r\n".join(line.strip() for line in message.split('\n')).strip()
+    return tally_ledger(
+        ItemizedPaymentsRepo(),
+        _attributable_entry,
+        ATTRIBUTABLE_TOTALS_SNAPSHOT_FILE,
+    )
 
 
 def calculate_incoming_investment(
@@ -63,7 +105,14 @@ def calculate_incoming_investment(
         for p in [*prior_itemized_payments, *new_itemized_payments]
         if p.attributable and p.email == payment.email
     )
+    return investment_from_total(payment, price, total_attributable_payments)
+
 
+def investment_from_total(payment, price, total_attributable_payments):
+    """
+    The portion of the payment that is investment, given the total amount
+    paid by the payee in attributable payments, including this one.
+    """
     incoming_investment = min(
         total_attributable_payments - price, payment.amount
     )
@@ -104,7 +153,14 @@ def dilute_attributions(incoming_attribution, attributions):
     added to the incoming attribution once again totals to one, i.e. is
     "renormalized."  This effectively dilutes the attributions by the magnitude
     of the incoming attribution.
+
+    Attributions kept as integer shares (see Attributions) are diluted in
+    that form, which keeps their size bounded.
     """
+    if isinstance(attributions, Attributions):
+        attributions.dilute(incoming_attribution)
+        return
+
     target_proportion = 1 - incoming_attribution.share
     for email in attributions:
         # renormalize to reflect dilution
@@ -118,7 +174,12 @@ def dilute_attributions(incoming_attribution, attributions):
 
 
 def handle_investment(
-    payment, new_itemized_payments, attributions, price, prior_valuation
+    payment,
+    new_itemized_payments,
+    attributions,
+    price,
+    prior_valuation,
+    attributable_totals=None,
 ):
     """
     For "attributable" payments (the default), we determine
@@ -126,10 +187,17 @@ def handle_investment(
     then the valuation is inflated by the investment amount, and the payer is
     attributed a share commensurate with their investment, diluting the
     attributions.
+
+    The total attributable payments by each payer, including the new
+    itemized payments, are computed from the ledger unless they are
+    provided, e.g. as kept up to date in a session.
     """
-    prior_itemized_payments = ItemizedPaymentsRepo()
-    incoming_investment = calculate_incoming_investment(
-        payment, price, new_itemized_payments, prior_itemized_payments
+    if attributable_totals is None:
+        attributable_totals = attributable_payment_totals(
+            [*ItemizedPaymentsRepo(), *new_itemized_payments]
+        )
+    incoming_investment = investment_from_total(
+        payment, price, attributable_totals[payment.email]
     )
     # inflate valuation by the amount of the fresh investment
     posterior_valuation = prior_valuation + incoming_investment
@@ -0,0 +1,185 @@
+"""
+Monte Carlo forecasts of valuation, attributions and earnings.
+
+    python -m oldabe.money_in.forecast [TRIALS] [MONTHS]
+
+This evaluates the same growth model as handle_investment and
+dilute_attributions (payments beyond the price are investments, which
+inflate the valuation and dilute everyone else's share), but for many
+random payment streams at once, as arrays. It requires NumPy, which is an
+optional dependency (pip install oldabe[forecast]).
+
+Amounts are floating point rather than Decimal, so forecasts are estimates
+and are never used for accounting. The ledger is only read, and nothing is
+written to disk.
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from ..repos import AttributionsRepo, InstrumentsRepo, ItemizedPaymentsRepo
+from .equity import attributable_payment_totals
+from .price import read_price
+from .valuation import read_valuation
+
+
+@dataclass
+class ForecastInputs:
+    """
+    The current state of the project that forecasts start from
+    """
+
+    attributions: Dict[str, float]
+    price: float
+    valuation: float
+    # the portion of each payment that goes to instruments
+    fee_share: float
+    # attributable payments (after fees) so far, by payer
+    attributable_totals: Dict[str, float]
+
+    @classmethod
+    def load(cls) -> "ForecastInputs":
+        return cls(
+            attributions={a.email: float(a.share) for a in AttributionsRepo()},
+            price=float(read_price()),
+            valuation=float(read_valuation()),
+            fee_share=float(sum(a.share for a in InstrumentsRepo())),
+            # not from a snapshot, which would be written to the cache
+            attributable_totals={
+                email: float(amount)
+                for email, amount in attributable_payment_totals(
+                    ItemizedPaymentsRepo()
+                ).items()
+            },
+        )
+
+
+@dataclass
+class Forecast:
+    """
+    The outcome of each trial. Shares and earnings have a column for each
+    contributor, in the order of contributors.
+    """
+
+    contributors: List[str]
+    shares: np.ndarray
+    valuation: np.ndarray
+    earnings: np.ndarray
+
+    def percentiles(self, q: Sequence[float] = (5, 50, 95)):
+        """
+        Percentiles across trials of the valuation, and of each
+        contributor's share and earnings
+        """
+        return {
+            "valuation": np.percentile(self.valuation, q),
+            "shares": dict(
+                zip(self.contributors, np.percentile(self.shares, q, axis=0).T)
+            ),
+            "earnings": dict(
+                zip(
+                    self.contributors,
+                    np.percentile(self.earnings, q, axis=0).T,
+                )
+            ),
+        }
+
+
+def random_payments(
+    rng: np.random.Generator,
+    trials: int,
+    months: int,
+    payers: int,
+    rate: float = 0.5,
+    median: float = 100.0,
+    sigma: float = 1.0,
+):
+    """
+    Random payment streams, as (amounts, payers) arrays of shape
+    (trials, months). Each month, a payment arrives with the given
+    probability, from one of the payers chosen at random, for a log-normally
+    distributed amount. Months without a payment have an amount of zero.
+    """
+    arrived = rng.random((trials, months)) < rate
+    amounts = rng.lognormal(np.log(median), sigma, (trials, months))
+    return (
+        np.where(arrived, amounts, 0.0),
+        rng.integers(0, payers, (trials, months)),
+    )
+
+
+def forecast(
+    inputs: ForecastInputs,
+    payers: Sequence[str],
+    amounts: np.ndarray,
+    payer_indices: np.ndarray,
+) -> Forecast:
+    """
+    Process payment streams, given as arrays of shape (trials, months) of
+    amounts and of indices into the payers, month by month, with every
+    trial processed at once.
+
+    As with money_in, the amount left after fees is first distributed
+    according to the current attributions, and then whatever the payer has
+    paid beyond the price counts as investment.
+    """
+    contributors = list(dict.fromkeys([*inputs.attributions, *payers]))
+    columns = {email: i for i, email in enumerate(contributors)}
+    payer_columns = np.array([columns[p] for p in payers])
+    trials, months = amounts.shape
+    rows = np.arange(trials)
+
+    shares = np.zeros((trials, len(contributors)))
+    for email, share in inputs.attributions.items():
+        shares[:, columns[email]] = share
+    paid = np.tile(
+        np.array([inputs.attributable_totals.get(p, 0.0) for p in payers]),
+        (trials, 1),
+    )
+    valuation = np.full(trials, inputs.valuation)
+    earnings = np.zeros_like(shares)
+
+    for month in range(months):
+        project_amounts = amounts[:, month] * (1 - inputs.fee_share)
+        earnings += project_amounts[:, None] * shares
+        payer = payer_indices[:, month]
+        paid[rows, payer] += project_amounts
+        investment = np.clip(
+            np.minimum(paid[rows, payer] - inputs.price, project_amounts),
+            0,
+            None,
+        )
+        valuation += investment
+        incoming_shares = investment / valuation
+        shares *= (1 - incoming_shares)[:, None]
+        shares[rows, payer_columns[payer]] += incoming_shares
+
+    return Forecast(contributors, shares, valuation, earnings)
+
+
+def main():
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 36
+    inputs = ForecastInputs.load()
+    payers = [f"payer-{i}" for i in range(10)]
+    amounts, payer_indices = random_payments(
+        np.random.default_rng(), trials, months, len(payers)
+    )
+    summary = forecast(inputs, payers, amounts, payer_indices).percentiles()
+    print(f"{trials} trials over {months} months (5th, 50th, 95th pct)")
+    print("valuation: " + ", ".join(f"{v:.2f}" for v in summary["valuation"]))
+    for email, shares in summary["shares"].items():
+        earnings = summary["earnings"][email]
+        print(
+            f"{email}: share "
+            + ", ".join(f"{100 * s:.2f}%" for s in shares)
+            + "; earnings "
+            + ", ".join(f"{e:.2f}" for e in earnings)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from ..checksums import ledger_checksum
+from ..constants import ITEMIZED_PAYMENTS_FILE, TRANSACTIONS_FILE
+from ..models import ProcessedPayment
+from ..repos import (
+    ItemizedPaymentsRepo,
+    ProcessedPaymentsRepo,
+    TransactionsRepo,
+)
+
+
+def ledger_fingerprint() -> str:
+    """
+    Fingerprint the ledgers that the processed payments can be derived from
+    """
+    return " ".join(
+        ledger_checksum(filename)
+        for filename in (TRANSACTIONS_FILE, ITEMIZED_PAYMENTS_FILE)
+    )
+
+
+class ProcessedPayments:
+    """
+    The payment files that have already been processed
+
+    These are read from a small index kept alongside the transactions file,
+    rather than by reading every transaction ever recorded. Each entry in the
+    index carries a fingerprint of the ledger as of when it was written, and
+    if the index is missing or no longer matches the ledger (e.g. because the
+    ledger was edited by hand), it is rebuilt from the ledger.
+    """
+
+    def __init__(self, payment_files=(), rebuilt=False):
+        # a dict rather than a set, so that the index is written in a
+        # stable order
+        self.payment_files = dict.fromkeys(payment_files)
+        self.new_payment_files = []
+        self.rebuilt = rebuilt
+
+    @classmethod
+    def load(cls) -> "ProcessedPayments":
+        entries = ProcessedPaymentsRepo().load()
+        if entries and entries[-1].checksum == ledger_fingerprint():
+            return cls(entry.payment_file for entry in entries)
+        return cls.rebuild()
+
+    @classmethod
+    def rebuild(cls) -> "ProcessedPayments":
+        """
+        Derive the processed payments from the ledger.
+
+        Every processed payment is itemized, even if it didn't result in any
+        transactions, but older ledgers may only record transactions.
+        """
+        payment_files = [t.payment_file for t in TransactionsRepo()]
+        payment_files += [p.payment_file for p in ItemizedPaymentsRepo()]
+        return cls(payment_files, rebuilt=True)
+
+    def __contains__(self, payment_file):
+        return payment_file in self.payment_files
+
+    def add(self, payment_file):
+        if payment_file not in self.payment_files:
+            self.payment_files[payment_file] = None
+            self.new_payment_files.append(payment_file)
+
+    def save(self):
+        """
+        Record newly processed payments in the index. This must be done
+        after the ledger itself has been written.
+        """
+        checksum = ledger_fingerprint()
+        repo = ProcessedPaymentsRepo()
+        if self.rebuilt:
+            repo.replace(
+                ProcessedPayment(payment_file, checksum)
+                for payment_file in self.payment_files
+            )
+        else:
+            repo.extend(
+                ProcessedPayment(payment_file, checksum)
+                for payment_file in self.new_payment_files
+            )
+        self.new_payment_files = []
+        self.rebuilt = False
@@ -0,0 +1,305 @@
+"""
+Rebuild the ledger by replaying the payments history.
+
+    python -m oldabe.money_in.replay SEED [--every N] [--until N]
+
+This processes every payment again, in chronological order, starting from
+a seed: a directory with the attributions.txt and valuation.txt that the
+project started with. It rewrites transactions.txt, debts.txt,
+advances.txt, itemized_payments.txt and the processed payments index, and
+the attributions and valuation as of the last payment replayed. The price,
+instruments and unpayable contributors are the current ones. Each payment
+is processed as if in a run of its own, so advances are drawn down by the
+very next payment.
+
+Every N payments, the state of the replay is saved to a checkpoint in the
+cache, along with a fingerprint of the ledger written so far. A replay
+resumes from the latest checkpoint that is still consistent with the
+ledger and the seed, and --until replays to any point (e.g. to bisect the
+history) starting from the nearest checkpoint before it, so only the
+payments since then are processed again.
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+from dataclasses import dataclass
+from decimal import Decimal, getcontext
+from fractions import Fraction
+from typing import Dict, List, Optional
+
+from ..attributions import Attributions
+from ..checksums import ledger_checksum
+from ..compaction import CHECKPOINT, compact_advances
+from ..constants import (
+    ADVANCES_FILE,
+    CACHE_DIR,
+    DEBTS_FILE,
+    ITEMIZED_PAYMENTS_FILE,
+    PROCESSED_PAYMENTS_FILE,
+    TRANSACTIONS_FILE,
+)
+from ..decoders import decoder_for
+from ..models import Advance, Debt
+from ..repos import (
+    AttributionsRepo,
+    InstrumentsRepo,
+    UnpayableContributorsRepo,
+    sqlite_store,
+)
+from ..tally import Tally
+from . import process_payments, unprocessed_payments
+from .equity import write_attributions
+from .price import read_price
+from .processed import ProcessedPayments
+from .session import LedgerSession
+from .valuation import read_valuation, write_valuation
+
+CHECKPOINTS_DIR = os.path.join(CACHE_DIR, 'replay')
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+
+# The ledger files written by a replay
+LEDGER_FILES = [
+    TRANSACTIONS_FILE,
+    DEBTS_FILE,
+    ADVANCES_FILE,
+    ITEMIZED_PAYMENTS_FILE,
+    PROCESSED_PAYMENTS_FILE,
+]
+
+
+@dataclass
+class Seed:
+    """
+    The attributions and valuation that a replay starts from
+    """
+
+    attributions: Dict[str, Fraction]
+    valuation: Decimal
+
+    @classmethod
+    def read(cls, dirname: str) -> "Seed":
+        repo = AttributionsRepo()
+        repo.filename = os.path.join(dirname, 'attributions.txt')
+        return cls(
+            attributions={a.email: a.share for a in repo},
+            valuation=read_valuation(os.path.join(dirname, 'valuation.txt')),
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "attributions": {e: str(s) for e, s in self.attributions.items()},
+            "valuation": str(self.valuation),
+        }
+
+
+@dataclass
+class ReplayState:
+    """
+    The state of a replay after some number of payments
+    """
+
+    payments: int
+    attributions: Attributions
+    valuation: Decimal
+    session: LedgerSession
+
+    @classmethod
+    def start(cls, seed: Seed) -> "ReplayState":
+        for filename in LEDGER_FILES:
+            open(filename, "w").close()
+        return cls(
+            payments=0,
+            attributions=Attributions(seed.attributions),
+            valuation=seed.valuation,
+            session=LedgerSession(
+                unpayable_contributors=UnpayableContributorsRepo()
+            ),
+        )
+
+    def to_json(self) -> dict:
+        session = self.session
+        return {
+            "payments": self.payments,
+            "attributions": {
+                email: str(share) for email, share in self.attributions.items()
+            },
+            "valuation": str(self.valuation),
+            "debts": [
+                [str(value) for value in dataclasses.astuple(d)]
+                for d in session.debts
+            ],
+            "advances": {a.email: str(a.amount) for a in session.advances},
+            "attributable_totals": {
+                email: str(amount)
+                for email, amount in session.attributable_totals.items()
+            },
+        }
+
+    @classmethod
+    def from_json(cls, state: dict) -> "ReplayState":
+        decode_debt = decoder_for(Debt)
+        return cls(
+            payments=state["payments"],
+            attributions=Attributions(
+                {e: Fraction(s) for e, s in state["attributions"].items()}
+            ),
+            valuation=Decimal(state["valuation"]),
+            session=LedgerSession(
+                unpayable_contributors=UnpayableContributorsRepo(),
+                debts=[decode_debt(row) for row in state["debts"]],
+                advances=[
+                    Advance(email, Decimal(amount), CHECKPOINT)
+                    for email, amount in state["advances"].items()
+                ],
+                attributable_totals=Tally(
+                    {
+                        email: Decimal(amount)
+                        for email, amount in state[
+                            "attributable_totals"
+                        ].items()
+                    }
+                ),
+                processed_payments=ProcessedPayments.load(),
+            ),
+        )
+
+
+def _ledger_fingerprints() -> Dict[str, List]:
+    """
+    The size and fingerprint of each ledger file
+    """
+    sizes = {
+        filename: (
+            os.path.getsize(filename) if os.path.exists(filename) else 0
+        )
+        for filename in LEDGER_FILES
+    }
+    return {
+        filename: [size, ledger_checksum(filename, size)]
+        for filename, size in sizes.items()
+    }
+
+
+def save_checkpoint(seed: Seed, state: ReplayState):
+    os.makedirs(CHECKPOINTS_DIR, exist_ok=True)
+    checkpoint = {
+        "seed": seed.to_json(),
+        "ledger": _ledger_fingerprints(),
+        "state": state.to_json(),
+    }
+    filename = os.path.join(CHECKPOINTS_DIR, f"{state.payments:010d}.json")
+    with open(filename, "w") as f:
+        json.dump(checkpoint, f)
+
+
+def _consistent(checkpoint: dict, seed: Seed) -> bool:
+    """
+    Whether the ledger written so far still begins with the ledger as of
+    the checkpoint, which was replayed from the same seed
+    """
+    return checkpoint["seed"] == seed.to_json() and all(
+        ledger_checksum(filename, size) == checksum
+        for filename, (size, checksum) in checkpoint["ledger"].items()
+    )
+
+
+def restore_checkpoint(
+    seed: Seed, until: Optional[int] = None
+) -> Optional[ReplayState]:
+    """
+    Restore the state from the latest consistent checkpoint (but not after
+    the given number of payments), truncating the ledger to what it was at
+    that point
+    """
+    try:
+        filenames = sorted(os.listdir(CHECKPOINTS_DIR), reverse=True)
+    except FileNotFoundError:
+        return None
+    for filename in filenames:
+        with open(os.path.join(CHECKPOINTS_DIR, filename)) as f:
+            checkpoint = json.load(f)
+        if until is not None and checkpoint["state"]["payments"] > until:
+            continue
+        if not _consistent(checkpoint, seed):
+            continue
+        for ledger_file, (size, _) in checkpoint["ledger"].items():
+            if os.path.exists(ledger_file):
+                os.truncate(ledger_file, size)
+        return ReplayState.from_json(checkpoint["state"])
+    return None
+
+
+def replay(
+    seed: Seed,
+    every: int = DEFAULT_CHECKPOINT_INTERVAL,
+    until: Optional[int] = None,
+) -> ReplayState:
+    """
+    Replay the payments history from the seed, or from the latest
+    checkpoint, up to the given number of payments (or all of them), and
+    write the resulting ledger.
+    """
+    if sqlite_store() is not None:
+        raise RuntimeError("Replay writes the ledger files, not the store.")
+    instruments = {a.email: a.share for a in InstrumentsRepo()}
+    price = read_price()
+    state = restore_checkpoint(seed, until) or ReplayState.start(seed)
+    session = state.session
+
+    for payment in unprocessed_payments(session.processed_payments):
+        if until is not None and state.payments >= until:
+            break
+        drawn = len(session.new_advances)
+        state.valuation = process_payments(
+            instruments,
+            state.attributions,
+            session,
+            [payment],
+            price,
+            state.valuation,
+        )
+        # the advances of later payments are drawn down from the start
+        session.advances = compact_advances(
+            [*session.advances, *session.new_advances[drawn:]]
+        )
+        state.payments += 1
+        if state.payments % every == 0:
+            session.flush()
+            save_checkpoint(seed, state)
+
+    session.flush()
+    write_attributions(state.attributions)
+    write_valuation(state.valuation)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the ledger by replaying the payments history."
+    )
+    parser.add_argument(
+        "seed",
+        help="a directory with the initial attributions.txt and valuation.txt",
+    )
+    parser.add_argument(
+        "--every",
+        type=int,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help="the number of payments between checkpoints",
+    )
+    parser.add_argument(
+        "--until",
+        type=int,
+        help="the number of payments to replay (default: all of them)",
+    )
+    args = parser.parse_args()
+    # the same precision as money_in
+    getcontext().prec = 10
+    state = replay(Seed.read(args.seed), args.every, args.until)
+    print(f"Replayed {state.payments} payments.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+from ..repos import (
+    AdvancesRepo,
+    DebtsRepo,
+    ItemizedPaymentsRepo,
+    TransactionsRepo,
+    UnpayableContributorsRepo,
+)
+from ..tally import Tally
+from .debt import OpenDebts
+from .equity import load_attributable_payment_totals
+from .processed import ProcessedPayments
+
+
+class LedgerSession:
+    """
+    The state of the ledger for the duration of a single money_in run
+
+    Each repo is read just once, when the session is loaded, rather than
+    for every payment processed. Records created while processing payments
+    are staged in the session and only written to disk on flush, so that if
+    any errors are encountered, no changes are made.
+
+    The open debts are kept up to date as payments in the run pay them off
+    and create new ones, so that a debt is never paid twice. Advances
+    created during the run are staged but not drawn down until the next run,
+    i.e. payments in a run see the advances as of the start of the run.
+
+    Rather than the itemized payments themselves, the session keeps the
+    total attributable payments by each payer, which determine whether a
+    payment counts as an investment. These are updated as soon as a payment
+    is itemized, so that they are seen by later payments in the same run.
+    """
+
+    def __init__(
+        self,
+        unpayable_contributors=(),
+        debts=(),
+        advances=(),
+        attributable_totals=None,
+        processed_payments=None,
+    ):
+        self.unpayable_contributors = set(unpayable_contributors)
+        self.debts = OpenDebts(debts)
+        self.advances = list(advances)
+        self.attributable_totals = attributable_totals or Tally()
+        self.processed_payments = processed_payments or ProcessedPayments()
+        self.new_debts = []
+        self.new_transactions = []
+        self.new_advances = []
+        self.new_itemized_payments = []
+
+    @classmethod
+    def load(cls) -> "LedgerSession":
+        """Read the current state of the ledger from disk."""
+        return cls(
+            unpayable_contributors=UnpayableContributorsRepo(),
+            debts=DebtsRepo(),
+            advances=AdvancesRepo(),
+            attributable_totals=load_attributable_payment_totals(),
+            processed_payments=ProcessedPayments.load(),
+        )
+
+    def record(self, debts, transactions, advances):
+        """Stage the records generated by distributing a payment."""
+        self.debts.add(debts)
+        self.new_debts += debts
+        self.new_transactions += transactions
+        self.new_advances += advances
+
+    def record_itemized_payment(self, itemized_payment):
+        self.new_itemized_payments.append(itemized_payment)
+        if itemized_payment.attributable:
+            self.attributable_totals[
+                itemized_payment.email
+            ] += itemized_payment.project_amount
+
+    def flush(self):
+        """
+        Append all staged records to the ledger on disk. Records are
+        unstaged once written, so that the session can be flushed again.
+        """
+        DebtsRepo().extend(self.new_debts)
+        TransactionsRepo().extend(self.new_transactions)
+        ItemizedPaymentsRepo().extend(self.new_itemized_payments)
+        AdvancesRepo().extend(self.new_advances)
+        # the index is written last since it fingerprints the ledger
+        self.processed_payments.save()
+        self.new_debts = []
+        self.new_transactions = []
+        self.new_advances = []
+        self.new_itemized_payments = []
@@ -0,0 +1,152 @@
+"""
+What-if simulations of incoming payments.
+
+A simulation runs hypothetical payments through the same logic as money_in,
+but entirely in memory, against a snapshot of the ledger that is read from
+disk just once. Nothing is written to disk, so any number of scenarios can be
+evaluated against the same snapshot, optionally across a pool of processes.
+"""
+
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, getcontext
+from fractions import Fraction
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..attributions import Attributions
+from ..models import Advance, Debt, Payment
+from ..repos import (
+    AdvancesRepo,
+    AttributionsRepo,
+    DebtsRepo,
+    InstrumentsRepo,
+    ItemizedPaymentsRepo,
+    UnpayableContributorsRepo,
+)
+from ..tally import Tally
+from . import process_payments
+from .debt import OpenDebts
+from .equity import attributable_payment_totals
+from .price import read_price
+from .session import LedgerSession
+from .valuation import read_valuation
+
+
+@dataclass
+class LedgerSnapshot:
+    """
+    The state of the ledger that determines how incoming payments are
+    processed. Only open debts are kept, and advances are kept as they are
+    since they are drawn down by contributor.
+    """
+
+    instruments: Dict[str, Fraction]
+    attributions: Dict[str, Fraction]
+    price: Decimal
+    valuation: Decimal
+    unpayable_contributors: Set[str] = field(default_factory=set)
+    debts: List[Debt] = field(default_factory=list)
+    advances: List[Advance] = field(default_factory=list)
+    attributable_totals: Tally = field(default_factory=Tally)
+
+    @classmethod
+    def load(cls) -> "LedgerSnapshot":
+        """Read the current state of the ledger from disk."""
+        return cls(
+            instruments={a.email: a.share for a in InstrumentsRepo()},
+            attributions={a.email: a.share for a in AttributionsRepo()},
+            price=read_price(),
+            valuation=read_valuation(),
+            unpayable_contributors=set(UnpayableContributorsRepo()),
+            debts=list(OpenDebts(DebtsRepo())),
+            advances=list(AdvancesRepo()),
+            # not from a snapshot, which would be written to the cache
+            attributable_totals=attributable_payment_totals(
+                ItemizedPaymentsRepo()
+            ),
+        )
+
+
+@dataclass
+class Outcome:
+    """
+    The result of a simulation: the amounts contributors would receive, the
+    debts and advances they would then have, and the resulting valuation and
+    attributions
+    """
+
+    transactions: Tally
+    debts: Tally
+    advances: Tally
+    valuation: Decimal
+    attributions: Dict[str, Fraction]
+
+
+def simulate(snapshot: LedgerSnapshot, payments: Iterable[Payment]) -> Outcome:
+    """
+    Process hypothetical payments, in the order given, against a snapshot of
+    the ledger. Neither the snapshot nor the payments are modified.
+    """
+    session = LedgerSession(
+        unpayable_contributors=snapshot.unpayable_contributors,
+        debts=snapshot.debts,
+        advances=snapshot.advances,
+        attributable_totals=Tally(dict(snapshot.attributable_totals)),
+    )
+    attributions = Attributions(snapshot.attributions)
+    valuation = process_payments(
+        snapshot.instruments,
+        attributions,
+        session,
+        # processing deducts fees from the payments
+        (dataclasses.replace(p) for p in payments),
+        snapshot.price,
+        snapshot.valuation,
+    )
+    return Outcome(
+        transactions=Tally(
+            (t.email, t.amount) for t in session.new_transactions
+        ),
+        debts=Tally((d.email, d.amount) for d in session.debts),
+        advances=Tally(
+            (a.email, a.amount)
+            for a in session.advances + session.new_advances
+        ),
+        valuation=valuation,
+        attributions=dict(attributions),
+    )
+
+
+def _set_precision(prec: int):
+    getcontext().prec = prec
+
+
+def simulate_scenarios(
+    snapshot: LedgerSnapshot,
+    scenarios: Iterable[Iterable[Payment]],
+    processes: Optional[int] = None,
+    chunksize: int = 16,
+) -> List[Outcome]:
+    """
+    Simulate each scenario (a sequence of payments) against the same
+    snapshot of the ledger.
+
+    If a number of processes is given, the scenarios are fanned out across a
+    pool of that many processes, which use the same decimal precision as the
+    caller. Otherwise they are simulated one after another.
+    """
+    run = partial(simulate, snapshot)
+    if not processes:
+        return list(map(run, scenarios))
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_set_precision,
+        initargs=(getcontext().prec,),
+    ) as executor:
+        return list(
+            executor.map(
+                run, (list(s) for s in scenarios), chunksize=chunksize
+            )
+        )
@@ -8,8 +8,8 @@ from decimal import Decimal
 
 # note that commas are used as a decimal separator in some languages
 # (e.g. Spain Spanish), so that would need to be handled at some point
-def read_valuation() -> Decimal:
-    with open(VALUATION_FILE) as f:
+def read_valuation(filename: str = VALUATION_FILE) -> Decimal:
+    with open(filename) as f:
         valuation = f.readline()
         valuation = Decimal(re.sub("[^0-9.]", "", valuation))
         return valuation
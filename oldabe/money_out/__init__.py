@@ -1,95 +1,214 @@
 #!/usr/bin/env python
 
-from ..repos import AdvancesRepo, DebtsRepo, PayoutsRepo, TransactionsRepo
-from ..tally import Tally
+import sys
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from ..cents import cents_enabled
+from ..constants import ACCOUNTING_ZERO
+from ..reports import (
+    ReportWriter,
+    View,
+    render,
+    write_csv,
+    write_json_lines,
+    write_table,
+)
+from .accounts import Accounts, aggregate
+
+SECTION_BREAK = "----------------------------"
+
+# The formats the outstanding balances can be written in
+FORMATS = ["markdown", "jsonl", "csv"]
+
+# The fields of the record of each contributor's account
+RECORD_FIELDS = ["email", "owed", "paid", "balance", "debt", "advance"]
+
+
+def write_balances(
+    writer: ReportWriter, balances: dict, view: Optional[View] = None
+):
+    if not balances:
+        writer.line("There are no outstanding (payable) balances.")
+        return
+    writer.line("The current outstanding (payable) balances are:")
+    writer.line()
+    write_table(
+        writer,
+        "| Name | Balance |",
+        "| ---- | --- |",
+        [(name, balance) for name, balance in balances.items() if balance > 0],
+        lambda balance: f"{balance:.2f}",
+        view,
+    )
+    writer.line()
+    writer.line()
+    writer.line(f"**Total** = {sum(balances.values()):.2f}")
+
+
+def write_debts(
+    writer: ReportWriter, outstanding_debts: dict, view: Optional[View] = None
+):
+    if not outstanding_debts:
+        writer.line("There are no outstanding (unpayable) debts.")
+        return
+    writer.line("The current outstanding (unpayable) debts are:")
+    writer.line()
+    write_table(
+        writer,
+        "| Name | Debt |",
+        "| ---- | --- |",
+        list(outstanding_debts.items()),
+        lambda debt: f"{debt:.2f}",
+        view,
+    )
+    writer.line()
+    writer.line()
+    writer.line(f"**Total** = {sum(outstanding_debts.values()):.2f}")
+
+
+def write_advances(
+    writer: ReportWriter, advances: dict, view: Optional[View] = None
+):
+    """Report aggregate advances. This is temporary, for testing
+    purposes."""
+    if not advances:
+        writer.line("There are no advances.")
+        return
+    writer.line("The current advances are:")
+    writer.line()
+    write_table(
+        writer,
+        "| Name | Advance |",
+        "| ---- | ------- |",
+        list(advances.items()),
+        lambda advance: f"{advance:.2f}",
+        view,
+    )
+    writer.line()
+    writer.line()
+    writer.line(f"**Total** = {sum(advances.values()):.2f}")
 
 
 def prepare_balances_message(balances: dict):
-    if not balances:
-        return "There are no outstanding (payable) balances."
-    balances_table = ""
-    for name, balance in balances.items():
-        if balance > 0:
-            balances_table += f"{name} | {balance:.2f}\n"
-    message = f"""
-    The current outstanding (payable) balances are:
-
-    | Name | Balance |
-    | ---- | --- |
-    {balances_table}
-
-    **Total** = {sum(balances.values()):.2f}
-    """
-    return "\r\n".join(line.strip() for line in message.split('\n')).strip()
+    return render(write_balances, balances)
 
 
 def prepare_debts_message(outstanding_debts: dict):
-    if not outstanding_debts:
-        return "There are no outstanding (unpayable) debts."
-    debts_table = ""
-    for name, debt in outstanding_debts.items():
-        debts_table += f"{name} | {debt:.2f}\n"
-    message = f"""
-    The current outstanding (unpayable) debts are:
-
-    | Name | Debt |
-    | ---- | --- |
-    {debts_table}
-
-    **Total** = {sum(outstanding_debts.values()):.2f}
-    """
-    return "\r\n".join(line.strip() for line in message.split('\n')).strip()
+    return render(write_debts, outstanding_debts)
 
 
 def prepare_advances_message(advances: dict):
     """A temporary message reporting aggregate advances, for testing
     purposes."""
-    if not advances:
-        return "There are no advances."
-    advances_table = ""
-    for name, advance in advances.items():
-        advances_table += f"{name} | {advance:.2f}\n"
-    message = f"""
-    The current advances are:
-
-    | Name | Advance |
-    | ---- | ------- |
-    {advances_table}
-
-    **Total** = {sum(advances.values()):.2f}
-    """
-    return "\r\n".join(line.strip() for line in message.split('\n')).strip()
+    return render(write_advances, advances)
 
 
 def combined_message(balances_message, debts_message, advances_message):
-    message = f"""
-    {balances_message}
+    return render(
+        lambda writer: writer.lines(
+            [
+                *balances_message.split("\n"),
+                "",
+                SECTION_BREAK,
+                "",
+                *debts_message.split("\n"),
+                "",
+                SECTION_BREAK,
+                "",
+                *advances_message.split("\n"),
+            ]
+        )
+    )
+
+
+def write_accounts(
+    writer: ReportWriter, accounts: Accounts, view: Optional[View] = None
+):
+    """
+    Report the outstanding balances, debts and advances
+    """
+    write_balances(writer, accounts.balances(), view)
+    writer.line()
+    writer.line(SECTION_BREAK)
+    writer.line()
+    write_debts(writer, accounts.debts(), view)
+    writer.line()
+    writer.line(SECTION_BREAK)
+    writer.line()
+    write_advances(writer, accounts.advances(), view)
 
-    ----------------------------
 
-    {debts_message}
+def _to_cents(amount) -> Decimal:
+    return Decimal(amount).quantize(ACCOUNTING_ZERO)
 
-    ----------------------------
 
-    {advances_message}
+def account_records(
+    accounts: Accounts, view: Optional[View] = None
+) -> Iterator[Dict[str, Any]]:
     """
-    return "\r\n".join(line.strip() for line in message.split('\n')).strip()
+    The record of each contributor's account, where the amount of an
+    account is its outstanding balance. Amounts are rounded to the cent, as
+    in the Markdown reports, so that they are the same however they were
+    tallied.
+    """
+    view = view or View()
+    balances = [
+        (email, account.balance) for email, account in accounts.items()
+    ]
+    for email, balance in view.select(balances):
+        account = accounts[email]
+        yield {
+            "email": email,
+            "owed": _to_cents(account.owed),
+            "paid": _to_cents(account.paid),
+            "balance": _to_cents(balance),
+            "debt": _to_cents(account.debt),
+            "advance": _to_cents(account.advance),
+        }
+
+
+def compile_accounts(as_of: Optional[datetime] = None) -> Accounts:
+    """Compile the account of each contributor, either currently or as of
+    some point in time.
+
+    With OLDABE_ARITHMETIC=cents, the amounts are tallied in integer cents,
+    unless some amount isn't a whole number of cents.
+    """
+    if cents_enabled():
+        try:
+            return aggregate(cents=True, as_of=as_of).to_decimal()
+        except ValueError:
+            # not a whole number of cents
+            pass
+    return aggregate(as_of=as_of)
 
 
-def compile_outstanding_balances():
+def compile_outstanding_balances(as_of: Optional[datetime] = None):
     """Read all accounting records and determine the total outstanding
-    balances, debts, and advances for each contributor.
+    balances, debts, and advances for each contributor, either currently or
+    as of some point in time.
     """
-    owed = Tally((t.email, t.amount) for t in TransactionsRepo())
-    paid = Tally((p.email, p.amount) for p in PayoutsRepo())
-    balances = owed - paid
-    balances_message = prepare_balances_message(balances)
+    return render(write_accounts, compile_accounts(as_of))
 
-    outstanding_debts = Tally((d.email, d.amount) for d in DebtsRepo())
 
-    debts_message = prepare_debts_message(outstanding_debts)
+def write_outstanding_balances(
+    out: TextIO = sys.stdout,
+    as_of: Optional[datetime] = None,
+    view: Optional[View] = None,
+    output_format: str = "markdown",
+):
+    """Report the outstanding balances, debts, and advances for each
+    contributor, streaming the report to out as it is written.
 
-    advances = Tally((a.email, a.amount) for a in AdvancesRepo())
-    advances_message = prepare_advances_message(advances)
-
-    return combined_message(balances_message, debts_message, advances_message)
+    Rather than a Markdown report, the account of each contributor can be
+    written as a record, in JSON Lines ("jsonl") or CSV ("csv") format.
+    """
+    accounts = compile_accounts(as_of)
+    if output_format == "jsonl":
+        write_json_lines(out, account_records(accounts, view))
+    elif output_format == "csv":
+        write_csv(out, RECORD_FIELDS, account_records(accounts, view))
+    else:
+        write_accounts(ReportWriter(out), accounts, view)
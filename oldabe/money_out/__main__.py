@@ -1,14 +1,62 @@
-from . import compile_outstanding_balances
+import argparse
+import sys
+from datetime import date, datetime, time
+
+from ..reports import ORDERS, View
+from . import FORMATS, write_outstanding_balances
 from decimal import getcontext
 
 
+def parse_as_of(value: str) -> datetime:
+    """
+    A point in time, where a date alone means the end of that day
+    """
+    try:
+        return datetime.combine(date.fromisoformat(value), time.max)
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
 def main():
+    parser = argparse.ArgumentParser(
+        description="Compile the outstanding balances, debts and advances."
+    )
+    parser.add_argument(
+        "--as-of",
+        type=parse_as_of,
+        help="a date or time to compile them as of (default: now)",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=sorted(ORDERS),
+        help="the order of the rows of each table (default: as recorded)",
+    )
+    parser.add_argument(
+        "--top", type=int, help="show only the first N rows of each table"
+    )
+    parser.add_argument(
+        "--page", type=int, default=1, help="the page of rows to show"
+    )
+    parser.add_argument(
+        "--page-size", type=int, help="the number of rows on each page"
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="markdown",
+        help="a Markdown report, or a record of each contributor's account"
+        " as JSON Lines or CSV (default: markdown)",
+    )
+    args = parser.parse_args()
     # set decimal precision at 10 to ensure
     # that it is the same everywhere
     # and large enough to represent a sufficiently
     # large number of contributors
     getcontext().prec = 10
-    print(compile_outstanding_balances())
+    view = View(args.sort, args.top, args.page, args.page_size)
+    write_outstanding_balances(sys.stdout, args.as_of, view, args.format)
+    if args.format == "markdown":
+        print()
 
 
 if __name__ == "__main__":
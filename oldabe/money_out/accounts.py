@@ -0,0 +1,220 @@
+"""
+The account of each contributor: what they are owed, what they have been
+paid, their outstanding (unpayable) debts and their advances.
+
+The transactions, debts and advances ledgers and the payouts directory are
+independent sources, so they are read concurrently on a pool of threads,
+each ledger in a single pass and the payout files as separate reads, since
+opening many small files is mostly waiting on I/O. Compiling the accounts
+then takes about as long as the slowest source rather than all of them in
+turn. The tallies from each source are merged into a single account per
+contributor.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Context, Decimal, getcontext, setcontext
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..cents import CentsTally, cents_to_decimal
+from ..constants import CACHE_DIR
+from ..compaction import compacted_at
+from ..repos import (
+    AdvancesArchiveRepo,
+    AdvancesRepo,
+    DebtsArchiveRepo,
+    DebtsRepo,
+    PayoutsRepo,
+    TransactionsRepo,
+)
+from ..snapshots import tally_ledger
+from ..tally import Tally
+from ..time_index import rows_as_of
+
+OWED_SNAPSHOT_FILE = os.path.join(CACHE_DIR, 'owed.json')
+DEBTS_SNAPSHOT_FILE = os.path.join(CACHE_DIR, 'debts.json')
+ADVANCES_SNAPSHOT_FILE = os.path.join(CACHE_DIR, 'advances.json')
+TRANSACTIONS_INDEX_FILE = os.path.join(CACHE_DIR, 'transactions-index.json')
+DEBTS_INDEX_FILE = os.path.join(CACHE_DIR, 'debts-index.json')
+ADVANCES_INDEX_FILE = os.path.join(CACHE_DIR, 'advances-index.json')
+DEBTS_ARCHIVE_INDEX_FILE = os.path.join(CACHE_DIR, 'debts-archive-index.json')
+ADVANCES_ARCHIVE_INDEX_FILE = os.path.join(
+    CACHE_DIR, 'advances-archive-index.json'
+)
+
+# Decimal amounts, or integer cents (see oldabe.cents)
+Amount = Union[Decimal, int]
+
+# The fields of an account, in the order they are read
+COLUMNS = ["owed", "paid", "debt", "advance"]
+
+
+@dataclass
+class Account:
+    owed: Amount
+    paid: Amount
+    debt: Amount
+    advance: Amount
+
+    @property
+    def balance(self) -> Amount:
+        """
+        The outstanding (payable) balance
+        """
+        return self.owed - self.paid
+
+
+class Accounts(Dict[str, Account]):
+    """
+    The account of each contributor, by email
+
+    For each column, the contributors that appear in its source are kept in
+    the order in which they first appear there, which is the order they are
+    reported in.
+    """
+
+    def __init__(self, amount_type: type = Decimal):
+        super().__init__()
+        self.amount_type = amount_type
+        self.listed: Dict[str, List[str]] = {column: [] for column in COLUMNS}
+
+    def __missing__(self, email: str) -> Account:
+        zero = self.amount_type()
+        account = self[email] = Account(zero, zero, zero, zero)
+        return account
+
+    def add(self, column: str, tally: Tally):
+        """
+        Merge the tally from the source of a column
+        """
+        for email, amount in tally.items():
+            setattr(self[email], column, amount)
+        self.listed[column].extend(tally)
+
+    def column(self, column: str) -> Dict[str, Amount]:
+        return {
+            email: getattr(self[email], column)
+            for email in self.listed[column]
+        }
+
+    def balances(self) -> Dict[str, Amount]:
+        listed = dict.fromkeys([*self.listed["owed"], *self.listed["paid"]])
+        return {email: self[email].balance for email in listed}
+
+    def debts(self) -> Dict[str, Amount]:
+        return self.column("debt")
+
+    def advances(self) -> Dict[str, Amount]:
+        return self.column("advance")
+
+    def to_decimal(self) -> "Accounts":
+        """
+        The accounts with amounts in integer cents, as Decimal amounts
+        """
+        accounts = Accounts()
+        for email, account in self.items():
+            accounts[email] = Account(
+                *(
+                    cents_to_decimal(getattr(account, column))
+                    for column in COLUMNS
+                )
+            )
+        accounts.listed = {
+            column: list(emails) for column, emails in self.listed.items()
+        }
+        return accounts
+
+
+def _tally(
+    repo,
+    snapshot_file: str,
+    index_file: str,
+    as_of: Optional[datetime],
+    archive: Optional[Tuple[Any, str]] = None,
+) -> Tally:
+    if as_of is not None:
+        tally_type = CentsTally if repo.cents else Tally
+        rows = rows_as_of(repo, as_of, index_file)
+        if archive is not None:
+            # before the ledger was compacted, its history is in the archive
+            compacted = compacted_at(repo)
+            if compacted is not None and as_of < compacted:
+                archive_repo, archive_index_file = archive
+                rows = rows_as_of(archive_repo, as_of, archive_index_file)
+        return tally_type((obj.email, obj.amount) for obj in rows)
+    if repo.cents:
+        snapshot_file = snapshot_file.replace(".json", "-cents.json")
+    return tally_ledger(
+        repo, lambda obj: (obj.email, obj.amount), snapshot_file
+    )
+
+
+def _use_context(context: Context):
+    # each thread has its own decimal context
+    setcontext(context.copy())
+
+
+def aggregate(
+    cents: bool = False,
+    as_of: Optional[datetime] = None,
+    max_workers: Optional[int] = None,
+) -> Accounts:
+    """Read the ledgers and payouts concurrently and compile the account of
+    each contributor, in integer cents if cents is set.
+
+    The ledger files are tallied incrementally from snapshots, so that only
+    the records appended since the last run need to be read. As of some
+    point in time, only the records created by then are tallied, which are
+    found using an index of the ledger by time (see oldabe.time_index). If
+    the debts and advances have since been compacted, they are read from
+    their archives instead (see oldabe.compaction).
+    """
+    tally_type = CentsTally if cents else Tally
+    with ThreadPoolExecutor(
+        max_workers,
+        initializer=_use_context,
+        initargs=(getcontext(),),
+    ) as executor:
+        ledgers = {
+            column: executor.submit(
+                _tally, repo, snapshot_file, index_file, as_of, archive
+            )
+            for column, repo, snapshot_file, index_file, archive in [
+                (
+                    "owed",
+                    TransactionsRepo(cents),
+                    OWED_SNAPSHOT_FILE,
+                    TRANSACTIONS_INDEX_FILE,
+                    None,
+                ),
+                (
+                    "debt",
+                    DebtsRepo(cents),
+                    DEBTS_SNAPSHOT_FILE,
+                    DEBTS_INDEX_FILE,
+                    (DebtsArchiveRepo(cents), DEBTS_ARCHIVE_INDEX_FILE),
+                ),
+                (
+                    "advance",
+                    AdvancesRepo(cents),
+                    ADVANCES_SNAPSHOT_FILE,
+                    ADVANCES_INDEX_FILE,
+                    (AdvancesArchiveRepo(cents), ADVANCES_ARCHIVE_INDEX_FILE),
+                ),
+            ]
+        }
+        # the payout files are read on the pool alongside the ledgers
+        paid = tally_type(
+            (p.email, p.amount)
+            for p in PayoutsRepo(cents, executor)
+            if as_of is None or p.created_at <= as_of
+        )
+        accounts = Accounts(int if cents else Decimal)
+        for column in COLUMNS:
+            accounts.add(
+                column,
+                paid if column == "paid" else ledgers[column].result(),
+            )
+    return accounts
@@ -0,0 +1,223 @@
+"""
+Plan a batch of payouts from the outstanding balances.
+
+    python -m oldabe.money_out.payouts [--csv FILE] [--record FILE]
+
+Every payable contributor whose outstanding balance is at least the
+minimum payout threshold (abe/minimum-payout-threshold.txt) is paid their
+balance, rounded down to the cent. Smaller balances are held until they
+reach the threshold, and unpayable contributors are skipped.
+
+The plan is printed, and can be written as a CSV for a bulk payment with
+--csv. Once the batch has been paid, --record with that CSV writes a payout
+file for each payment in it under abe/payouts, as if they had been
+recorded by hand. The payouts are recorded exactly as they were paid,
+rather than planned again from balances that may have changed since. The
+bulk payment only has the recipient's email, so the name of each payout
+is left blank. The payout files are named for a hash of the CSV, and a
+CSV that has already been recorded is refused, so that the same payouts
+are never recorded twice.
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import ROUND_DOWN, Decimal, getcontext
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..constants import (
+    ACCOUNTING_ZERO,
+    MINIMUM_PAYOUT_THRESHOLD_FILE,
+    PAYOUTS_DIR,
+)
+from ..models import Payout
+from ..reports import ReportWriter, View, render, write_table
+from ..repos import UnpayableContributorsRepo
+from . import compile_accounts
+
+# The currency of the amounts in a bulk payment
+CURRENCY = "USD"
+
+
+def read_minimum_payout_threshold(
+    filename: str = MINIMUM_PAYOUT_THRESHOLD_FILE,
+) -> Decimal:
+    """
+    The smallest balance that is paid out (e.g. "$5"), or a cent if there
+    is no threshold
+    """
+    try:
+        with open(filename) as f:
+            threshold = f.readline()
+    except FileNotFoundError:
+        return ACCOUNTING_ZERO
+    threshold = re.sub("[^0-9.]", "", threshold)
+    if not threshold:
+        return ACCOUNTING_ZERO
+    return max(Decimal(threshold), ACCOUNTING_ZERO)
+
+
+@dataclass
+class PayoutPlan:
+    payouts: List[Payout] = field(default_factory=list)
+    # balances below the threshold, which are held until a later batch
+    held: Dict[str, Decimal] = field(default_factory=dict)
+
+    @property
+    def total(self) -> Decimal:
+        return sum((payout.amount for payout in self.payouts), Decimal(0))
+
+
+def plan_payouts(
+    balances: Dict[str, Decimal],
+    threshold: Decimal,
+    unpayable_contributors: Iterable[str] = (),
+) -> PayoutPlan:
+    """
+    Plan the payout of each balance that is at least the threshold, to the
+    contributors that are payable
+    """
+    unpayable: Set[str] = set(unpayable_contributors)
+    created_at = datetime.utcnow()
+    plan = PayoutPlan()
+    for email, balance in balances.items():
+        if email in unpayable:
+            continue
+        # never pay out more than is owed
+        amount = balance.quantize(ACCOUNTING_ZERO, rounding=ROUND_DOWN)
+        if amount >= threshold:
+            plan.payouts.append(Payout("", email, amount, created_at))
+        elif amount > 0:
+            plan.held[email] = balance
+    return plan
+
+
+def write_payouts(
+    writer: ReportWriter,
+    plan: PayoutPlan,
+    threshold: Decimal,
+    view: Optional[View] = None,
+):
+    if not plan.payouts:
+        writer.line(
+            f"There are no balances of at least {threshold:.2f} to pay."
+        )
+        return
+    writer.line(f"The payouts of balances of at least {threshold:.2f} are:")
+    writer.line()
+    write_table(
+        writer,
+        "| Name | Payout |",
+        "| ---- | ------ |",
+        [(payout.email, payout.amount) for payout in plan.payouts],
+        lambda amount: f"{amount:.2f}",
+        view,
+    )
+    writer.line()
+    writer.line()
+    writer.line(f"**Total** = {plan.total:.2f}")
+    writer.line()
+    writer.line(f"Held until they reach the threshold: {len(plan.held)}")
+
+
+def prepare_payouts_message(plan: PayoutPlan, threshold: Decimal):
+    return render(write_payouts, plan, threshold)
+
+
+def write_bulk_payment(plan: PayoutPlan, filename: str):
+    """
+    Write the payouts as a CSV with the recipient, amount and currency of
+    each payment
+    """
+    with open(filename, "w", newline="") as f:
+        csv.writer(f).writerows(
+            (payout.email, f"{payout.amount:.2f}", CURRENCY)
+            for payout in plan.payouts
+        )
+
+
+def read_bulk_payment(filename: str) -> List[Payout]:
+    """
+    The payouts in a bulk payment CSV, as of now
+    """
+    created_at = datetime.utcnow()
+    payouts = []
+    with open(filename, newline="") as f:
+        for email, amount, currency in csv.reader(f):
+            if currency != CURRENCY:
+                raise ValueError(
+                    f"Payment to {email} is in {currency}, not {CURRENCY}."
+                )
+            payouts.append(Payout("", email, Decimal(amount), created_at))
+    return payouts
+
+
+def bulk_payment_batch(filename: str) -> str:
+    """
+    The name of the batch of payouts in a bulk payment CSV, which is a hash
+    of its contents
+    """
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def record_payouts(
+    payouts: List[Payout], batch: str, dirname: str = PAYOUTS_DIR
+):
+    """
+    Write a payout file for each payout, named for the batch. Raises
+    ValueError if the batch has already been recorded.
+    """
+    os.makedirs(dirname, exist_ok=True)
+    prefix = f"payout-{batch}-"
+    if any(name.startswith(prefix) for name in os.listdir(dirname)):
+        raise ValueError(f"The payouts in batch {batch} are already recorded.")
+    for i, payout in enumerate(payouts, 1):
+        filename = os.path.join(dirname, f"{prefix}{i}.txt")
+        # never overwrite a payout that has been recorded
+        with open(filename, "x") as f:
+            csv.writer(f).writerow(
+                (payout.name, payout.email, payout.amount, payout.created_at)
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Plan a batch of payouts from the outstanding balances."
+    )
+    parser.add_argument(
+        "--csv", help="write the payouts as a CSV for a bulk payment"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help=(
+            "write a payout file for each payment in a bulk payment CSV, "
+            "once it has been paid"
+        ),
+    )
+    args = parser.parse_args()
+    if args.record:
+        payouts = read_bulk_payment(args.record)
+        record_payouts(payouts, bulk_payment_batch(args.record))
+        print(f"Recorded {len(payouts)} payouts.")
+        return
+    # the same precision as compiling the outstanding balances
+    getcontext().prec = 10
+    threshold = read_minimum_payout_threshold()
+    plan = plan_payouts(
+        compile_accounts().balances(),
+        threshold,
+        UnpayableContributorsRepo(),
+    )
+    print(prepare_payouts_message(plan, threshold))
+    if args.csv:
+        write_bulk_payment(plan, args.csv)
+
+
+if __name__ == "__main__":
+    main()
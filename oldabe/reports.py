@@ -0,0 +1,185 @@
+"""
+Markdown reports, such as the outstanding balances and the attributions,
+written line by line to a file or stdout as they are rendered rather than
+built up as a string.
+
+Lines are separated by CRLF, and blank lines at the start and end of a
+report are left out, like the messages that were built up and stripped.
+
+Tables can be sorted by name or by amount, limited to the top N rows, and
+split into pages, so that a report on many contributors can be kept short.
+
+The same data can be written for other programs to read, as JSON Lines or
+CSV records, also one at a time. Decimal amounts are written as exact
+strings (e.g. "17.50") rather than as floats.
+"""
+
+import csv
+import heapq
+import io
+import json
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+CRLF = "\r\n"
+
+# A row of a table, by name
+Row = Tuple[str, Any]
+
+# The order of the rows of a table, as a sort key and whether it is reversed
+Order = Tuple[Callable[[Row], Any], bool]
+
+ORDERS = {
+    "name": (lambda row: row[0], False),
+    # the largest amounts first
+    "amount": (lambda row: row[1], True),
+}
+
+
+class ReportWriter:
+    """
+    Write the lines of a report to a text stream
+    """
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.started = False
+        # blank lines, which are only written if another line follows
+        self.blank = 0
+
+    def line(self, text: str = ""):
+        text = text.strip()
+        if not text:
+            if self.started:
+                self.blank += 1
+            return
+        if self.started:
+            self.out.write(CRLF * (self.blank + 1))
+        self.out.write(text)
+        self.started = True
+        self.blank = 0
+
+    def lines(self, texts: Iterable[str]):
+        for text in texts:
+            self.line(text)
+
+
+def render(write: Callable[..., None], *args, **kwargs) -> str:
+    """
+    The report written by write(writer, *args, **kwargs), as a string
+    """
+    with io.StringIO() as out:
+        write(ReportWriter(out), *args, **kwargs)
+        return out.getvalue()
+
+
+@dataclass
+class View:
+    """
+    Which rows of a table to show, and in what order
+
+    Without a sort, the rows are in the table's own order. The top rows are
+    selected first, and then split into pages of page_size rows.
+    """
+
+    sort: Optional[str] = None
+    top: Optional[int] = None
+    page: int = 1
+    page_size: Optional[int] = None
+
+    @property
+    def start(self) -> int:
+        return (self.page - 1) * self.page_size if self.page_size else 0
+
+    @property
+    def stop(self) -> Optional[int]:
+        stops = [
+            stop
+            for stop in (
+                self.top,
+                self.start + self.page_size if self.page_size else None,
+            )
+            if stop is not None
+        ]
+        return min(stops) if stops else None
+
+    def select(
+        self, rows: Iterable[Row], order: Optional[Order] = None
+    ) -> Iterator[Row]:
+        """
+        The rows to show, sorting only as many of them as are shown
+        """
+        if self.sort is not None:
+            order = ORDERS[self.sort]
+        stop = self.stop
+        if order is not None:
+            key, reverse = order
+            if stop is None:
+                rows = sorted(rows, key=key, reverse=reverse)
+            elif reverse:
+                rows = heapq.nlargest(stop, rows, key=key)
+            else:
+                rows = heapq.nsmallest(stop, rows, key=key)
+        return islice(rows, self.start, stop)
+
+
+def write_table(
+    writer: ReportWriter,
+    header: str,
+    rule: str,
+    rows: Sequence[Row],
+    format_value: Callable[[Any], str],
+    view: Optional[View] = None,
+    order: Optional[Order] = None,
+):
+    """
+    Write a table of a value by name, with a note of which rows are shown if
+    the view leaves some of them out
+    """
+    view = view or View()
+    writer.line(header)
+    writer.line(rule)
+    shown = 0
+    for name, value in view.select(rows, order):
+        writer.line(f"{name} | {format_value(value)}")
+        shown += 1
+    if shown < len(rows):
+        writer.line()
+        if shown:
+            first, last = view.start + 1, view.start + shown
+            writer.line(f"Showing {first}-{last} of {len(rows)} rows.")
+        else:
+            writer.line(f"Showing none of {len(rows)} rows.")
+
+
+def write_json_lines(out: TextIO, records: Iterable[Dict[str, Any]]):
+    """
+    Write each record as a JSON object on a line of its own
+    """
+    for record in records:
+        # Decimal amounts as their exact strings
+        out.write(json.dumps(record, default=str))
+        out.write("\n")
+
+
+def write_csv(
+    out: TextIO, fields: Sequence[str], records: Iterable[Dict[str, Any]]
+):
+    """
+    Write the records as CSV rows, after a header row of their fields
+    """
+    writer = csv.DictWriter(out, fields)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
@@ -1,24 +1,41 @@
 import csv
 import dataclasses
+import json
 import os
-import re
-from datetime import datetime
-from decimal import Decimal
-from typing import Any, Generic, Iterable, Iterator, List, Type, TypeVar
-from fractions import Fraction
+import sqlite3
+from concurrent.futures import Executor
+from contextlib import closing
+from typing import (
+    Any,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from oldabe.constants import (
+    ADVANCES_ARCHIVE_FILE,
     ADVANCES_FILE,
     ATTRIBUTIONS_FILE,
+    CACHE_DIR,
+    DEBTS_ARCHIVE_FILE,
     DEBTS_FILE,
     INSTRUMENTS_FILE,
     ITEMIZED_PAYMENTS_FILE,
+    LEDGER_DB_FILE,
     NONATTRIBUTABLE_PAYMENTS_DIR,
     PAYMENTS_DIR,
     PAYOUTS_DIR,
+    PROCESSED_PAYMENTS_FILE,
+    STORAGE_ENV_VAR,
     TRANSACTIONS_FILE,
     UNPAYABLE_CONTRIBUTORS_FILE,
 )
+from oldabe.decoders import decoder_for
 from oldabe.models import (
     Advance,
     Attribution,
@@ -26,112 +43,341 @@ from oldabe.models import (
     ItemizedPayment,
     Payment,
     Payout,
+    ProcessedPayment,
     Transaction,
 )
 
+T = TypeVar('T')
+
 
-def fix_types(row: List[str], Model: type) -> List[Any]:
+def _to_text(value: Any) -> Optional[str]:
     """
-    Cast string field values from the CSV into the proper types
+    Represent a field value as it would be written to a CSV
     """
+    return None if value is None else str(value)
 
-    def _cast(field, value):
-        if field.type is Decimal:
-            return Decimal(re.sub("[^0-9.-]", "", value))
-        elif field.type is Fraction:
-            return Fraction(value)
-        elif field.type is datetime:
-            return datetime.fromisoformat(value)
-        else:
-            return value
 
-    return [
-        _cast(field, value)
-        for field, value in zip(dataclasses.fields(Model), row)
-    ]
+class SqliteStore:
+    """
+    Rows stored as text in a local SQLite database, with a table per repo
 
+    Values are stored exactly as they would be written to the CSV files, and
+    rows are kept in the order they were added.
+    """
 
-T = TypeVar('T')
+    INDEXED_COLUMNS = ("email", "payment_file")
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.filename))
+
+    def _create_table(self, conn, table: str, columns: List[str]):
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})"
+        )
+        for column in self.INDEXED_COLUMNS:
+            if column in columns:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{column}"
+                    f" ON {table} ({column})"
+                )
+
+    def rows(self, table: str, columns: List[str]) -> Iterator[List[str]]:
+        """
+        Lazily read rows in the order they were added. As in the CSV files,
+        trailing fields that were never provided are left out.
+        """
+        with self._connect() as conn:
+            self._create_table(conn, table, columns)
+            for row in conn.execute(
+                f"SELECT {', '.join(columns)} FROM {table} ORDER BY rowid"
+            ):
+                row = list(row)
+                while row and row[-1] is None:
+                    row.pop()
+                yield row
+
+    def insert(
+        self,
+        table: str,
+        columns: List[str],
+        rows: Iterable[List[Any]],
+        replace: bool = False,
+    ):
+        with self._connect() as conn, conn:
+            self._create_table(conn, table, columns)
+            if replace:
+                conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)})"
+                f" VALUES ({', '.join('?' * len(columns))})",
+                (
+                    [_to_text(value) for value in row]
+                    + [None] * (len(columns) - len(row))
+                    for row in rows
+                ),
+            )
+
+
+def sqlite_store() -> Optional[SqliteStore]:
+    """
+    The SQLite store, if it has been selected as the storage backend
+    """
+    if os.environ.get(STORAGE_ENV_VAR) == "sqlite":
+        return SqliteStore(LEDGER_DB_FILE)
+    return None
 
 
 class FileRepo(Generic[T]):
     """
     A sequence of dataclass instances stored as rows in a CSV
+
+    Repos with a table can instead be stored in SQLite (see sqlite_store).
+    With cents, Decimal amounts are read as integer cents (see oldabe.cents),
+    and such a repo should only be read from.
     """
 
     filename: str
     Model: Type[T]
+    table: Optional[str] = None
+
+    def __init__(self, cents: bool = False):
+        self.cents = cents
+
+    @property
+    def store(self) -> Optional[SqliteStore]:
+        return sqlite_store() if self.table else None
+
+    @property
+    def columns(self) -> List[str]:
+        return [field.name for field in dataclasses.fields(self.Model)]
 
     def __iter__(self) -> Iterator[T]:
-        objs = []
+        """
+        Lazily read objects one row at a time
+        """
+        if store := self.store:
+            decode = decoder_for(self.Model, self.cents)
+            yield from (
+                decode(row) for row in store.rows(self.table, self.columns)
+            )
+            return
+
         try:
-            with open(self.filename) as f:
-                for row in csv.reader(f, skipinitialspace=True):
-                    if dataclasses.is_dataclass(self.Model):
-                        row = fix_types(row, self.Model)
-                    obj = self.Model(*row)
-                    objs.append(obj)
+            f = open(self.filename)
         except FileNotFoundError:
-            pass
-
-        yield from objs
+            return
+
+        decode = decoder_for(self.Model, self.cents)
+        with f:
+            for row in csv.reader(f, skipinitialspace=True):
+                yield decode(row)
+
+    def load(self) -> List[T]:
+        """
+        Read all objects into memory
+        """
+        return list(self)
+
+    def read_from(self, offset: int = 0) -> Iterator[Tuple[T, Optional[int]]]:
+        """
+        Lazily read objects starting from the row at this byte offset
+
+        Each object is paired with the byte offset just past its row, so that
+        a reader can later resume from there. A last row that doesn't end in
+        a newline may not have been completely written yet, so it is paired
+        with None instead.
+        """
+        try:
+            f = open(self.filename, "rb")
+        except FileNotFoundError:
+            return
+
+        position = offset
+
+        def lines():
+            nonlocal position
+            for line in f:
+                if line.endswith(b"\n"):
+                    position += len(line)
+                else:
+                    position = None
+                yield line.decode()
+
+        decode = decoder_for(self.Model, self.cents)
+        with f:
+            f.seek(offset)
+            for row in csv.reader(lines(), skipinitialspace=True):
+                yield decode(row), position
+
+    def _rows(self, objs: Iterable[T]) -> Iterator[tuple]:
+        """
+        The fields of each object, as a row. Unlike dataclasses.astuple,
+        this doesn't copy the values, which are written as they are.
+        """
+        columns = self.columns
+        return (
+            tuple(getattr(obj, column) for column in columns) for obj in objs
+        )
 
     def extend(self, objs: Iterable[T]):
+        if store := self.store:
+            store.insert(self.table, self.columns, self._rows(objs))
+            return
+
         with open(self.filename, "a") as f:
-            writer = csv.writer(f)
-            for obj in objs:
-                writer.writerow(dataclasses.astuple(obj))
+            csv.writer(f).writerows(self._rows(objs))
+
+    def replace(self, objs: Iterable[T]):
+        """
+        Overwrite the whole file with these objects
+        """
+        if store := self.store:
+            store.insert(
+                self.table, self.columns, self._rows(objs), replace=True
+            )
+            return
+
+        with open(self.filename, "w") as f:
+            csv.writer(f).writerows(self._rows(objs))
 
 
 class DirRepo(Generic[T]):
     """
     A sequence of dataclass instances stored as single row CSV files in a dir
+
+    If a manifest file is provided, the row read from each file is cached
+    there along with the file's size and modification time, so that only new
+    or changed files need to be opened the next time.
+
+    With cents, Decimal amounts are read as integer cents (see oldabe.cents).
+
+    With an executor, the files that need to be opened are read concurrently
+    on it, since reading a file is mostly waiting on I/O.
     """
 
     dirname: str
     Model: Type[T]
+    manifest_file: Optional[str] = None
 
-    def __iter__(self) -> Iterator[T]:
-        objs = []
+    def __init__(
+        self, cents: bool = False, executor: Optional[Executor] = None
+    ):
+        self.cents = cents
+        self.executor = executor
+
+    def _read_manifest(self) -> dict:
+        if not self.manifest_file:
+            return {}
         try:
-            filenames = [
-                f
-                for f in os.listdir(self.dirname)
-                if not os.path.isdir(os.path.join(self.dirname, f))
-            ]
-        except FileNotFoundError:
-            filenames = []
+            with open(self.manifest_file) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
 
-        for filename in filenames:
-            with open(os.path.join(self.dirname, filename)) as f:
-                row = next(csv.reader(f, skipinitialspace=True))
-                if dataclasses.is_dataclass(self.Model):
-                    row = fix_types(row, self.Model)
-                obj = self.Model(*row)
-                setattr(obj, "file", filename)
-                objs.append(obj)
+    def _write_manifest(self, manifest: dict):
+        os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+        with open(self.manifest_file, "w") as f:
+            json.dump(manifest, f)
 
-        yield from objs
+    def __iter__(self) -> Iterator[T]:
+        """
+        Lazily read objects one file at a time
+        """
+        try:
+            entries = os.scandir(self.dirname)
+        except FileNotFoundError:
+            return
+
+        decode = decoder_for(self.Model, self.cents)
+        manifest = self._read_manifest()
+        # filename -> [size, mtime_ns, row]
+        updated_manifest = {}
+        with entries:
+            files = [entry for entry in entries if not entry.is_dir()]
+        # filename -> row, for the files that don't need to be opened here
+        rows = {}
+        if self.manifest_file:
+            for entry in files:
+                stat = entry.stat()
+                key = [stat.st_size, stat.st_mtime_ns]
+                cached = manifest.get(entry.name)
+                if cached and cached[:2] == key:
+                    rows[entry.name] = cached[2]
+                updated_manifest[entry.name] = key
+        if self.executor is not None:
+            unread = [entry for entry in files if entry.name not in rows]
+            rows.update(
+                zip(
+                    (entry.name for entry in unread),
+                    self.executor.map(
+                        self._read_row, (entry.path for entry in unread)
+                    ),
+                )
+            )
+        for entry in files:
+            row = rows.get(entry.name)
+            if row is None:
+                row = self._read_row(entry.path)
+            if self.manifest_file:
+                updated_manifest[entry.name].append(row)
+                # the decoder casts fields in place
+                row = list(row)
+            obj = decode(row)
+            setattr(obj, "file", entry.name)
+            yield obj
+
+        if self.manifest_file and updated_manifest != manifest:
+            self._write_manifest(updated_manifest)
+
+    @staticmethod
+    def _read_row(path: str) -> List[str]:
+        with open(path) as f:
+            return next(csv.reader(f, skipinitialspace=True))
+
+    def load(self) -> List[T]:
+        """
+        Read all objects into memory
+        """
+        return list(self)
 
 
 class TransactionsRepo(FileRepo[Transaction]):
     filename = TRANSACTIONS_FILE
     Model = Transaction
+    table = 'transactions'
 
 
 class PayoutsRepo(DirRepo):
     dirname = PAYOUTS_DIR
+    manifest_file = os.path.join(CACHE_DIR, 'payouts-manifest.json')
     Model = Payout
 
 
 class DebtsRepo(FileRepo[Debt]):
     filename = DEBTS_FILE
     Model = Debt
+    table = 'debts'
 
 
 class AdvancesRepo(FileRepo[Advance]):
     filename = ADVANCES_FILE
     Model = Advance
+    table = 'advances'
+
+
+class DebtsArchiveRepo(FileRepo[Debt]):
+    filename = DEBTS_ARCHIVE_FILE
+    Model = Debt
+    table = 'debts_archive'
+
+
+class AdvancesArchiveRepo(FileRepo[Advance]):
+    filename = ADVANCES_ARCHIVE_FILE
+    Model = Advance
+    table = 'advances_archive'
 
 
 class AttributionsRepo(FileRepo[Attribution]):
@@ -146,6 +392,7 @@ class InstrumentsRepo(FileRepo[Attribution]):
 
 class AttributablePaymentsRepo(DirRepo[Payment]):
     dirname = PAYMENTS_DIR
+    manifest_file = os.path.join(CACHE_DIR, 'payments-manifest.json')
     Model = Payment
 
     def __iter__(self):
@@ -157,6 +404,9 @@ class AttributablePaymentsRepo(DirRepo[Payment]):
 
 class NonAttributablePaymentsRepo(DirRepo[Payment]):
     dirname = NONATTRIBUTABLE_PAYMENTS_DIR
+    manifest_file = os.path.join(
+        CACHE_DIR, 'nonattributable-payments-manifest.json'
+    )
     Model = Payment
 
     def __iter__(self):
@@ -175,6 +425,12 @@ class AllPaymentsRepo:
 class ItemizedPaymentsRepo(FileRepo[ItemizedPayment]):
     filename = ITEMIZED_PAYMENTS_FILE
     Model = ItemizedPayment
+    table = 'itemized_payments'
+
+
+class ProcessedPaymentsRepo(FileRepo[ProcessedPayment]):
+    filename = PROCESSED_PAYMENTS_FILE
+    Model = ProcessedPayment
 
 
 class UnpayableContributorsRepo(FileRepo[str]):
@@ -0,0 +1,129 @@
+import json
+import os
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Optional, Tuple, Type, TypeVar
+
+from .cents import CentsTally
+from .checksums import ledger_checksum
+from .repos import FileRepo
+from .tally import Tally
+
+T = TypeVar('T')
+
+
+@dataclass
+class TallySnapshot:
+    """
+    A tally of the rows at the start of a ledger file
+
+    The snapshot covers the first `offset` bytes (`rows` rows) of the ledger,
+    and `checksum` fingerprints those bytes so that we can tell whether the
+    ledger has since been rewritten rather than appended to.
+    """
+
+    offset: int = 0
+    rows: int = 0
+    checksum: str = "0:00000000"
+    tally: Tally = field(default_factory=Tally)
+
+
+def read_snapshot(
+    filename: str, tally_type: Type[Tally] = Tally
+) -> Optional[TallySnapshot]:
+    try:
+        with open(filename) as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return TallySnapshot(
+        offset=data["offset"],
+        rows=data["rows"],
+        checksum=data["checksum"],
+        tally=tally_type(
+            {
+                key: tally_type.amount_type(amount)
+                for key, amount in data["tally"].items()
+            }
+        ),
+    )
+
+
+def write_snapshot(filename: str, snapshot: TallySnapshot):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(
+            {
+                "offset": snapshot.offset,
+                "rows": snapshot.rows,
+                "checksum": snapshot.checksum,
+                "tally": {
+                    key: str(amount) for key, amount in snapshot.tally.items()
+                },
+            },
+            f,
+        )
+
+
+def tally_ledger(
+    repo: FileRepo[T],
+    entry: Callable[[T], Optional[Tuple[str, Decimal]]],
+    snapshot_file: str,
+) -> Tally:
+    """
+    Tally the (key, amount) entry for each row of a ledger, or skip the row
+    if its entry is None.
+
+    Rather than reading the whole ledger each time, only the rows appended
+    since the last snapshot are read and added to it, and the snapshot is
+    updated. If the ledger has been rewritten since, the snapshot is
+    discarded and the whole ledger is read again.
+
+    Snapshots track the ledger files, so a ledger stored in SQLite is always
+    read in full.
+
+    If the repo reads amounts as integer cents, so does the tally, and its
+    snapshot file should be different from the one for Decimal amounts.
+    """
+    tally_type = CentsTally if repo.cents else Tally
+    if repo.store:
+        return tally_type(e for e in map(entry, repo) if e is not None)
+
+    snapshot = read_snapshot(snapshot_file, tally_type)
+    if snapshot is None or snapshot.checksum != ledger_checksum(
+        repo.filename, snapshot.offset
+    ):
+        snapshot = TallySnapshot(tally=tally_type())
+
+    def add(tally, obj):
+        if (e := entry(obj)) is not None:
+            key, amount = e
+            tally[key] += amount
+
+    tally = snapshot.tally
+    offset, rows = snapshot.offset, snapshot.rows
+    incomplete = []
+    for obj, end in repo.read_from(offset):
+        if end is None:
+            # not part of the snapshot until the row is complete
+            incomplete.append(obj)
+            continue
+        add(tally, obj)
+        offset, rows = end, rows + 1
+
+    if offset != snapshot.offset:
+        write_snapshot(
+            snapshot_file,
+            TallySnapshot(
+                offset=offset,
+                rows=rows,
+                checksum=ledger_checksum(repo.filename, offset),
+                tally=tally,
+            ),
+        )
+
+    if incomplete:
+        tally = tally_type(dict(tally))
+        for obj in incomplete:
+            add(tally, obj)
+    return tally
@@ -0,0 +1,111 @@
+"""
+Convert the ledger between the canonical CSV files and the SQLite store.
+
+    python -m oldabe.sqlite import
+    python -m oldabe.sqlite export
+
+Import replaces the contents of the SQLite store with the ledger files, and
+export overwrites the ledger files with the contents of the store. Set
+OLDABE_STORAGE=sqlite to have Old Abe read and write the store instead of
+the ledger files.
+
+Only the ledger that Old Abe writes is kept in the store. Its inputs, the
+payment and payout files, are always read from their directories, so new
+payments are picked up in either mode. The workflow is:
+
+1. import, once, to copy the ledger files into the store
+2. run money_in and money_out with OLDABE_STORAGE=sqlite, as many times as
+   needed (e.g. as new payment files come in)
+3. export, to write the ledger files back before committing them
+
+Importing again replaces the store with the ledger files, so anything
+written in SQLite mode since the last export is lost. Export first. Import
+also clears the processed payments index, which is always a file, so that
+it is rebuilt from the imported ledger on the next run. Otherwise payments
+processed since the last export would still be marked as processed. The
+attributions and valuation are files too, and are not restored by import.
+"""
+
+import argparse
+import csv
+import os
+from typing import List
+
+from .repos import (
+    AdvancesArchiveRepo,
+    AdvancesRepo,
+    DebtsArchiveRepo,
+    DebtsRepo,
+    FileRepo,
+    ItemizedPaymentsRepo,
+    ProcessedPaymentsRepo,
+    SqliteStore,
+    TransactionsRepo,
+)
+from .constants import LEDGER_DB_FILE
+
+FILE_REPOS: List[FileRepo] = [
+    TransactionsRepo(),
+    DebtsRepo(),
+    AdvancesRepo(),
+    ItemizedPaymentsRepo(),
+    DebtsArchiveRepo(),
+    AdvancesArchiveRepo(),
+]
+
+
+def _read_csv(filename):
+    try:
+        with open(filename) as f:
+            yield from csv.reader(f, skipinitialspace=True)
+    except FileNotFoundError:
+        return
+
+
+def import_ledger(store: SqliteStore):
+    """
+    Replace the contents of the store with the ledger files. The text of
+    each field is stored as is. The processed payments index is cleared, to
+    be rebuilt from the imported ledger.
+    """
+    for repo in FILE_REPOS:
+        columns = repo.columns
+        store.insert(
+            repo.table,
+            columns,
+            (row[: len(columns)] for row in _read_csv(repo.filename)),
+            replace=True,
+        )
+    ProcessedPaymentsRepo().replace(())
+
+
+def export_ledger(store: SqliteStore):
+    """
+    Overwrite the ledger files with the contents of the store.
+    """
+    for repo in FILE_REPOS:
+        os.makedirs(os.path.dirname(repo.filename), exist_ok=True)
+        with open(repo.filename, "w") as f:
+            writer = csv.writer(f)
+            for row in store.rows(repo.table, repo.columns):
+                writer.writerow(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Convert the ledger between the canonical CSV files"
+            " and the SQLite store."
+        )
+    )
+    parser.add_argument("command", choices=["import", "export"])
+    args = parser.parse_args()
+    store = SqliteStore(LEDGER_DB_FILE)
+    if args.command == "import":
+        import_ledger(store)
+    else:
+        export_ledger(store)
+
+
+if __name__ == "__main__":
+    main()
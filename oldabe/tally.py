@@ -12,20 +12,27 @@ class Tally(defaultdict[str, Decimal]):
     keeps the sum of an amount.
     """
 
+    # the type of the amounts, which is called to get a zero amount
+    amount_type = Decimal
+
     def __init__(self, source=[]):
         if type(source) is dict:
-            super().__init__(Decimal, source)
+            super().__init__(self.amount_type, source)
             return
 
-        super().__init__(Decimal)
+        super().__init__(self.amount_type)
         for key, amount in source:
             self[key] += amount
 
     def combine(self, combinator, other):
-        result = Tally()
+        result = type(self)()
         for key in dict.fromkeys([*self.keys(), *other.keys()]):
             result[key] = combinator(self[key], other[key])
         return result
 
     def __sub__(self, other):
         return self.combine(sub, other)
+
+    def __reduce__(self):
+        # defaultdict would pickle the default factory as the source
+        return type(self), (dict(self),)
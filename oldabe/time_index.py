@@ -0,0 +1,188 @@
+"""
+An index of a ledger file by the time at which each row was created, for
+reading the ledger as of some point in time.
+
+The index is sparse: rows are grouped into blocks of consecutive rows, and
+for each block it records where the block is in the file and the earliest
+and latest created_at in it. Ledgers are appended to in chronological order,
+so normally every block is later than the one before, and the rows created
+by some point in time are a prefix of the file, which is found by binary
+search. If the ledger isn't in order (e.g. it was edited by hand), only the
+blocks that straddle the point in time are read row by row, and blocks that
+are entirely earlier or later are read in full or skipped.
+
+Like tally snapshots, the index is kept up to date incrementally, and is
+rebuilt if the ledger has been rewritten rather than appended to.
+"""
+
+import json
+import os
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, List, Optional, TypeVar
+
+from .checksums import ledger_checksum
+from .repos import FileRepo
+
+T = TypeVar('T')
+
+# The number of rows in each block of the index
+BLOCK_ROWS = 256
+
+
+@dataclass
+class Block:
+    start: int
+    end: int
+    rows: int
+    earliest: datetime
+    latest: datetime
+
+    def add(self, created_at: datetime, end: int):
+        self.end = end
+        self.rows += 1
+        self.earliest = min(self.earliest, created_at)
+        self.latest = max(self.latest, created_at)
+
+
+@dataclass
+class TimeIndex:
+    """
+    The blocks of the first `offset` bytes of a ledger, which are
+    fingerprinted by `checksum`
+    """
+
+    offset: int = 0
+    checksum: str = "0:00000000"
+    blocks: List[Block] = field(default_factory=list)
+    # whether every block is no earlier than the one before
+    monotonic: bool = True
+
+    def add(self, created_at: datetime, start: int, end: int):
+        last = self.blocks[-1] if self.blocks else None
+        if last is None or last.rows >= BLOCK_ROWS:
+            if last is not None and created_at < last.latest:
+                self.monotonic = False
+            self.blocks.append(Block(start, end, 1, created_at, created_at))
+        else:
+            if created_at < last.latest:
+                self.monotonic = False
+            last.add(created_at, end)
+        self.offset = end
+
+
+def read_index(filename: str) -> Optional[TimeIndex]:
+    try:
+        with open(filename) as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return TimeIndex(
+        offset=data["offset"],
+        checksum=data["checksum"],
+        blocks=[
+            Block(
+                start,
+                end,
+                rows,
+                datetime.fromisoformat(earliest),
+                datetime.fromisoformat(latest),
+            )
+            for start, end, rows, earliest, latest in data["blocks"]
+        ],
+        monotonic=data["monotonic"],
+    )
+
+
+def write_index(filename: str, index: TimeIndex):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(
+            {
+                "offset": index.offset,
+                "checksum": index.checksum,
+                "blocks": [
+                    [
+                        block.start,
+                        block.end,
+                        block.rows,
+                        block.earliest.isoformat(" "),
+                        block.latest.isoformat(" "),
+                    ]
+                    for block in index.blocks
+                ],
+                "monotonic": index.monotonic,
+            },
+            f,
+        )
+
+
+def update_index(repo: FileRepo, index_file: str) -> TimeIndex:
+    """
+    Index the rows appended to the ledger since the index was last updated
+    (or all of them if the ledger has been rewritten since)
+    """
+    index = read_index(index_file)
+    if index is None or index.checksum != ledger_checksum(
+        repo.filename, index.offset
+    ):
+        index = TimeIndex()
+    indexed = offset = index.offset
+    for obj, end in repo.read_from(offset):
+        if end is None:
+            # not indexed until the row is complete
+            break
+        index.add(obj.created_at, offset, end)
+        offset = end
+    if offset != indexed or not os.path.exists(index_file):
+        index.checksum = ledger_checksum(repo.filename, index.offset)
+        write_index(index_file, index)
+    return index
+
+
+def _read_between(repo: FileRepo[T], start: int, end: int) -> Iterator[T]:
+    if start >= end:
+        return
+    for obj, row_end in repo.read_from(start):
+        yield obj
+        if row_end is None or row_end >= end:
+            return
+
+
+def rows_as_of(
+    repo: FileRepo[T], as_of: datetime, index_file: str
+) -> Iterator[T]:
+    """
+    The rows of the ledger that were created no later than as_of
+    """
+    if repo.store:
+        # the index tracks the ledger files
+        yield from (obj for obj in repo if obj.created_at <= as_of)
+        return
+
+    index = update_index(repo, index_file)
+    blocks = index.blocks
+    if index.monotonic:
+        # blocks before this one are entirely no later than as_of, and
+        # blocks after it are entirely later
+        i = bisect_right([block.latest for block in blocks], as_of)
+        yield from _read_between(
+            repo, 0, blocks[i].start if i < len(blocks) else index.offset
+        )
+        blocks = blocks[i : i + 1]
+    for block in blocks:
+        if block.latest <= as_of:
+            yield from _read_between(repo, block.start, block.end)
+        elif block.earliest <= as_of:
+            yield from (
+                obj
+                for obj in _read_between(repo, block.start, block.end)
+                if obj.created_at <= as_of
+            )
+    # any incomplete row at the end, which isn't indexed yet
+    yield from (
+        obj
+        for obj, _ in repo.read_from(index.offset)
+        if obj.created_at <= as_of
+    )
@@ -15,6 +15,10 @@ test_requirements = [
 
 dev_requirements = ['flake8', 'black']
 
+forecast_requirements = ['numpy']
+
+array_requirements = ['numpy']
+
 setup_requirements = ['pytest-runner']
 
 setup(
@@ -29,5 +33,10 @@ setup(
     test_suite='tests',
     install_requires=requirements,
     setup_requires=setup_requirements,
-    extras_require={'dev': dev_requirements, 'test': test_requirements},
+    extras_require={
+        'dev': dev_requirements,
+        'test': test_requirements,
+        'forecast': forecast_requirements,
+        'arrays': array_requirements,
+    },
 )
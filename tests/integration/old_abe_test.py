@@ -366,3 +366,45 @@ class TestUnpayableContributorBecomesPayable:
         assert (
             "| Name | Debt |\r\n" "| ---- | --- |\r\n" "ariana | 0.00\r\n"
         ) in message
+
+
+class TestRepeatedRuns:
+
+    @time_machine.travel(datetime(1985, 10, 26, 1, 24), tick=False)
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_payment_is_processed_once(self, mock_git_rev, abe_fs):
+        amount = 100
+        abe_fs.create_file(
+            "./abe/payments/1.txt",
+            contents=f"sam,036eaf6,{amount},1987-06-30 06:25:00",
+        )
+        process_payments_and_record_updates()
+        process_payments_and_record_updates()
+        with open('./abe/transactions.txt') as f:
+            assert f.read() == (
+                "old abe,1.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "DIA,5.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "sid,47.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "jair,28.20,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "ariana,18.80,1.txt,abcd123,1985-10-26 01:24:00\n"
+            )
+
+    @time_machine.travel(datetime(1985, 10, 26, 1, 24), tick=False)
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_payment_without_transactions_is_processed_once(
+        self, mock_git_rev, abe_fs
+    ):
+        amount = "0.01"
+        abe_fs.create_file(
+            "./abe/payments/1.txt",
+            contents=f"sam,036eaf6,{amount},1987-06-30 06:25:00",
+        )
+        abe_fs.create_file(
+            "./abe/unpayable_contributors.txt", contents="old abe\nDIA\n"
+        )
+        process_payments_and_record_updates()
+        process_payments_and_record_updates()
+        with open('./abe/transactions.txt') as f:
+            assert f.read() == ""
+        with open('./abe/itemized_payments.txt') as f:
+            assert f.read() == "sam,0,0.01,True,1.txt\n"
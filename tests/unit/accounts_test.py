@@ -0,0 +1,70 @@
+from decimal import Decimal, localcontext
+
+import pytest
+
+from oldabe.money_out.accounts import Account, aggregate
+
+LEDGER = {
+    "./abe/transactions.txt": (
+        "sid,47.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+        "jair,28.20,1.txt,abcd123,1985-10-26 01:24:00\n"
+        "sid,10.00,2.txt,abcd123,1985-10-26 01:24:00\n"
+    ),
+    "./abe/debts.txt": (
+        "ariana,18.80,1.txt,abcd123,1985-10-26 01:24:00\n"
+        "jair,1.00,2.txt,abcd123,1985-10-26 01:24:00\n"
+    ),
+    "./abe/advances.txt": "sid,3.50,2.txt,abcd123,1985-10-26 01:24:00\n",
+    "./abe/payouts/1.txt": "sid,sid,$40.00,1985-10-26 01:24:00\n",
+    "./abe/payouts/2.txt": "sam,sam,$5.00,1985-10-26 01:24:00\n",
+}
+
+
+@pytest.fixture
+def ledger(fs):
+    for filename, contents in LEDGER.items():
+        fs.create_file(filename, contents=contents)
+
+
+class TestAggregate:
+    @pytest.mark.parametrize("cents", [False, True])
+    def test_accounts(self, ledger, cents):
+        accounts = aggregate(cents=cents)
+        if cents:
+            accounts = accounts.to_decimal()
+        assert accounts == {
+            "sid": Account(
+                Decimal("57.00"), Decimal("40.00"), 0, Decimal("3.50")
+            ),
+            "jair": Account(Decimal("28.20"), 0, Decimal("1.00"), 0),
+            "sam": Account(0, Decimal("5.00"), 0, 0),
+            "ariana": Account(0, 0, Decimal("18.80"), 0),
+        }
+        assert accounts["sid"].balance == Decimal("17.00")
+
+    def test_reported_in_order_of_each_source(self, ledger):
+        accounts = aggregate()
+        assert list(accounts.balances().items()) == [
+            ("sid", Decimal("17.00")),
+            ("jair", Decimal("28.20")),
+            ("sam", Decimal("-5.00")),
+        ]
+        assert list(accounts.debts()) == ["ariana", "jair"]
+        assert list(accounts.advances()) == ["sid"]
+
+    def test_same_as_in_sequence(self, ledger):
+        assert aggregate(max_workers=1) == aggregate()
+
+    def test_decimal_context_of_caller(self, fs):
+        fs.create_file(
+            "./abe/transactions.txt",
+            contents=(
+                "sid,12345.60,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "sid,0.01,1.txt,abcd123,1985-10-26 01:24:00\n"
+            ),
+        )
+        with localcontext() as context:
+            context.prec = 5
+            owed = aggregate()["sid"].owed
+        # summed at the caller's precision, as if in the caller's thread
+        assert owed == Decimal("12346")
@@ -0,0 +1,74 @@
+import random
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+import pytest
+
+from oldabe.cents import cents_to_decimal
+from oldabe.distribution import (
+    ARRAY_DISTRIBUTION_THRESHOLD,
+    Distribution,
+    make_distribution,
+)
+
+np = pytest.importorskip("numpy")
+
+from oldabe.arrays import ArrayDistribution  # noqa: E402
+
+
+def random_shares(rng, n):
+    return {
+        f"contributor-{i}": Fraction(
+            rng.randrange(1, 1000), rng.randrange(1, 10**6)
+        )
+        for i in range(n)
+    }
+
+
+class TestArrayDistribution:
+    @pytest.mark.parametrize("prec", [10, 28])
+    def test_same_as_distribution(self, prec):
+        rng = random.Random(prec)
+        with localcontext() as context:
+            context.prec = prec
+            for size in (1, 3, 50, 2000):
+                shares = random_shares(rng, size)
+                expected = Distribution(shares)
+                actual = ArrayDistribution(shares)
+                for _ in range(20):
+                    cents = rng.randrange(1, 10**9)
+                    assert actual.distribute_cents(
+                        cents
+                    ) == expected.distribute_cents(cents)
+                    amount = cents_to_decimal(cents)
+                    assert actual.distribute(amount) == expected.distribute(
+                        amount
+                    )
+
+    def test_decimal_places_are_kept(self):
+        shares = {"sid": Fraction(1, 3), "jair": Fraction(2, 3)}
+        for amount in (Decimal("100"), Decimal("1.000"), Decimal("0.005")):
+            expected = Distribution(shares).distribute(amount)
+            actual = ArrayDistribution(shares).distribute(amount)
+            assert [str(a) for a in actual.values()] == [
+                str(a) for a in expected.values()
+            ]
+
+    def test_excluding_shareholders(self):
+        distribution = ArrayDistribution(random_shares(random.Random(0), 10))
+        view = distribution.without({"contributor-0"})
+        assert type(view) is ArrayDistribution
+        assert "contributor-0" not in view.distribute(Decimal("100"))
+
+    def test_distribute_many(self):
+        shares = random_shares(random.Random(0), 100)
+        amounts = [Decimal("100.01"), Decimal("0.01"), Decimal("12345")]
+        assert ArrayDistribution(shares).distribute_many(
+            amounts
+        ) == Distribution(shares).distribute_many(amounts)
+
+
+class TestMakeDistribution:
+    def test_many_shareholders(self):
+        shares = random_shares(random.Random(0), ARRAY_DISTRIBUTION_THRESHOLD)
+        assert type(make_distribution(shares)) is ArrayDistribution
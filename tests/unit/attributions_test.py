@@ -0,0 +1,102 @@
+from fractions import Fraction
+
+import pytest
+
+from oldabe.attributions import (
+    MAX_DENOMINATOR,
+    RESCALED_DENOMINATOR,
+    Attributions,
+    main,
+)
+from oldabe.models import Attribution
+from oldabe.money_in.equity import dilute_attributions
+
+
+class TestAttributions:
+
+    def test_common_denominator(self):
+        attributions = Attributions(
+            {'sid': Fraction(1, 2), 'jair': Fraction(3, 10)}
+        )
+        attributions['ariana'] = Fraction(1, 5)
+        assert attributions.denominator == 10
+        assert attributions.units == {'sid': 5, 'jair': 3, 'ariana': 2}
+        assert dict(attributions) == {
+            'sid': Fraction(1, 2),
+            'jair': Fraction(3, 10),
+            'ariana': Fraction(1, 5),
+        }
+        assert attributions.total() == 1
+
+    def test_dilution_is_exact(self):
+        shares = {'sid': Fraction(1, 2), 'jair': Fraction(1, 2)}
+        attributions = Attributions(shares)
+        for share in [Fraction(939, 10939), Fraction(1, 7)]:
+            dilute_attributions(Attribution('sam', share), attributions)
+            dilute_attributions(Attribution('sam', share), shares)
+        assert dict(attributions) == shares
+        assert list(attributions) == ['sid', 'jair', 'sam']
+
+    def test_dilution_is_bounded(self):
+        attributions = Attributions(
+            {
+                'sid': Fraction(1, 2),
+                'jair': Fraction(1, 3),
+                'ariana': Fraction(1, 6),
+            }
+        )
+        for i in range(50):
+            attributions.dilute(
+                Attribution(f'investor-{i % 5}', Fraction(1, 1009 + i))
+            )
+            assert attributions.total() == 1
+            assert attributions.denominator <= MAX_DENOMINATOR
+
+    def test_dilution_is_lazy(self):
+        attributions = Attributions(
+            {'sid': Fraction(1, 2), 'jair': Fraction(1, 2)}
+        )
+        attributions.dilute(Attribution('sam', Fraction(1, 10)))
+        attributions.dilute(Attribution('sid', Fraction(1, 10)))
+        assert attributions.units == {'sid': 1, 'jair': 1, 'sam': 0}
+        assert list(attributions) == ['sid', 'jair', 'sam']
+        assert attributions['sam'] == Fraction(9, 100)
+        assert attributions.units == {'sid': 101, 'jair': 81, 'sam': 18}
+        assert attributions.total() == 1
+
+    def test_full_dilution(self):
+        attributions = Attributions(
+            {'sid': Fraction(1, 2), 'jair': Fraction(1, 2)}
+        )
+        attributions.dilute(Attribution('sam', Fraction(1)))
+        assert dict(attributions) == {'sid': 0, 'jair': 0, 'sam': 1}
+
+    def test_rescaling_keeps_the_total(self):
+        attributions = Attributions(
+            {'a': Fraction(1, 3), 'b': Fraction(1, 3), 'c': Fraction(1, 3)}
+        )
+        attributions._rescale(RESCALED_DENOMINATOR)
+        assert attributions.units == {
+            'a': RESCALED_DENOMINATOR // 3 + 1,
+            'b': RESCALED_DENOMINATOR // 3,
+            'c': RESCALED_DENOMINATOR // 3,
+        }
+        assert attributions.total() == 1
+
+
+class TestMigration:
+
+    def test_rewrites_attributions(self, fs):
+        sid = Fraction(1, 3) * Fraction(1, 10**18 + 1)
+        fs.create_file(
+            "./abe/attributions.txt",
+            contents=f"sid,{sid}\njair,{1 - sid}\n",
+        )
+        main()
+        with open("./abe/attributions.txt") as f:
+            assert f.read() == "sid,0\njair,1\n"
+
+    def test_attributions_must_be_normalized(self, fs):
+        fs.create_file("./abe/attributions.txt", contents="sid,1/2\n")
+        with pytest.raises(AssertionError):
+            main()
@@ -0,0 +1,210 @@
+import os
+import random
+from decimal import Decimal, localcontext
+from fractions import Fraction
+from unittest.mock import patch
+
+import pytest
+import time_machine
+
+from oldabe.cents import (
+    CentsTally,
+    cents_to_decimal,
+    decimal_weight,
+    format_cents,
+    multiply_cents,
+)
+from oldabe.decoders import parse_cents
+from oldabe.distribution import (
+    CentsDistribution,
+    Distribution,
+    make_distribution,
+)
+from oldabe.money_in import process_payments_and_record_updates
+from oldabe.money_out import compile_outstanding_balances
+
+LEDGER = {
+    "abe/transactions.txt": (
+        "sid,12.92000,0.txt,abcd123,1985-10-26 01:24:00\n"
+        "jair,100,0.txt,abcd123,1985-10-26 01:24:00\n"
+        "sid,0.08,1.txt,abcd123,1985-10-26 01:24:00\n"
+    ),
+    "abe/debts.txt": (
+        "ariana,18.80,0.txt,abcd123,1985-10-26 01:24:00\n"
+        "ariana,-18.80,1.txt,abcd123,1985-10-26 01:24:00\n"
+    ),
+    "abe/advances.txt": "sid,3.50,0.txt,abcd123,1985-10-26 01:24:00\n",
+    "abe/payouts/0.txt": "sid,sid,$5.00,1985-10-26 01:24:00\n",
+}
+
+
+# The payments of each money_in run, and who is unpayable at the time, so
+# that there are debts, debt payments and advances
+RUNS = [
+    (
+        "ariana",
+        {
+            "payments/1.txt": "sam,036eaf6,100,1987-06-30 06:25:00\n",
+            "payments/nonattributable/2.txt": (
+                "sid,sid,20,1987-07-01 06:25:00\n"
+            ),
+        },
+    ),
+    ("ariana", {"payments/3.txt": "jair,jair,37.35,1987-07-02 06:25:00\n"}),
+    ("", {"payments/4.txt": "sam,036eaf6,250,1987-07-03 06:25:00\n"}),
+    # not a whole number of cents
+    ("", {"payments/5.txt": "sam,036eaf6,10.005,1987-07-04 06:25:00\n"}),
+]
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    for filename, contents in LEDGER.items():
+        path = tmp_path / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestParseCents:
+    @pytest.mark.parametrize(
+        "value, cents",
+        [
+            ("12.92000", 1292),
+            ("-18.80", -1880),
+            ("100", 10000),
+            ("0.5", 50),
+            ("$1,000.05", 100005),
+        ],
+    )
+    def test_parse(self, value, cents):
+        assert parse_cents(value) == cents
+
+    def test_fractional_cents(self):
+        with pytest.raises(ValueError):
+            parse_cents("0.001")
+
+    def test_format(self):
+        assert format_cents(-1880) == "-18.80"
+        assert cents_to_decimal(5) == Decimal("0.05")
+
+
+class TestCentsTally:
+    def test_subtract(self):
+        tally = CentsTally([("a", 150), ("b", 5)]) - CentsTally([("a", 50)])
+        assert type(tally) is CentsTally
+        assert tally == {"a": 100, "b": 5}
+        assert tally.to_decimal() == {
+            "a": Decimal("1.00"),
+            "b": Decimal("0.05"),
+        }
+
+
+class TestDifferential:
+    """
+    Integer cents arithmetic gives exactly the same results as Decimals
+    """
+
+    @pytest.mark.parametrize("prec", [10, 28])
+    def test_multiply(self, prec):
+        rng = random.Random(prec)
+        with localcontext() as context:
+            context.prec = prec
+            for _ in range(2000):
+                cents = rng.randrange(1, 10**9)
+                weight = Decimal(rng.randrange(1, 1000)) / Decimal(
+                    rng.randrange(1000, 100000)
+                )
+                assert multiply_cents(
+                    cents, decimal_weight(weight)
+                ) == parse_cents(
+                    str(round(cents_to_decimal(cents) * weight, 2))
+                )
+
+    @pytest.mark.parametrize("prec", [10, 28])
+    def test_distribute(self, prec):
+        rng = random.Random(prec)
+        with localcontext() as context:
+            context.prec = prec
+            for _ in range(200):
+                distribution = Distribution(
+                    {
+                        f"contributor-{i}": Fraction(
+                            rng.randrange(1, 1000), rng.randrange(1, 1000)
+                        )
+                        for i in range(rng.randrange(1, 20))
+                    }
+                )
+                for _ in range(10):
+                    cents = rng.randrange(1, 10**7)
+                    assert distribution.distribute_cents(cents) == {
+                        shareholder: parse_cents(str(amount))
+                        for shareholder, amount in distribution.distribute(
+                            cents_to_decimal(cents)
+                        ).items()
+                    }
+
+    def test_outstanding_balances(self, ledger, monkeypatch):
+        with localcontext() as context:
+            context.prec = 10
+            expected = compile_outstanding_balances()
+            monkeypatch.setenv("OLDABE_ARITHMETIC", "cents")
+            assert compile_outstanding_balances() == expected
+            assert os.path.exists("abe/.cache/owed-cents.json")
+            # again, from the snapshots
+            assert compile_outstanding_balances() == expected
+
+    @time_machine.travel("1987-07-05 06:25:00", tick=False)
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_money_in(self, mock_git_rev, tmp_path, monkeypatch):
+        ledgers = []
+        for arithmetic in ("decimal", "cents"):
+            monkeypatch.setenv("OLDABE_ARITHMETIC", arithmetic)
+            monkeypatch.chdir(tmp_path)
+            os.makedirs(f"{arithmetic}/abe/payments/nonattributable")
+            monkeypatch.chdir(arithmetic)
+            for filename, contents in {
+                "price.txt": "10",
+                "valuation.txt": "100000",
+                "instruments.txt": "old abe,1/100\nDIA,5/100\n",
+                "attributions.txt": "sid,1/2\njair,3/10\nariana,1/5\n",
+            }.items():
+                with open(f"abe/{filename}", "w") as f:
+                    f.write(contents)
+            with localcontext() as context:
+                context.prec = 10
+                for unpayable, payments in RUNS:
+                    with open("abe/unpayable_contributors.txt", "w") as f:
+                        f.write(unpayable)
+                    for filename, contents in payments.items():
+                        with open(f"abe/{filename}", "w") as f:
+                            f.write(contents)
+                    process_payments_and_record_updates()
+            outputs = {}
+            for filename in (
+                "transactions.txt",
+                "debts.txt",
+                "advances.txt",
+                "itemized_payments.txt",
+                "attributions.txt",
+                "valuation.txt",
+            ):
+                with open(f"abe/{filename}") as f:
+                    outputs[filename] = f.read()
+            ledgers.append(outputs)
+        assert ledgers[0] == ledgers[1]
+        assert "ariana,-" in ledgers[1]["debts.txt"]
+        assert ",-" in ledgers[1]["advances.txt"]
+
+    def test_make_distribution(self, monkeypatch):
+        assert type(make_distribution({"sid": 1})) is Distribution
+        monkeypatch.setenv("OLDABE_ARITHMETIC", "cents")
+        assert type(make_distribution({"sid": 1})) is CentsDistribution
+
+    def test_falls_back_to_decimals(self, ledger, monkeypatch):
+        with open("abe/transactions.txt", "a") as f:
+            f.write("jair,0.001,2.txt,abcd123,1985-10-26 01:24:00\n")
+        expected = compile_outstanding_balances()
+        monkeypatch.setenv("OLDABE_ARITHMETIC", "cents")
+        assert compile_outstanding_balances() == expected
@@ -0,0 +1,38 @@
+from oldabe.checksums import BLOCK_SIZE, ledger_checksum
+
+
+class TestLedgerChecksum:
+
+    def test_missing_file(self, fs):
+        assert ledger_checksum("ledger.txt") == "0:00000000"
+
+    def test_unchanged_by_appending(self, fs):
+        fs.create_file("ledger.txt", contents="a" * (3 * BLOCK_SIZE))
+        prefix = ledger_checksum("ledger.txt")
+        with open("ledger.txt", "a") as f:
+            f.write("b")
+        assert ledger_checksum("ledger.txt", 3 * BLOCK_SIZE) == prefix
+        assert ledger_checksum("ledger.txt") != prefix
+
+    def test_changed_by_rewriting(self, fs):
+        fs.create_file("ledger.txt", contents="a" * (3 * BLOCK_SIZE))
+        prefix = ledger_checksum("ledger.txt")
+        with open("ledger.txt", "w") as f:
+            f.write("a" * (3 * BLOCK_SIZE - 1) + "b")
+        assert ledger_checksum("ledger.txt") != prefix
+
+    def test_changed_by_truncating(self, fs):
+        fs.create_file("ledger.txt", contents="abc")
+        prefix = ledger_checksum("ledger.txt")
+        with open("ledger.txt", "w") as f:
+            f.write("ab")
+        assert ledger_checksum("ledger.txt", 3) != prefix
+
+    def test_changed_by_editing_the_middle(self, fs):
+        contents = "a" * (3 * BLOCK_SIZE)
+        fs.create_file("ledger.txt", contents=contents)
+        prefix = ledger_checksum("ledger.txt")
+        middle = len(contents) // 2
+        with open("ledger.txt", "w") as f:
+            f.write(contents[:middle] + "b" + contents[middle + 1 :])
+        assert ledger_checksum("ledger.txt") != prefix
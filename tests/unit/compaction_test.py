@@ -0,0 +1,153 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from oldabe.compaction import (
+    CHECKPOINT,
+    compact_advances,
+    compact_debts,
+    main,
+)
+from oldabe.models import Advance, Debt, Payment
+from oldabe.money_in.debt import pay_outstanding_debts
+from oldabe.money_out import compile_outstanding_balances
+from oldabe.repos import DebtsArchiveRepo, DebtsRepo
+
+DEBTS = [
+    Debt("ariana", Decimal("18.80"), "0.txt"),
+    Debt("jair", Decimal("10.00"), "0.txt"),
+    Debt("ariana", Decimal("5.00"), "1.txt"),
+    Debt("ariana", Decimal("-18.80"), "2.txt"),
+    Debt("jair", Decimal("-4.00"), "2.txt"),
+    Debt("sid", Decimal("-1.00"), "3.txt"),
+]
+
+LEDGER = {
+    "abe/debts.txt": (
+        "ariana,18.80,0.txt,abcd123,1985-10-26 01:24:00\n"
+        "jair,10.00,0.txt,abcd123,1985-10-26 01:24:00\n"
+        "ariana,-18.80,1.txt,abcd123,1985-10-26 01:24:00\n"
+    ),
+    "abe/advances.txt": (
+        "sid,12.00,0.txt,abcd123,1985-10-26 01:24:00\n"
+        "sid,-2.50,1.txt,abcd123,1985-10-26 01:24:00\n"
+        "jair,-0.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+    ),
+}
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    for filename, contents in LEDGER.items():
+        path = tmp_path / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestCompactDebts:
+
+    def test_checkpoint_rows(self):
+        compacted = compact_debts(DEBTS)
+        assert [(d.email, d.amount) for d in compacted] == [
+            ("ariana", Decimal("0")),
+            ("jair", Decimal("0")),
+            ("sid", Decimal("-1.00")),
+            ("jair", Decimal("6.00")),
+            ("ariana", Decimal("5.00")),
+        ]
+        assert all(d.payment_file == CHECKPOINT for d in compacted[:3])
+
+    def test_open_debts_are_carried_over(self):
+        jair, ariana = compact_debts(DEBTS)[3:]
+        # the remainder of a partially paid debt
+        assert (jair.payment_file, jair.created_at) == (
+            "0.txt",
+            DEBTS[1].created_at,
+        )
+        assert (ariana.payment_file, ariana.created_at) == (
+            "1.txt",
+            DEBTS[2].created_at,
+        )
+
+    def test_debts_are_paid_the_same(self):
+        payment = Payment(email="sam", name="Sam", amount=Decimal(8))
+        payable = {"ariana", "jair"}
+        original = pay_outstanding_debts(payment, DEBTS, payable)
+        compacted = pay_outstanding_debts(
+            payment, compact_debts(DEBTS), payable
+        )
+        assert [(d.email, d.amount) for d in compacted] == [
+            (d.email, d.amount) for d in original
+        ]
+
+
+class TestCompactAdvances:
+
+    def test_net_advance_per_contributor(self):
+        advances = [
+            Advance("sid", Decimal("12.00"), "0.txt"),
+            Advance("jair", Decimal("3.00"), "0.txt"),
+            Advance("sid", Decimal("-2.50"), "1.txt"),
+        ]
+        compacted = compact_advances(advances)
+        assert [(a.email, a.amount) for a in compacted] == [
+            ("sid", Decimal("9.50")),
+            ("jair", Decimal("3.00")),
+        ]
+
+
+class TestCompaction:
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_balances_are_unchanged(self, mock_git_rev, ledger):
+        before = compile_outstanding_balances()
+        main()
+        assert compile_outstanding_balances() == before
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_history_is_archived(self, mock_git_rev, ledger):
+        main()
+        with open("abe/debts-archive.txt") as f:
+            assert (
+                f.read().splitlines() == LEDGER["abe/debts.txt"].splitlines()
+            )
+        with open("abe/advances-archive.txt") as f:
+            assert (
+                f.read().splitlines()
+                == LEDGER["abe/advances.txt"].splitlines()
+            )
+        assert [(d.email, d.amount) for d in DebtsRepo()] == [
+            ("ariana", Decimal("0")),
+            ("jair", Decimal("0")),
+            ("jair", Decimal("10.00")),
+        ]
+        jair = DebtsRepo().load()[-1]
+        assert (jair.payment_file, str(jair.created_at)) == (
+            "0.txt",
+            "1985-10-26 01:24:00",
+        )
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_compacting_again_archives_nothing_new(self, mock_git_rev, ledger):
+        main()
+        archived = DebtsArchiveRepo().load()
+        compacted = [(d.email, d.amount) for d in DebtsRepo()]
+        main()
+        assert DebtsArchiveRepo().load() == archived
+        assert [(d.email, d.amount) for d in DebtsRepo()] == compacted
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_compacting_again_archives_new_rows(self, mock_git_rev, ledger):
+        main()
+        DebtsRepo().extend([Debt("ariana", Decimal("2.00"), "4.txt")])
+        main()
+        assert [(d.email, d.payment_file) for d in DebtsArchiveRepo()][3:] == [
+            ("ariana", "4.txt")
+        ]
+        assert [(d.email, d.amount) for d in DebtsRepo()][-2:] == [
+            ("jair", Decimal("10.00")),
+            ("ariana", Decimal("2.00")),
+        ]
@@ -8,6 +8,7 @@ import time_machine
 from oldabe.models import Debt, Payment
 from oldabe.distribution import Distribution
 from oldabe.money_in.debt import (
+    OpenDebts,
     pay_outstanding_debts,
     create_debts,
 )
@@ -300,3 +301,90 @@ class TestPayOutstandingDebts:
         )
 
         assert debt_payments == []
+
+    @time_machine.travel(datetime.now(), tick=False)
+    def test_paid_debts_are_not_paid_again(self):
+        debts = [
+            Debt(
+                email="payable@example.com",
+                amount=Decimal(10),
+                payment_file="fake-file",
+            ),
+            Debt(
+                email="payable@example.com",
+                amount=Decimal(-10),
+                payment_file="earlier-payment",
+            ),
+        ]
+        payment = Payment(
+            email="payer@example.com", name="Sam", amount=Decimal(20)
+        )
+
+        debt_payments = pay_outstanding_debts(
+            payment=payment,
+            all_debts=debts,
+            payable_contributors=set(["payable@example.com"]),
+        )
+
+        assert debt_payments == []
+
+
+class TestOpenDebts:
+    @time_machine.travel(datetime.now(), tick=False)
+    def test_paid_debts_are_closed(self):
+        open_debts = OpenDebts(
+            [
+                Debt(email="a", amount=Decimal(10), payment_file="0.txt"),
+                Debt(email="b", amount=Decimal(10), payment_file="0.txt"),
+            ]
+        )
+        payment = Payment(email="payer", name="Sam", amount=Decimal(15))
+
+        first = open_debts.pay(payment, {"a", "b"})
+        second = open_debts.pay(payment, {"a", "b"})
+
+        assert [(d.email, d.amount) for d in first] == [
+            ("a", Decimal(-10)),
+            ("b", Decimal(-5)),
+        ]
+        assert [(d.email, d.amount) for d in second] == [("b", Decimal(-5))]
+        assert list(open_debts) == []
+
+    def test_debts_are_kept_in_chronological_order(self):
+        open_debts = OpenDebts(
+            [
+                Debt(email="a", amount=Decimal(10), payment_file="0.txt"),
+                Debt(email="b", amount=Decimal(10), payment_file="0.txt"),
+            ]
+        )
+        open_debts.add(
+            [
+                Debt(email="a", amount=Decimal(5), payment_file="1.txt"),
+                Debt(email="b", amount=Decimal(-1), payment_file="1.txt"),
+            ]
+        )
+
+        assert [(d.email, d.amount) for d in open_debts] == [
+            ("a", Decimal(10)),
+            ("b", Decimal(10)),
+            ("a", Decimal(5)),
+        ]
+
+    @time_machine.travel(datetime.now(), tick=False)
+    def test_unpayable_debts_stay_open(self):
+        open_debts = OpenDebts(
+            [
+                Debt(email="a", amount=Decimal(10), payment_file="0.txt"),
+                Debt(email="b", amount=Decimal(10), payment_file="0.txt"),
+            ]
+        )
+        payment = Payment(email="payer", name="Sam", amount=Decimal(100))
+
+        debt_payments = open_debts.pay(payment, {"b"})
+
+        assert [(d.email, d.amount) for d in debt_payments] == [
+            ("b", Decimal(-10))
+        ]
+        assert [(d.email, d.amount) for d in open_debts] == [
+            ("a", Decimal(10))
+        ]
@@ -0,0 +1,98 @@
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from oldabe.decoders import (
+    decoder_for,
+    fix_types,
+    parse_bool,
+    parse_decimal,
+    parse_fraction,
+)
+from oldabe.models import Attribution, ItemizedPayment, Payment, Transaction
+
+
+class TestParseDecimal:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("47.00", Decimal("47.00")),
+            ("-18.80", Decimal("-18.80")),
+            ("100", Decimal("100")),
+            ("$1,000.50", Decimal("1000.50")),
+            (" $5 ", Decimal("5")),
+        ],
+    )
+    def test_matrix(self, value, expected):
+        result = parse_decimal(value)
+        assert result == expected
+        assert str(result) == str(expected)
+
+
+class TestParseBool:
+    @pytest.mark.parametrize(
+        "value, expected", [("True", True), ("False", False)]
+    )
+    def test_matrix(self, value, expected):
+        assert parse_bool(value) is expected
+
+
+class TestParseFraction:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("1/2", Fraction(1, 2)),
+            ("5000/10939", Fraction(5000, 10939)),
+            ("6/12", Fraction(1, 2)),
+            ("-1/2", Fraction(-1, 2)),
+            ("1", Fraction(1)),
+        ],
+    )
+    def test_matrix(self, value, expected):
+        assert parse_fraction(value) == expected
+
+
+class TestDecoderFor:
+    def test_all_fields(self):
+        decode = decoder_for(Transaction)
+        row = ["sid", "47.00", "1.txt", "abcd123", "1985-10-26 01:24:00"]
+        assert decode(list(row)) == Transaction(
+            "sid",
+            Decimal("47.00"),
+            "1.txt",
+            "abcd123",
+            datetime(1985, 10, 26, 1, 24),
+        )
+
+    def test_matches_fix_types(self):
+        row = ["sam", "036eaf6", "$100", "1987-06-30 06:25:00"]
+        assert decoder_for(Payment)(list(row)) == Payment(
+            *fix_types(row, Payment)
+        )
+
+    @pytest.mark.parametrize("cents", [False, True])
+    def test_flags(self, cents):
+        decode = decoder_for(ItemizedPayment, cents)
+        row = ["sam", "0.30", "5.70", "False", "1.txt"]
+        assert decode(list(row)).attributable is False
+
+    def test_extra_fields_are_ignored(self):
+        decode = decoder_for(Attribution)
+        row = ["sid", "1/2", "1"]
+        assert decode(list(row)) == Attribution("sid", Fraction(1, 2))
+        assert decode(list(row)) == Attribution(*fix_types(row, Attribution))
+
+    @pytest.mark.parametrize("cents", [False, True])
+    def test_misaligned_row(self, cents):
+        # an unquoted comma in the amount
+        row = ["sid", "$1", "000.00", "1.txt", "abcd123", "1985-10-26"]
+        with pytest.raises(ValueError):
+            decoder_for(Transaction, cents)(row)
+
+    def test_not_a_dataclass(self):
+        assert decoder_for(str)(["ariana"]) == "ariana"
+
+    def test_is_built_once(self):
+        assert decoder_for(Transaction) is decoder_for(Transaction)
@@ -1,4 +1,5 @@
-from oldabe.distribution import Distribution
+import pytest
+from oldabe.distribution import Distribution, make_distribution
 from fractions import Fraction
 from decimal import Decimal
 
@@ -34,3 +35,102 @@ class TestDistribute:
             'jair': Decimal('16.67'),
             'ariana': Decimal('66.66'),
         }
+
+    def test_distributes_excess_dust_to_largest_share(self):
+        amount = Decimal('0.10')
+        distribution = Distribution(
+            {
+                'sid': Fraction(1, 3),
+                'jair': Fraction(1, 3),
+                'ariana': Fraction(1, 3),
+            }
+        )
+        assert distribution.distribute(amount) == {
+            'sid': Decimal('0.03'),
+            'jair': Decimal('0.03'),
+            'ariana': Decimal('0.04'),
+        }
+
+
+class TestCaching:
+
+    def test_results_are_copies(self):
+        distribution = Distribution(
+            {'sid': Fraction(1, 2), 'jair': Fraction(1, 2)}
+        )
+        result = distribution.distribute(Decimal(100))
+        result['sid'] = Decimal(0)
+        assert distribution.distribute(Decimal(100)) == {
+            'sid': Decimal(50),
+            'jair': Decimal(50),
+        }
+
+    def test_equal_amounts_with_different_exponents(self):
+        distribution = Distribution(
+            {
+                'sid': Fraction(1, 3),
+                'jair': Fraction(1, 3),
+                'ariana': Fraction(1, 3),
+            }
+        )
+        assert str(distribution.distribute(Decimal('100'))['ariana']) == (
+            '33.34'
+        )
+        assert str(distribution.distribute(Decimal('100.000'))['ariana']) == (
+            '33.340'
+        )
+
+    def test_without_is_cached(self):
+        distribution = Distribution(
+            {'sid': Fraction(1, 2), 'jair': Fraction(1, 2)}
+        )
+        assert distribution.without({'sid'}) is distribution.without({'sid'})
+        assert distribution.without({'sid'}) == {'jair': Fraction(1, 2)}
+
+    def test_invalidate(self):
+        distribution = Distribution(
+            {'sid': Fraction(1, 2), 'jair': Fraction(1, 2)}
+        )
+        distribution.distribute(Decimal(100))
+        distribution.without({'sid'})
+        distribution['sid'] = Fraction(3, 2)
+        distribution.invalidate()
+        assert distribution.distribute(Decimal(100)) == {
+            'sid': Decimal(75),
+            'jair': Decimal(25),
+        }
+        assert distribution.without({'jair'}) == {'sid': Fraction(3, 2)}
+
+
+class TestDistributeMany:
+
+    def test_matches_distribute(self):
+        distribution = Distribution(
+            {
+                'sid': Fraction(1, 4),
+                None: Fraction(1, 12),
+                'ariana': Fraction(2, 3),
+            }
+        )
+        amounts = [Decimal('100'), Decimal('0.01'), Decimal('33.33')]
+        shareholders, rows = distribution.distribute_many(amounts)
+        assert shareholders == ['sid', 'ariana']
+        for amount, row in zip(amounts, rows):
+            assert dict(zip(shareholders, row)) == {
+                shareholder: int(value * 100)
+                for shareholder, value in distribution.distribute(
+                    amount
+                ).items()
+            }
+        assert rows[0] == [2500, 6667]
+
+    def test_amounts_must_be_whole_cents(self):
+        distribution = Distribution({'sid': Fraction(1)})
+        with pytest.raises(ValueError):
+            distribution.distribute_many([Decimal('0.001')])
+
+
+class TestMakeDistribution:
+    def test_few_shareholders(self):
+        distribution = make_distribution({"sid": Fraction(1)})
+        assert type(distribution) is Distribution
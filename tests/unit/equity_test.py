@@ -3,6 +3,7 @@ from fractions import Fraction
 import pytest
 from oldabe.models import Payment, ItemizedPayment, Attribution
 from oldabe.money_in.equity import (
+    attributable_payment_totals,
     calculate_incoming_investment,
     calculate_incoming_attribution,
     dilute_attributions,
@@ -51,6 +52,18 @@ class TestCalculateIncomingInvestment:
         assert result == expected_investment
 
 
+class TestAttributablePaymentTotals:
+    def test_totals_by_payer(self):
+        totals = attributable_payment_totals(
+            [
+                ItemizedPayment('a@b.co', 1, Decimal("9"), True, '0.txt'),
+                ItemizedPayment('c@d.co', 1, Decimal("5"), False, '1.txt'),
+                ItemizedPayment('a@b.co', 0, Decimal("3"), True, '2.txt'),
+            ]
+        )
+        assert totals == {'a@b.co': Decimal("12")}
+
+
 class TestCalculateIncomingAttribution:
     @pytest.mark.parametrize(
         "incoming_investment, expected_attribution",
@@ -155,3 +168,22 @@ class TestHandleInvestment:
             prior_valuation,
         )
         assert valuation == (prior_valuation + 80)
+
+    def test_uses_provided_totals(
+        self,
+        normalized_attributions,
+    ):
+        email = 'dummy@abe.org'
+        payment = Payment(email, email, Decimal('20'))
+        price = Decimal('10')
+        prior_valuation = Decimal('50')
+
+        valuation = handle_investment(
+            payment,
+            [],
+            normalized_attributions,
+            price,
+            prior_valuation,
+            attributable_totals={email: Decimal('25')},
+        )
+        assert valuation == (prior_valuation + 15)
@@ -0,0 +1,114 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+from unittest.mock import patch
+
+import pytest
+
+from oldabe.models import Payment
+from oldabe.money_in.simulation import LedgerSnapshot, simulate
+
+np = pytest.importorskip("numpy")
+
+from oldabe.money_in.forecast import (  # noqa: E402
+    ForecastInputs,
+    forecast,
+    main,
+    random_payments,
+)
+
+ATTRIBUTIONS = {
+    "sid": Fraction(1, 2),
+    "jair": Fraction(3, 10),
+    "ariana": Fraction(1, 5),
+}
+INSTRUMENTS = {"old abe": Fraction(1, 100), "DIA": Fraction(5, 100)}
+
+
+def read_tree(dirname):
+    tree = {}
+    for root, _, filenames in os.walk(dirname):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            with open(path) as f:
+                tree[path] = f.read()
+    return tree
+
+
+def inputs():
+    return ForecastInputs(
+        attributions={e: float(s) for e, s in ATTRIBUTIONS.items()},
+        price=10.0,
+        valuation=100000.0,
+        fee_share=0.06,
+        attributable_totals={},
+    )
+
+
+class TestForecast:
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_agrees_with_money_in(self, mock_git_rev):
+        amounts = [10000, 0, 500, 2000]
+        payers = ["sam", "sam", "jair", "sam"]
+        outcome = simulate(
+            LedgerSnapshot(
+                INSTRUMENTS, ATTRIBUTIONS, Decimal("10"), Decimal("100000")
+            ),
+            [
+                Payment(payer, payer, Decimal(amount), datetime(1987, 6, 30))
+                for payer, amount in zip(payers, amounts)
+                if amount
+            ],
+        )
+        result = forecast(
+            inputs(),
+            ["sam", "jair"],
+            np.array([amounts, amounts], dtype=float),
+            np.array([[0, 0, 1, 0]] * 2),
+        )
+        assert result.contributors == ["sid", "jair", "ariana", "sam"]
+        assert result.valuation == pytest.approx(
+            [float(outcome.valuation)] * 2
+        )
+        for i, email in enumerate(result.contributors):
+            assert result.shares[:, i] == pytest.approx(
+                [float(outcome.attributions[email])] * 2
+            )
+            assert result.earnings[:, i] == pytest.approx(
+                [float(outcome.transactions[email])] * 2, abs=0.05
+            )
+
+    def test_shares_stay_normalized(self):
+        rng = np.random.default_rng(0)
+        amounts, payer_indices = random_payments(rng, 1000, 36, 5)
+        result = forecast(
+            inputs(), [f"payer-{i}" for i in range(5)], amounts, payer_indices
+        )
+        assert result.shares.shape == (1000, 8)
+        assert result.shares.sum(axis=1) == pytest.approx(np.ones(1000))
+        assert (result.valuation >= 100000.0).all()
+        summary = result.percentiles()
+        assert set(summary["shares"]) == set(result.contributors)
+        low, median, high = summary["shares"]["sid"]
+        assert low <= median <= high <= 0.5
+
+
+class TestLoad:
+    def test_read_only(self, fs, capsys):
+        for filename, contents in {
+            "price.txt": "10",
+            "valuation.txt": "100000",
+            "instruments.txt": "old abe,1/100\nDIA,5/100\n",
+            "attributions.txt": "sid,1/2\njair,3/10\nariana,1/5\n",
+            "itemized_payments.txt": (
+                "sam,0.60,9.40,True,0.txt\n" "sam,0.30,4.70,False,1.txt\n"
+            ),
+        }.items():
+            fs.create_file(f"./abe/{filename}", contents=contents)
+        before = read_tree("./abe")
+        assert ForecastInputs.load().attributable_totals == {"sam": 9.40}
+        with patch("sys.argv", ["forecast", "10", "3"]):
+            main()
+        assert "10 trials over 3 months" in capsys.readouterr().out
+        assert read_tree("./abe") == before
@@ -1,10 +1,64 @@
+from datetime import datetime
 from decimal import Decimal
 
-# See integration tests for now.
+from oldabe.models import Payment
+from oldabe.money_in import unprocessed_payments
 
+# See integration tests for the rest, for now.
 
-class TestPlaceholder:
-    def test_something(
-        self,
-    ):
-        assert True
+
+def payment(file, created_at, attributable=True):
+    return Payment(
+        "sam",
+        "Sam",
+        Decimal("100"),
+        datetime.fromisoformat(created_at),
+        attributable,
+        file,
+    )
+
+
+class TestUnprocessedPayments:
+    def test_chronological_across_sources(self):
+        attributable = [
+            payment("3.txt", "1985-10-26 01:26:00"),
+            payment("1.txt", "1985-10-26 01:24:00"),
+        ]
+        non_attributable = [
+            payment("2.txt", "1985-10-26 01:25:00", False),
+        ]
+        payments = unprocessed_payments(
+            set(), [attributable, non_attributable]
+        )
+        assert [p.file for p in payments] == ["1.txt", "2.txt", "3.txt"]
+
+    def test_ties_broken_by_filename(self):
+        attributable = [payment("b.txt", "1985-10-26 01:24:00")]
+        non_attributable = [payment("a.txt", "1985-10-26 01:24:00", False)]
+        payments = unprocessed_payments(
+            set(), [attributable, non_attributable]
+        )
+        assert [p.file for p in payments] == ["a.txt", "b.txt"]
+
+    def test_skips_processed_payments(self):
+        attributable = [
+            payment("1.txt", "1985-10-26 01:24:00"),
+            payment("2.txt", "1985-10-26 01:25:00"),
+        ]
+        payments = unprocessed_payments({"1.txt"}, [attributable])
+        assert [p.file for p in payments] == ["2.txt"]
+
+    def test_reads_payment_files(self, fs):
+        fs.create_file(
+            "./abe/payments/1.txt",
+            contents="sam,Sam,100,1985-10-26 01:25:00\n",
+        )
+        fs.create_file(
+            "./abe/payments/nonattributable/2.txt",
+            contents="sam,Sam,100,1985-10-26 01:24:00\n",
+        )
+        payments = list(unprocessed_payments(set()))
+        assert [(p.file, p.attributable) for p in payments] == [
+            ("2.txt", False),
+            ("1.txt", True),
+        ]
@@ -1,7 +1,14 @@
+import csv
+import io
+import json
+
 from oldabe.money_out import (
+    compile_outstanding_balances,
     prepare_balances_message,
     prepare_debts_message,
+    write_outstanding_balances,
 )
+from oldabe.reports import View
 import pytest
 
 
@@ -43,3 +50,93 @@ class TestPrepareDebtsMessage:
         debts = {}
         result = prepare_debts_message(debts)
         assert result == "There are no outstanding (unpayable) debts."
+
+
+class TestWriteOutstandingBalances:
+    @pytest.fixture
+    def ledger(self, fs):
+        fs.create_file(
+            "./abe/transactions.txt",
+            contents=(
+                "sid,47.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "jair,28.20,1.txt,abcd123,1985-10-26 01:24:00\n"
+            ),
+        )
+        fs.create_file(
+            "./abe/debts.txt",
+            contents="ariana,18.80,1.txt,abcd123,1985-10-26 01:24:00\n",
+        )
+        fs.create_file(
+            "./abe/payouts/1.txt",
+            contents="sid,sid,$40.00,1985-10-26 01:24:00\n",
+        )
+
+    def test_markdown(self, ledger):
+        out = io.StringIO()
+        write_outstanding_balances(out)
+        assert out.getvalue() == compile_outstanding_balances()
+
+    def test_json_lines(self, ledger):
+        out = io.StringIO()
+        write_outstanding_balances(out, output_format="jsonl")
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert records == [
+            {
+                "email": "sid",
+                "owed": "47.00",
+                "paid": "40.00",
+                "balance": "7.00",
+                "debt": "0.00",
+                "advance": "0.00",
+            },
+            {
+                "email": "jair",
+                "owed": "28.20",
+                "paid": "0.00",
+                "balance": "28.20",
+                "debt": "0.00",
+                "advance": "0.00",
+            },
+            {
+                "email": "ariana",
+                "owed": "0.00",
+                "paid": "0.00",
+                "balance": "0.00",
+                "debt": "18.80",
+                "advance": "0.00",
+            },
+        ]
+
+    @pytest.mark.parametrize("output_format", ["jsonl", "csv"])
+    def test_same_with_cents(self, fs, monkeypatch, output_format):
+        fs.create_file(
+            "./abe/transactions.txt",
+            contents=(
+                "sid,47.1,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "sid,0.90,2.txt,abcd123,1985-10-26 01:24:00\n"
+                "jair,28.20,1.txt,abcd123,1985-10-26 01:24:00\n"
+            ),
+        )
+        fs.create_file(
+            "./abe/payouts/1.txt",
+            contents="sid,sid,$40,1985-10-26 01:24:00\n",
+        )
+        outputs = []
+        for arithmetic in ("decimal", "cents"):
+            monkeypatch.setenv("OLDABE_ARITHMETIC", arithmetic)
+            out = io.StringIO()
+            write_outstanding_balances(out, output_format=output_format)
+            outputs.append(out.getvalue())
+        assert outputs[0] == outputs[1]
+        assert "48.00" in outputs[0]
+
+    def test_csv_with_view(self, ledger):
+        out = io.StringIO()
+        write_outstanding_balances(
+            out, view=View(sort="amount", top=2), output_format="csv"
+        )
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert [(row["email"], row["balance"]) for row in rows] == [
+            ("jair", "28.20"),
+            ("sid", "7.00"),
+        ]
@@ -0,0 +1,130 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import time_machine
+
+from oldabe.money_out import compile_accounts
+from oldabe.money_out.payouts import (
+    bulk_payment_batch,
+    plan_payouts,
+    prepare_payouts_message,
+    read_bulk_payment,
+    read_minimum_payout_threshold,
+    record_payouts,
+    write_bulk_payment,
+)
+
+BALANCES = {
+    "sid": Decimal("17.005"),
+    "jair": Decimal("5.00"),
+    "sam": Decimal("4.99"),
+    "ariana": Decimal("18.80"),
+    "nobody": Decimal("-5.00"),
+}
+
+
+class TestReadMinimumPayoutThreshold:
+    @pytest.mark.parametrize(
+        "contents, threshold",
+        [("$5", Decimal("5")), ("12.50\n", Decimal("12.50")), ("", None)],
+    )
+    def test_read(self, fs, contents, threshold):
+        fs.create_file("./abe/minimum-payout-threshold.txt", contents=contents)
+        assert read_minimum_payout_threshold() == (
+            threshold or Decimal("0.01")
+        )
+
+    def test_missing(self, fs):
+        assert read_minimum_payout_threshold() == Decimal("0.01")
+
+
+class TestPlanPayouts:
+    def test_plan(self):
+        plan = plan_payouts(BALANCES, Decimal("5"), ["ariana"])
+        assert [(p.email, p.amount) for p in plan.payouts] == [
+            ("sid", Decimal("17.00")),
+            ("jair", Decimal("5.00")),
+        ]
+        assert plan.held == {"sam": Decimal("4.99")}
+        assert plan.total == Decimal("22.00")
+        # a batch is created at once
+        assert len({p.created_at for p in plan.payouts}) == 1
+
+    def test_nothing_to_pay(self):
+        plan = plan_payouts(BALANCES, Decimal("20"))
+        assert plan.payouts == []
+        assert prepare_payouts_message(plan, Decimal("20")) == (
+            "There are no balances of at least 20.00 to pay."
+        )
+
+    def test_message(self):
+        plan = plan_payouts(BALANCES, Decimal("5"), ["ariana"])
+        message = prepare_payouts_message(plan, Decimal("5"))
+        assert "sid | 17.00" in message
+        assert "**Total** = 22.00" in message
+        assert "Held until they reach the threshold: 1" in message
+
+
+class TestWritePlan:
+    @time_machine.travel(datetime(1985, 10, 26, 1, 24), tick=False)
+    def test_recorded_payouts_are_paid(self, fs):
+        fs.create_file(
+            "./abe/transactions.txt",
+            contents=(
+                "sid,47.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "jair,2.20,1.txt,abcd123,1985-10-26 01:24:00\n"
+            ),
+        )
+        fs.create_file(
+            "./abe/payouts/1.txt",
+            contents="sid,sid,$40.00,1985-10-26 01:24:00\n",
+        )
+        plan = plan_payouts(compile_accounts().balances(), Decimal("5"))
+        write_bulk_payment(plan, "bulk.csv")
+        with open("bulk.csv", newline="") as f:
+            assert f.read() == "sid,7.00,USD\r\n"
+        # owed to sid since the bulk payment was made
+        with open("./abe/transactions.txt", "a") as f:
+            f.write("sid,3.00,2.txt,abcd123,1985-10-26 01:24:00\n")
+        batch = bulk_payment_batch("bulk.csv")
+        assert batch == "dd4867b855bd8a89"
+        record_payouts(read_bulk_payment("bulk.csv"), batch)
+        assert sorted(os.listdir("./abe/payouts")) == [
+            "1.txt",
+            "payout-dd4867b855bd8a89-1.txt",
+        ]
+        with open("./abe/payouts/payout-dd4867b855bd8a89-1.txt") as f:
+            assert f.read() == ",sid,7.00,1985-10-26 01:24:00\n"
+        assert compile_accounts().balances() == {
+            "sid": Decimal("3.00"),
+            "jair": Decimal("2.20"),
+        }
+
+    @time_machine.travel(datetime(1985, 10, 26, 1, 24), tick=False)
+    def test_batches_in_the_same_second(self, fs):
+        fs.create_file("first.csv", contents="sid,7.00,USD\r\n")
+        fs.create_file("second.csv", contents="jair,5.00,USD\r\n")
+        for filename in ("first.csv", "second.csv"):
+            record_payouts(
+                read_bulk_payment(filename), bulk_payment_batch(filename)
+            )
+        assert len(os.listdir("./abe/payouts")) == 2
+        assert compile_accounts().balances() == {
+            "sid": Decimal("-7.00"),
+            "jair": Decimal("-5.00"),
+        }
+
+    def test_recorded_twice(self, fs):
+        fs.create_file("bulk.csv", contents="sid,7.00,USD\r\n")
+        batch = bulk_payment_batch("bulk.csv")
+        record_payouts(read_bulk_payment("bulk.csv"), batch)
+        with pytest.raises(ValueError):
+            record_payouts(read_bulk_payment("bulk.csv"), batch)
+        assert len(os.listdir("./abe/payouts")) == 1
+
+    def test_other_currency(self, fs):
+        fs.create_file("bulk.csv", contents="sid,7.00,EUR\r\n")
+        with pytest.raises(ValueError):
+            read_bulk_payment("bulk.csv")
@@ -0,0 +1,59 @@
+from oldabe.money_in.processed import ProcessedPayments
+
+TRANSACTION = "sid,47.00,{},abcd123,1985-10-26 01:24:00\n"
+ITEMIZED_PAYMENT = "sam,6.00,94.00,True,{}\n"
+
+
+class TestProcessedPayments:
+
+    def test_rebuilds_from_ledger(self, fs):
+        fs.create_file(
+            "./abe/transactions.txt", contents=TRANSACTION.format("1.txt")
+        )
+        fs.create_file(
+            "./abe/itemized_payments.txt",
+            contents=ITEMIZED_PAYMENT.format("2.txt"),
+        )
+        processed = ProcessedPayments.load()
+        assert processed.rebuilt
+        assert "1.txt" in processed
+        assert "2.txt" in processed
+        assert "3.txt" not in processed
+
+    def test_reads_index_in_sync_with_ledger(self, fs):
+        fs.create_file(
+            "./abe/transactions.txt", contents=TRANSACTION.format("1.txt")
+        )
+        ProcessedPayments.load().save()
+        with open("./abe/transactions.txt", "a") as f:
+            f.write(TRANSACTION.format("2.txt"))
+        processed = ProcessedPayments.load()
+        processed.add("2.txt")
+        processed.save()
+
+        processed = ProcessedPayments.load()
+        assert not processed.rebuilt
+        assert "1.txt" in processed
+        assert "2.txt" in processed
+
+    def test_rebuilds_index_out_of_sync_with_ledger(self, fs):
+        fs.create_file(
+            "./abe/transactions.txt", contents=TRANSACTION.format("1.txt")
+        )
+        ProcessedPayments.load().save()
+        with open("./abe/transactions.txt", "w") as f:
+            f.write(TRANSACTION.format("2.txt"))
+        processed = ProcessedPayments.load()
+        assert processed.rebuilt
+        assert "1.txt" not in processed
+        assert "2.txt" in processed
+
+    def test_save_appends_new_payments(self, fs):
+        fs.create_dir("./abe")
+        processed = ProcessedPayments.load()
+        processed.add("1.txt")
+        processed.save()
+        processed.add("2.txt")
+        processed.save()
+        with open("./abe/processed_payments.txt") as f:
+            assert [line.split(",")[0] for line in f] == ["1.txt", "2.txt"]
@@ -0,0 +1,129 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+import time_machine
+
+from oldabe.constants import PROCESSED_PAYMENTS_FILE
+from oldabe.money_in import process_payments_and_record_updates
+from oldabe.money_in.processed import ProcessedPayments
+from oldabe.money_in.replay import (
+    CHECKPOINTS_DIR,
+    LEDGER_FILES,
+    Seed,
+    replay,
+)
+
+PAYMENTS = [
+    ("payments/1.txt", "sam,036eaf6,100,1987-06-30 06:25:00"),
+    ("payments/nonattributable/2.txt", "sid,sid,20,1987-07-01 06:25:00"),
+    ("payments/3.txt", "sam,036eaf6,10000,1987-07-02 06:25:00"),
+    ("payments/4.txt", "jair,jair,50,1987-07-03 06:25:00"),
+    ("payments/5.txt", "sam,036eaf6,30,1987-07-04 06:25:00"),
+    # only the attributable payment counts toward jay's investment
+    ("payments/nonattributable/6.txt", "jay,jay,6,1987-07-05 06:25:00"),
+    ("payments/7.txt", "jay,jay,8,1987-07-06 06:25:00"),
+]
+# the processed payments index is fingerprinted whenever it is written,
+# which is less often in a replay
+OUTPUTS = [
+    *(f for f in LEDGER_FILES if f != PROCESSED_PAYMENTS_FILE),
+    "./abe/attributions.txt",
+    "./abe/valuation.txt",
+]
+
+
+def read_outputs():
+    outputs = {}
+    for filename in OUTPUTS:
+        with open(filename) as f:
+            outputs[filename] = f.read()
+    return outputs
+
+
+@pytest.fixture
+def ledger(fs):
+    with time_machine.travel(datetime(1985, 10, 26, 1, 24), tick=False):
+        with patch(
+            'oldabe.models.default_commit_hash', return_value='abcd123'
+        ):
+            yield write_ledger(fs)
+
+
+def write_ledger(fs):
+    fs.create_file("./abe/price.txt", contents="10")
+    fs.create_file(
+        "./abe/instruments.txt", contents=("old abe,1/100\n" "DIA,5/100\n")
+    )
+    fs.create_file("./abe/unpayable_contributors.txt", contents="ariana")
+    for filename, valuation in (("./abe", "100000"), ("./seed", "100000")):
+        fs.create_file(f"{filename}/valuation.txt", contents=valuation)
+        fs.create_file(
+            f"{filename}/attributions.txt",
+            contents=("sid,1/2\n" "jair,3/10\n" "ariana,1/5\n"),
+        )
+    # the ledger as written by money_in, with a run for each payment
+    history = []
+    for filename, contents in PAYMENTS:
+        fs.create_file(f"./abe/{filename}", contents=contents)
+        process_payments_and_record_updates()
+        history.append(read_outputs())
+    return history
+
+
+class TestReplay:
+    def test_same_as_money_in(self, ledger):
+        for filename in LEDGER_FILES:
+            os.remove(filename)
+        state = replay(Seed.read("./seed"), every=2)
+        assert state.payments == 7
+        assert read_outputs() == ledger[-1]
+        processed = ProcessedPayments.load()
+        assert not processed.rebuilt
+        assert list(processed.payment_files) == [
+            "1.txt",
+            "2.txt",
+            "3.txt",
+            "4.txt",
+            "5.txt",
+            "6.txt",
+            "7.txt",
+        ]
+
+    def test_checkpoints(self, ledger):
+        replay(Seed.read("./seed"), every=2)
+        assert sorted(os.listdir(CHECKPOINTS_DIR)) == [
+            "0000000002.json",
+            "0000000004.json",
+            "0000000006.json",
+        ]
+
+    def test_until(self, ledger):
+        seed = Seed.read("./seed")
+        replay(seed, every=2)
+        for payments in (1, 3, 4, 2, 7, 6):
+            state = replay(seed, every=2, until=payments)
+            assert state.payments == payments
+            assert read_outputs() == ledger[payments - 1]
+
+    def test_resumes_from_checkpoint(self, ledger):
+        seed = Seed.read("./seed")
+        replay(seed, every=2)
+        with patch(
+            "oldabe.money_in.replay.process_payments",
+            side_effect=lambda *args: Decimal("0"),
+        ) as process:
+            replay(seed, every=2, until=4)
+        process.assert_not_called()
+
+    def test_ignores_checkpoints_from_another_seed(self, ledger):
+        replay(Seed.read("./seed"), every=2)
+        seed = Seed.read("./seed")
+        seed.valuation = Decimal("50000")
+        state = replay(seed, every=2, until=4)
+        assert state.payments == 4
+        assert read_outputs()["./abe/valuation.txt"] != (
+            ledger[3]["./abe/valuation.txt"]
+        )
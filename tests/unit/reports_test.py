@@ -0,0 +1,161 @@
+import io
+from decimal import Decimal
+
+import pytest
+
+from oldabe.money_out import (
+    prepare_advances_message,
+    prepare_balances_message,
+    write_balances,
+)
+from oldabe.reports import (
+    ReportWriter,
+    View,
+    render,
+    write_csv,
+    write_json_lines,
+    write_table,
+)
+
+ROWS = [
+    ("sid", Decimal("47.00")),
+    ("jair", Decimal("28.20")),
+    ("ariana", Decimal("18.80")),
+    ("sam", Decimal("3.50")),
+    ("jay", Decimal("28.20")),
+]
+
+
+def _table(view):
+    return render(
+        write_table, "| Name | Amount |", "| -- | -- |", ROWS, str, view
+    ).split("\r\n")
+
+
+class TestReportWriter:
+    def test_blank_lines(self):
+        out = io.StringIO()
+        writer = ReportWriter(out)
+        writer.lines(["", "  ", "one  ", "", "", "  two", "", ""])
+        assert out.getvalue() == "one\r\n\r\n\r\ntwo"
+
+    def test_nothing_written(self):
+        assert render(lambda writer: writer.line()) == ""
+
+
+class TestView:
+    @pytest.mark.parametrize(
+        "view, names",
+        [
+            (View(), ["sid", "jair", "ariana", "sam", "jay"]),
+            (View(sort="name"), ["ariana", "jair", "jay", "sam", "sid"]),
+            (View(sort="amount"), ["sid", "jair", "jay", "ariana", "sam"]),
+            (View(sort="amount", top=3), ["sid", "jair", "jay"]),
+            (View(top=2), ["sid", "jair"]),
+            (View(page=2, page_size=2), ["ariana", "sam"]),
+            (View(sort="name", page=3, page_size=2), ["sid"]),
+            (View(top=3, page=2, page_size=2), ["ariana"]),
+            (View(page=4, page_size=2), []),
+        ],
+    )
+    def test_select(self, view, names):
+        assert [name for name, _ in view.select(ROWS)] == names
+
+    def test_table_order(self):
+        order = (lambda row: row[1], True)
+        assert [name for name, _ in View(top=2).select(ROWS, order)] == [
+            "sid",
+            "jair",
+        ]
+        # an explicit sort overrides the table's order
+        assert [
+            name for name, _ in View(sort="name", top=1).select(ROWS, order)
+        ] == ["ariana"]
+
+
+class TestWriteTable:
+    def test_all_rows(self):
+        assert _table(View())[2:] == [
+            "sid | 47.00",
+            "jair | 28.20",
+            "ariana | 18.80",
+            "sam | 3.50",
+            "jay | 28.20",
+        ]
+
+    def test_some_rows(self):
+        assert _table(View(page=2, page_size=2))[2:] == [
+            "ariana | 18.80",
+            "sam | 3.50",
+            "",
+            "Showing 3-4 of 5 rows.",
+        ]
+
+    def test_no_rows(self):
+        assert _table(View(page=4, page_size=2))[2:] == [
+            "",
+            "Showing none of 5 rows.",
+        ]
+
+
+class TestMessages:
+    def test_balances_message(self):
+        balances = {"sid": Decimal("47"), "ariana": Decimal("-1.20")}
+        assert prepare_balances_message(balances) == (
+            "The current outstanding (payable) balances are:\r\n"
+            "\r\n"
+            "| Name | Balance |\r\n"
+            "| ---- | --- |\r\n"
+            "sid | 47.00\r\n"
+            "\r\n"
+            "\r\n"
+            "**Total** = 45.80"
+        )
+
+    def test_advances_message(self):
+        assert prepare_advances_message({"sid": Decimal("3.5")}) == (
+            "The current advances are:\r\n"
+            "\r\n"
+            "| Name | Advance |\r\n"
+            "| ---- | ------- |\r\n"
+            "sid | 3.50\r\n"
+            "\r\n"
+            "\r\n"
+            "**Total** = 3.50"
+        )
+
+    def test_streamed_with_view(self):
+        out = io.StringIO()
+        write_balances(
+            ReportWriter(out), dict(ROWS), View(sort="amount", top=1)
+        )
+        assert out.getvalue().split("\r\n")[4:8] == [
+            "sid | 47.00",
+            "",
+            "Showing 1-1 of 5 rows.",
+            "",
+        ]
+        # the total is of all the balances
+        assert out.getvalue().endswith("**Total** = 125.70")
+
+
+class TestRecords:
+    RECORDS = [
+        {"email": "sid", "amount": Decimal("0.1000")},
+        {"email": "jair, jr", "amount": Decimal("-28.2")},
+    ]
+
+    def test_json_lines(self):
+        out = io.StringIO()
+        write_json_lines(out, self.RECORDS)
+        assert out.getvalue() == (
+            '{"email": "sid", "amount": "0.1000"}\n'
+            '{"email": "jair, jr", "amount": "-28.2"}\n'
+        )
+
+    def test_csv(self):
+        out = io.StringIO()
+        write_csv(out, ["email", "amount"], self.RECORDS)
+        assert out.getvalue() == (
+            "email,amount\r\n" "sid,0.1000\r\n" '"jair, jr",-28.2\r\n'
+        )
@@ -1,4 +1,9 @@
-from oldabe.repos import FileRepo
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from oldabe.repos import DirRepo, FileRepo
 from decimal import Decimal
 from dataclasses import dataclass, field
 
@@ -24,3 +29,93 @@ class TestFileRepo:
     def test_missing_field(self, fs):
         fs.create_file("testmodels.txt", contents="blah,42")
         assert list(TestModelRepo()) == [TestModel("blah", 42)]
+
+    def test_reads_lazily(self, fs):
+        fs.create_file("testmodels.txt", contents="blah,42\nblah,oops\n")
+        assert next(iter(TestModelRepo())) == TestModel("blah", 42)
+
+    def test_missing_file(self, fs):
+        assert TestModelRepo().load() == []
+
+    def test_load(self, fs):
+        fs.create_file("testmodels.txt", contents="blah,42\nbleh,43\n")
+        assert TestModelRepo().load() == [
+            TestModel("blah", 42),
+            TestModel("bleh", 43),
+        ]
+
+    def test_read_from(self, fs):
+        fs.create_file("testmodels.txt", contents="blah,42\nbleh,43\nbloh,44")
+        objs = list(TestModelRepo().read_from())
+        assert objs == [
+            (TestModel("blah", 42), 8),
+            (TestModel("bleh", 43), 16),
+            (TestModel("bloh", 44), None),
+        ]
+        assert list(TestModelRepo().read_from(8))[0] == (
+            TestModel("bleh", 43),
+            16,
+        )
+
+
+class TestModelDirRepo(DirRepo):
+    dirname = "testmodels"
+    Model = TestModel
+    manifest_file = "cache/testmodels.json"
+
+
+class TestDirRepo:
+
+    def test_reads_files(self, fs):
+        fs.create_file("testmodels/1.txt", contents="blah,42")
+        fs.create_file("testmodels/2.txt", contents="bleh,43")
+        fs.create_dir("testmodels/subdir")
+        assert sorted(
+            (obj.field1, obj.file) for obj in TestModelDirRepo()
+        ) == [("blah", "1.txt"), ("bleh", "2.txt")]
+
+    def test_missing_dir(self, fs):
+        assert TestModelDirRepo().load() == []
+
+    def test_unchanged_files_are_read_from_manifest(self, fs):
+        fs.create_file("testmodels/1.txt", contents="blah,42")
+        TestModelDirRepo().load()
+        stat = os.stat("testmodels/1.txt")
+        with open("testmodels/1.txt", "w") as f:
+            f.write("bleh,43")
+        os.utime("testmodels/1.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        # same size and modification time, so it isn't read again
+        assert [obj.field1 for obj in TestModelDirRepo()] == ["blah"]
+
+    def test_changed_files_are_read_again(self, fs):
+        fs.create_file("testmodels/1.txt", contents="blah,42")
+        TestModelDirRepo().load()
+        with open("testmodels/1.txt", "w") as f:
+            f.write("blah,420")
+        assert [obj.field2 for obj in TestModelDirRepo()] == [420]
+
+    def test_removed_files_are_dropped_from_manifest(self, fs):
+        fs.create_file("testmodels/1.txt", contents="blah,42")
+        fs.create_file("testmodels/2.txt", contents="bleh,43")
+        TestModelDirRepo().load()
+        os.remove("testmodels/1.txt")
+        assert [obj.file for obj in TestModelDirRepo()] == ["2.txt"]
+        with open("cache/testmodels.json") as f:
+            assert list(json.load(f)) == ["2.txt"]
+
+    def test_reads_files_on_executor(self, fs):
+        fs.create_file("testmodels/1.txt", contents="blah,42")
+        TestModelDirRepo().load()
+        fs.create_file("testmodels/2.txt", contents="bleh,43")
+        with patch.object(
+            TestModelDirRepo, "_read_row", wraps=DirRepo._read_row
+        ) as read_row:
+            with ThreadPoolExecutor(2) as executor:
+                objs = TestModelDirRepo(executor=executor).load()
+        # only the new file is read, the other is in the manifest
+        read_row.assert_called_once_with("testmodels/2.txt")
+        assert sorted((obj.field1, obj.field2) for obj in objs) == [
+            ("blah", 42),
+            ("bleh", 43),
+        ]
+        assert objs == TestModelDirRepo().load()
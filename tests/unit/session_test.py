@@ -0,0 +1,84 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from oldabe.models import Debt, ItemizedPayment
+from oldabe.money_in.session import LedgerSession
+
+
+class TestLedgerSession:
+
+    def test_loads_ledger(self, fs):
+        fs.create_file(
+            "./abe/debts.txt",
+            contents="ariana,18.80,1.txt,abcd123,1985-10-26 01:24:00\n",
+        )
+        fs.create_file("./abe/unpayable_contributors.txt", contents="ariana")
+        session = LedgerSession.load()
+        assert session.unpayable_contributors == {"ariana"}
+        assert [(d.email, d.amount) for d in session.debts] == [
+            ("ariana", Decimal("18.80"))
+        ]
+        assert session.advances == []
+        assert session.attributable_totals == {}
+
+    def test_new_records_are_not_written_until_flushed(self, fs):
+        fs.create_dir("./abe")
+        session = LedgerSession()
+        session.record(
+            [Debt("ariana", Decimal("18.80"), "1.txt", "abcd123")], [], []
+        )
+        session.record_itemized_payment(
+            ItemizedPayment(
+                "sam", Decimal("6.00"), Decimal("94.00"), True, "1.txt"
+            )
+        )
+        assert not fs.exists("./abe/debts.txt")
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_flush(self, mock_git_rev, fs):
+        fs.create_dir("./abe")
+        session = LedgerSession()
+        session.record([Debt("ariana", Decimal("18.80"), "1.txt")], [], [])
+        session.flush()
+        with open("./abe/debts.txt") as f:
+            assert f.read().startswith("ariana,18.80,1.txt,abcd123,")
+        with open("./abe/transactions.txt") as f:
+            assert f.read() == ""
+
+    def test_attributable_totals(self, fs):
+        fs.create_file(
+            "./abe/itemized_payments.txt",
+            contents=("sam,6.00,94.00,True,0.txt\n" "sid,0,50,True,1.txt\n"),
+        )
+        session = LedgerSession.load()
+        assert session.attributable_totals == {
+            "sam": Decimal("94.00"),
+            "sid": Decimal("50"),
+        }
+        session.record_itemized_payment(
+            ItemizedPayment("sam", Decimal("0"), Decimal("6"), True, "3.txt")
+        )
+        session.record_itemized_payment(
+            ItemizedPayment("sid", Decimal("0"), Decimal("6"), False, "4.txt")
+        )
+        assert session.attributable_totals == {
+            "sam": Decimal("100.00"),
+            "sid": Decimal("50"),
+        }
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_attributable_totals_carry_over_to_next_run(
+        self, mock_git_rev, fs
+    ):
+        fs.create_file(
+            "./abe/itemized_payments.txt",
+            contents="sam,6.00,94.00,True,0.txt\n",
+        )
+        session = LedgerSession.load()
+        session.record_itemized_payment(
+            ItemizedPayment("sam", Decimal("0"), Decimal("6"), True, "1.txt")
+        )
+        session.flush()
+        assert LedgerSession.load().attributable_totals == {
+            "sam": Decimal("100.00")
+        }
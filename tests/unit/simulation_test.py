@@ -0,0 +1,141 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+from fractions import Fraction
+from unittest.mock import patch
+
+from oldabe.models import Debt, Payment
+from oldabe.money_in.simulation import (
+    LedgerSnapshot,
+    simulate,
+    simulate_scenarios,
+)
+
+
+def snapshot(**kwargs):
+    return LedgerSnapshot(
+        instruments={"old abe": Fraction(1, 100), "DIA": Fraction(5, 100)},
+        attributions={
+            "sid": Fraction(1, 2),
+            "jair": Fraction(3, 10),
+            "ariana": Fraction(1, 5),
+        },
+        price=Decimal("10"),
+        valuation=Decimal("100000"),
+        **kwargs,
+    )
+
+
+def payment(amount, file="1.txt", attributable=True):
+    return Payment(
+        "sam",
+        "036eaf6",
+        Decimal(amount),
+        datetime(1987, 6, 30, 6, 25),
+        attributable,
+        file,
+    )
+
+
+class TestSimulate:
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_transactions(self, mock_git_rev):
+        outcome = simulate(snapshot(), [payment(100)])
+        assert outcome.transactions == {
+            "old abe": Decimal("1.00"),
+            "DIA": Decimal("5.00"),
+            "sid": Decimal("47.00"),
+            "jair": Decimal("28.20"),
+            "ariana": Decimal("18.80"),
+        }
+        assert outcome.debts == {}
+        assert outcome.advances == {}
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_dilutes_attributions(self, mock_git_rev):
+        outcome = simulate(snapshot(), [payment(10000)])
+        assert outcome.attributions == {
+            "sid": Fraction(5000, 10939),
+            "jair": Fraction(3000, 10939),
+            "ariana": Fraction(2000, 10939),
+            "sam": Fraction(939, 10939),
+        }
+        assert outcome.valuation > Decimal("100000")
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_debts(self, mock_git_rev):
+        ledger = snapshot(
+            unpayable_contributors={"ariana"},
+            debts=[Debt("jair", Decimal("10"), "0.txt")],
+        )
+        outcome = simulate(ledger, [payment(100)])
+        # the debt is paid first, and ariana's share is advanced to the rest
+        assert outcome.transactions["jair"] == Decimal("41.50")
+        assert outcome.debts == {"ariana": Decimal("16.80")}
+        assert outcome.advances == {
+            "sid": Decimal("10.50"),
+            "jair": Decimal("6.30"),
+        }
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_leaves_inputs_unchanged(self, mock_git_rev):
+        ledger = snapshot(debts=[Debt("jair", Decimal("10"), "0.txt")])
+        payments = [payment(10000)]
+        simulate(ledger, payments)
+        assert payments[0].amount == Decimal("10000")
+        assert ledger.attributions["sid"] == Fraction(1, 2)
+        assert ledger.valuation == Decimal("100000")
+        assert [d.amount for d in ledger.debts] == [Decimal("10")]
+        assert ledger.attributable_totals == {}
+        # so that the same scenario gives the same outcome again
+        assert simulate(ledger, payments) == simulate(ledger, payments)
+
+
+class TestSimulateScenarios:
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_across_processes(self, mock_git_rev):
+        scenarios = [
+            [payment(amount, f"{i}.txt") for i in range(3)]
+            for amount in (100, 1000, 10000)
+        ]
+        outcomes = simulate_scenarios(snapshot(), scenarios)
+        assert len(outcomes) == 3
+        assert simulate_scenarios(snapshot(), scenarios, processes=2) == (
+            outcomes
+        )
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_load(self, mock_git_rev, fs):
+        fs.create_file("./abe/price.txt", contents="10")
+        fs.create_file("./abe/valuation.txt", contents="100000")
+        fs.create_file(
+            "./abe/instruments.txt",
+            contents=("old abe,1/100\n" "DIA,5/100\n"),
+        )
+        fs.create_file(
+            "./abe/attributions.txt",
+            contents=("sid,1/2\n" "jair,3/10\n" "ariana,1/5\n"),
+        )
+        fs.create_file(
+            "./abe/debts.txt",
+            contents=(
+                "ariana,18.80,0.txt,abcd123,1985-10-26 01:24:00\n"
+                "ariana,-18.80,1.txt,abcd123,1985-10-26 01:24:00\n"
+            ),
+        )
+        fs.create_file(
+            "./abe/itemized_payments.txt",
+            contents=(
+                "sam,0.60,9.40,True,0.txt\n" "sam,0.30,4.70,False,1.txt\n"
+            ),
+        )
+        ledger = LedgerSnapshot.load()
+        assert ledger.attributable_totals == {"sam": Decimal("9.40")}
+        # nothing is written to disk, not even to the cache
+        assert not os.path.exists("./abe/.cache")
+        assert simulate_scenarios(ledger, [[payment(100)]]) == [
+            simulate(
+                snapshot(attributable_totals=ledger.attributable_totals),
+                [payment(100)],
+            )
+        ]
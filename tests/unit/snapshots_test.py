@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from oldabe.repos import TransactionsRepo
+from oldabe.snapshots import read_snapshot, tally_ledger
+
+SNAPSHOT_FILE = "./abe/.cache/owed.json"
+TRANSACTION = "{},{},1.txt,abcd123,1985-10-26 01:24:00\r\n"
+
+
+def _tally():
+    return tally_ledger(
+        TransactionsRepo(), lambda t: (t.email, t.amount), SNAPSHOT_FILE
+    )
+
+
+def _append(*rows):
+    with open("./abe/transactions.txt", "a", newline="") as f:
+        for email, amount in rows:
+            f.write(TRANSACTION.format(email, amount))
+
+
+class TestTallyLedger:
+
+    def test_missing_ledger(self, fs):
+        fs.create_dir("./abe")
+        assert _tally() == {}
+
+    def test_tallies_whole_ledger(self, fs):
+        fs.create_dir("./abe")
+        _append(("sid", "47.00"), ("jair", "28.20"), ("sid", "1.00"))
+        assert _tally() == {
+            "sid": Decimal("48.00"),
+            "jair": Decimal("28.20"),
+        }
+        snapshot = read_snapshot(SNAPSHOT_FILE)
+        assert snapshot.rows == 3
+
+    def test_reads_appended_rows_only(self, fs):
+        fs.create_dir("./abe")
+        _append(("sid", "47.00"))
+        _tally()
+        _append(("jair", "28.20"), ("sid", "1.00"))
+        assert _tally() == {
+            "sid": Decimal("48.00"),
+            "jair": Decimal("28.20"),
+        }
+        snapshot = read_snapshot(SNAPSHOT_FILE)
+        assert snapshot.rows == 3
+        assert list(snapshot.tally) == ["sid", "jair"]
+
+    def test_rewritten_ledger_invalidates_snapshot(self, fs):
+        fs.create_dir("./abe")
+        _append(("sid", "47.00"), ("jair", "28.20"))
+        _tally()
+        with open("./abe/transactions.txt", "w") as f:
+            f.write(TRANSACTION.format("sid", "47.00"))
+        _append(("ariana", "18.80"))
+        assert _tally() == {
+            "sid": Decimal("47.00"),
+            "ariana": Decimal("18.80"),
+        }
+
+    def test_incomplete_row_is_not_snapshotted(self, fs):
+        fs.create_dir("./abe")
+        _append(("sid", "47.00"))
+        with open("./abe/transactions.txt", "a") as f:
+            f.write("jair,28.20,1.txt,abcd123,1985-10-26 01:24:00")
+        assert _tally() == {
+            "sid": Decimal("47.00"),
+            "jair": Decimal("28.20"),
+        }
+        with open("./abe/transactions.txt", "a") as f:
+            f.write("\n")
+        assert _tally() == {
+            "sid": Decimal("47.00"),
+            "jair": Decimal("28.20"),
+        }
+        assert read_snapshot(SNAPSHOT_FILE).rows == 2
+
+    def test_same_length_edit_in_the_middle(self, fs):
+        fs.create_dir("./abe")
+        _append(*((f"contributor-{i}", "2.54") for i in range(200)))
+        assert _tally()["contributor-100"] == Decimal("2.54")
+        with open("./abe/transactions.txt", "r+", newline="") as f:
+            contents = f.read()
+            f.seek(0)
+            f.write(
+                contents.replace(
+                    "contributor-100,2.54", "contributor-100,9.54"
+                )
+            )
+        tally = _tally()
+        assert tally["contributor-100"] == Decimal("9.54")
+        assert sum(tally.values()) == Decimal("515.00")
@@ -0,0 +1,176 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+import time_machine
+
+from oldabe.models import Debt
+from oldabe.money_in import process_payments_and_record_updates
+from oldabe.repos import (
+    AttributablePaymentsRepo,
+    DebtsRepo,
+    ItemizedPaymentsRepo,
+    SqliteStore,
+    TransactionsRepo,
+)
+from oldabe.sqlite import export_ledger, import_ledger
+
+LEDGER = {
+    "abe/price.txt": "10",
+    "abe/valuation.txt": "100000",
+    "abe/instruments.txt": "old abe,1/100\nDIA,5/100\n",
+    "abe/attributions.txt": "sid,1/2\njair,3/10\nariana,1/5\n",
+    "abe/unpayable_contributors.txt": "ariana\n",
+    "abe/transactions.txt": (
+        "sid,12.92000,0.txt,cd7eb5b,2023-04-28 02:16:32.543240\n"
+    ),
+    "abe/debts.txt": "ariana,18.80,0.txt,abcd123,1985-10-26 01:24:00\n",
+    "abe/payments/0.txt": "sam,036eaf6,$20.00,1987-06-30 06:25:00\n",
+    "abe/payments/1.txt": "sam,036eaf6,100,1987-06-30 06:25:00\n",
+}
+
+
+def _create_ledger(root):
+    for filename, contents in LEDGER.items():
+        path = os.path.join(root, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(contents)
+
+
+def _read(root, filename):
+    with open(os.path.join(root, filename)) as f:
+        return f.read()
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    _create_ledger(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def sqlite_storage(ledger, monkeypatch):
+    monkeypatch.setenv("OLDABE_STORAGE", "sqlite")
+    return ledger
+
+
+class TestSqliteStore:
+
+    def test_rows_are_read_in_order(self, tmp_path):
+        store = SqliteStore(str(tmp_path / "ledger.sqlite3"))
+        store.insert("t", ["a", "b"], [["1", "2"], ["3"]])
+        store.insert("t", ["a", "b"], [[Decimal("4.00"), None]])
+        assert list(store.rows("t", ["a", "b"])) == [
+            ["1", "2"],
+            ["3"],
+            ["4.00"],
+        ]
+
+    def test_replace(self, tmp_path):
+        store = SqliteStore(str(tmp_path / "ledger.sqlite3"))
+        store.insert("t", ["a"], [["1"]])
+        store.insert("t", ["a"], [["2"]], replace=True)
+        assert list(store.rows("t", ["a"])) == [["2"]]
+
+
+class TestSqliteRepos:
+
+    def test_file_repo(self, sqlite_storage):
+        import_ledger(SqliteStore("abe/ledger.sqlite3"))
+        debt = Debt("sid", Decimal("-18.80"), "1.txt", "abcd123")
+        DebtsRepo().extend([debt])
+        assert [(d.email, d.amount) for d in DebtsRepo()] == [
+            ("ariana", Decimal("18.80")),
+            ("sid", Decimal("-18.80")),
+        ]
+        # the ledger file itself is untouched
+        assert (
+            _read(sqlite_storage, "abe/debts.txt") == LEDGER["abe/debts.txt"]
+        )
+
+    def test_payments_are_read_from_their_dir(self, sqlite_storage):
+        import_ledger(SqliteStore("abe/ledger.sqlite3"))
+        with open("abe/payments/2.txt", "w") as f:
+            f.write("sam,036eaf6,30,1987-06-30 06:25:00\n")
+        assert sorted(
+            (p.file, p.amount, p.attributable)
+            for p in AttributablePaymentsRepo()
+        ) == [
+            ("0.txt", Decimal("20.00"), True),
+            ("1.txt", Decimal(100), True),
+            ("2.txt", Decimal(30), True),
+        ]
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_new_payments_are_processed(self, mock_git_rev, sqlite_storage):
+        import_ledger(SqliteStore("abe/ledger.sqlite3"))
+        process_payments_and_record_updates()
+        with open("abe/payments/2.txt", "w") as f:
+            f.write("sam,036eaf6,30,1987-06-30 06:25:00\n")
+        process_payments_and_record_updates()
+        assert "2.txt" in {t.payment_file for t in TransactionsRepo()}
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_import_again(self, mock_git_rev, sqlite_storage):
+        store = SqliteStore("abe/ledger.sqlite3")
+        import_ledger(store)
+        process_payments_and_record_updates()
+        processed = [p.payment_file for p in ItemizedPaymentsRepo()]
+        assert processed == ["1.txt"]
+        # discards the payments processed since the ledger was imported
+        import_ledger(store)
+        assert list(ItemizedPaymentsRepo()) == []
+        process_payments_and_record_updates()
+        assert [p.payment_file for p in ItemizedPaymentsRepo()] == processed
+        assert {t.payment_file for t in TransactionsRepo()} == {
+            "0.txt",
+            "1.txt",
+        }
+
+
+class TestImportExport:
+
+    def test_round_trip(self, ledger, tmp_path_factory, monkeypatch):
+        store = SqliteStore(str(ledger / "abe/ledger.sqlite3"))
+        import_ledger(store)
+        exported = tmp_path_factory.mktemp("exported")
+        monkeypatch.chdir(exported)
+        export_ledger(store)
+        for filename in [
+            "abe/transactions.txt",
+            "abe/debts.txt",
+        ]:
+            assert _read(exported, filename).replace("$", "") == LEDGER[
+                filename
+            ].replace("$", "")
+
+    @time_machine.travel(datetime(1985, 10, 26, 1, 24), tick=False)
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_same_ledger_as_csv_storage(
+        self, mock_git_rev, ledger, tmp_path_factory, monkeypatch
+    ):
+        csv_root = tmp_path_factory.mktemp("csv")
+        _create_ledger(csv_root)
+        monkeypatch.chdir(csv_root)
+        process_payments_and_record_updates()
+
+        monkeypatch.chdir(ledger)
+        store = SqliteStore("abe/ledger.sqlite3")
+        import_ledger(store)
+        monkeypatch.setenv("OLDABE_STORAGE", "sqlite")
+        process_payments_and_record_updates()
+        export_ledger(store)
+
+        for filename in [
+            "abe/transactions.txt",
+            "abe/debts.txt",
+            "abe/advances.txt",
+            "abe/itemized_payments.txt",
+            "abe/attributions.txt",
+            "abe/valuation.txt",
+        ]:
+            assert _read(ledger, filename) == _read(csv_root, filename)
@@ -1,3 +1,5 @@
+import pickle
+
 from oldabe.tally import Tally
 
 
@@ -11,3 +13,9 @@ class TestTally:
         tally1 = Tally([("a", 1), ("b", 1), ("c", 2), ("a", 1)])
         tally2 = Tally([("b", 1), ("c", 1)])
         assert tally1 - tally2 == {'a': 2, 'b': 0, 'c': 1}
+
+    def test_pickle(self):
+        tally = pickle.loads(pickle.dumps(Tally([("a", 1)])))
+        assert type(tally) is Tally
+        assert tally == {'a': 1}
+        assert tally['b'] == 0
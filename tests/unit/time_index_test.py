@@ -0,0 +1,165 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+import time_machine
+from unittest.mock import patch
+
+from oldabe import compaction, time_index
+from oldabe.money_out import compile_outstanding_balances
+from oldabe.repos import TransactionsRepo
+from oldabe.time_index import read_index, rows_as_of, update_index
+
+INDEX_FILE = "./abe/.cache/transactions-index.json"
+TRANSACTION = "{},{},1.txt,abcd123,{}\n"
+START = datetime(1985, 10, 26, 1, 24)
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(time_index, "BLOCK_ROWS", 3)
+
+
+def _append(*rows):
+    with open("./abe/transactions.txt", "a") as f:
+        for email, amount, created_at in rows:
+            f.write(TRANSACTION.format(email, amount, created_at))
+
+
+def _ledger(minutes):
+    return [
+        (f"contributor-{i % 4}", f"{i}.00", START + timedelta(minutes=m))
+        for i, m in enumerate(minutes)
+    ]
+
+
+def _as_of(as_of):
+    return [
+        (t.email, t.amount)
+        for t in rows_as_of(TransactionsRepo(), as_of, INDEX_FILE)
+    ]
+
+
+def _filtered(as_of):
+    return [
+        (t.email, t.amount)
+        for t in TransactionsRepo()
+        if t.created_at <= as_of
+    ]
+
+
+class TestRowsAsOf:
+    def test_chronological_ledger(self, fs):
+        fs.create_dir("./abe")
+        _append(*_ledger(range(20)))
+        for minutes in (-1, 0, 2, 3, 10, 19, 20):
+            as_of = START + timedelta(minutes=minutes)
+            assert _as_of(as_of) == _filtered(as_of)
+        index = read_index(INDEX_FILE)
+        assert index.monotonic
+        assert len(index.blocks) == 7
+
+    def test_unordered_ledger(self, fs):
+        fs.create_dir("./abe")
+        minutes = list(range(20))
+        random.Random(0).shuffle(minutes)
+        _append(*_ledger(minutes))
+        for minutes in (-1, 0, 2, 3, 10, 19, 20):
+            as_of = START + timedelta(minutes=minutes)
+            assert _as_of(as_of) == _filtered(as_of)
+        assert not read_index(INDEX_FILE).monotonic
+
+    def test_indexes_appended_rows_only(self, fs):
+        fs.create_dir("./abe")
+        _append(*_ledger(range(4)))
+        update_index(TransactionsRepo(), INDEX_FILE)
+        _append(*_ledger(range(4, 8)))
+        with open("./abe/transactions.txt", "a") as f:
+            # a row that is still being written
+            f.write(f"sid,1.00,1.txt,abcd123,{START}")
+        index = update_index(TransactionsRepo(), INDEX_FILE)
+        assert [block.rows for block in index.blocks] == [3, 3, 2]
+        as_of = START + timedelta(minutes=100)
+        assert _as_of(as_of) == _filtered(as_of)
+        assert len(_as_of(as_of)) == 9
+
+    def test_rewritten_ledger_invalidates_index(self, fs):
+        fs.create_dir("./abe")
+        _append(*_ledger(range(8)))
+        update_index(TransactionsRepo(), INDEX_FILE)
+        with open("./abe/transactions.txt", "w") as f:
+            f.write("")
+        _append(*_ledger([5, 4]))
+        assert _as_of(START + timedelta(minutes=4)) == [
+            ("contributor-1", Decimal("1.00"))
+        ]
+        assert not read_index(INDEX_FILE).monotonic
+
+
+class TestCompileAsOf:
+    def test_as_of(self, fs):
+        fs.create_file(
+            "./abe/transactions.txt",
+            contents=(
+                "sid,47.00,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "jair,28.20,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "sid,10.00,2.txt,abcd123,1985-11-26 01:24:00\n"
+            ),
+        )
+        fs.create_file(
+            "./abe/debts.txt",
+            contents="ariana,18.80,1.txt,abcd123,1985-10-26 01:24:00\n",
+        )
+        fs.create_file(
+            "./abe/payouts/1.txt",
+            contents="sid,sid,$40.00,1985-11-01 01:24:00\n",
+        )
+        october = compile_outstanding_balances(datetime(1985, 10, 31))
+        assert "sid | 47.00" in october
+        assert "**Total** = 75.20" in october
+        assert "ariana | 18.80" in october
+        november = compile_outstanding_balances(datetime(1985, 11, 30))
+        assert "sid | 17.00" in november
+        assert compile_outstanding_balances(datetime(1985, 10, 1)).startswith(
+            "There are no outstanding (payable) balances."
+        )
+        assert november == compile_outstanding_balances()
+
+    @patch('oldabe.models.default_commit_hash', return_value='abcd123')
+    def test_as_of_before_compaction(self, mock_git_rev, fs):
+        fs.create_file(
+            "./abe/transactions.txt",
+            contents="sid,47.00,1.txt,abcd123,1985-10-26 01:24:00\n",
+        )
+        fs.create_file(
+            "./abe/debts.txt",
+            contents=(
+                "ariana,18.80,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "ariana,-10.00,2.txt,abcd123,1985-11-26 01:24:00\n"
+            ),
+        )
+        fs.create_file(
+            "./abe/advances.txt",
+            contents=(
+                "sid,3.50,1.txt,abcd123,1985-10-26 01:24:00\n"
+                "sid,-1.00,2.txt,abcd123,1985-11-26 01:24:00\n"
+            ),
+        )
+        times = [datetime(1985, 10, 31), datetime(1985, 11, 30), None]
+        before = [compile_outstanding_balances(as_of) for as_of in times]
+        with time_machine.travel(datetime(1985, 12, 15), tick=False):
+            compaction.main()
+        assert [compile_outstanding_balances(as_of) for as_of in times] == (
+            before
+        )
+        assert "ariana | 18.80" in before[0]
+        assert "sid | 3.50" in before[0]
+        # debts and advances recorded since the compaction
+        with open("./abe/debts.txt", "a") as f:
+            f.write("ariana,1.00,3.txt,abcd123,1986-01-26 01:24:00\n")
+        assert "ariana | 8.80" in compile_outstanding_balances(
+            datetime(1985, 12, 31)
+        )
+        assert "ariana | 9.80" in compile_outstanding_balances()
+        assert compile_outstanding_balances(times[0]) == before[0]